@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for ARKA's response post-processing
+
+Runs the compiled post-processor in bot/postprocess.py against the previous
+implementation (kept below as the baseline), checks both give the same text
+and prints the cost per response.
+
+Usage: python benchmark_postprocess.py [rounds]
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ollama-bot', 'src'))
+
+import re
+import time
+
+from bot.postprocess import make_sentence_friendly
+from bot.text_normalization import remove_emojis
+
+RESPONSES = [
+    "I am so glad you asked! That is a great question, sir. It is basically all about practice 😄",
+    "Yes, I would love to help you with that. You are going to do great! 🚀",
+    "Sure thing, yaar! I cannot wait to hear how it goes. Do not forget to drink water 😊",
+    "Haha, that is pretty cool! I will not tell anyone, promise. 🤫 Interesting choice though.",
+    "You are absolutely right about that. It does not matter much, no worries 🎉🎉",
+    "The weather is nice today - about 24°C and sunny ☀️. You should not stay inside all day!",
+    "I have not seen that movie yet, but I would watch it. Is it good? 🎬",
+    "Right, so the trick is to start small. You could not go wrong with a 10 minute walk! 💪",
+]
+
+
+def legacy_make_sentence_friendly(text, state):
+    """The per-call re.sub version this benchmark compares against"""
+    contractions = {
+        'I am': "I'm", 'you are': "you're", 'it is': "it's", 'that is': "that's",
+        'I will': "I'll", 'you will': "you'll", 'I would': "I'd", 'you would': "you'd",
+        'cannot': "can't", 'do not': "don't", 'does not': "doesn't", 'will not': "won't",
+        'should not': "shouldn't", 'could not': "couldn't", 'would not': "wouldn't",
+        'have not': "haven't", 'has not': "hasn't", 'had not': "hadn't"
+    }
+    for full, contraction in contractions.items():
+        text = re.sub(r'\b' + full + r'\b', contraction, text, flags=re.IGNORECASE)
+
+    lower = text.lower()
+    respect_words = ['sir', 'madam', 'great question', 'smart', 'absolutely right', 'good thinking']
+    if any(word in lower for word in respect_words):
+        state['respect_seen'] = True
+    elif not state.get('respect_seen') and len(text) > 30:
+        if 'good' in lower:
+            text = re.sub(r'\bgood\b', 'really good', text, flags=re.IGNORECASE)
+            state['respect_seen'] = True
+        elif 'right' in lower:
+            text = re.sub(r'\bright\b', 'absolutely right', text, flags=re.IGNORECASE)
+            state['respect_seen'] = True
+
+    friendly_words = ['yaar', 'bhai', 'actually', 'basically', 'no worries', 'totally']
+    if any(word in lower for word in friendly_words):
+        state['friendly_seen'] = True
+    elif not state.get('friendly_seen') and len(text) > 20:
+        if 'yes' in lower:
+            text = re.sub(r'\byes\b', 'yes, totally', text, flags=re.IGNORECASE)
+            state['friendly_seen'] = True
+        elif 'sure' in lower:
+            text = re.sub(r'\bsure\b', 'sure, yaar', text, flags=re.IGNORECASE)
+            state['friendly_seen'] = True
+        elif 'no problem' not in lower and 'help' in lower:
+            text = text.rstrip('.!?') + ', no worries!'
+            state['friendly_seen'] = True
+
+    humor_additions = [
+        ('great', 'totally great'),
+        ('interesting', 'quite interesting'),
+        ('cool', 'pretty cool'),
+        ('nice', 'really nice')
+    ]
+    if not state.get('humor_added'):
+        for original, replacement in humor_additions:
+            if original in text.lower() and replacement not in text.lower():
+                text = re.sub(r'\b' + original + r'\b', replacement, text, flags=re.IGNORECASE)
+                state['humor_added'] = True
+                break
+
+    text = text.strip()
+    if text and not text[-1] in '.!?':
+        text += '.'
+    return text
+
+
+def legacy_remove_emojis(text):
+    """The recompiling, multi-pass version this benchmark compares against"""
+    import re
+    emoji_pattern = re.compile("["
+                               u"\U0001F600-\U0001F64F"
+                               u"\U0001F300-\U0001F5FF"
+                               u"\U0001F680-\U0001F6FF"
+                               u"\U0001F1E0-\U0001F1FF"
+                               u"\U00002700-\U000027BF"
+                               u"\U000024C2-\U0001F251"
+                               u"\U0001F900-\U0001F9FF"
+                               u"\U0001FA70-\U0001FAFF"
+                               u"\U00002600-\U000026FF"
+                               u"\U0000FE00-\U0000FE0F"
+                               "]+", flags=re.UNICODE)
+    clean_text = emoji_pattern.sub(' ', text)
+    emoji_chars = ['😄', '😊', '😅', '🎉', '🎯', '✅', '🚀', '🔥', '💡', '🎵',
+                   '🗣️', '🎤', '🔊', '🧠', '🔄', '🛑', '⚠️', '❌', '🔍']
+    for emoji in emoji_chars:
+        clean_text = clean_text.replace(emoji, ' ')
+    clean_text = re.sub(r'\s+', ' ', clean_text).strip()
+    clean_text = re.sub(r'[^\w\s\.,!?\'":-]', ' ', clean_text)
+    clean_text = re.sub(r'\s+', ' ', clean_text).strip()
+    return clean_text
+
+
+def process(response, friendly, strip):
+    """Post-process one response the way the voice bot does: friendly text, then speech text"""
+    state = {}
+    spoken = []
+    for sentence in re.split(r'(?<=[.!?])\s+', response)[:3]:
+        spoken.append(strip(friendly(sentence, state)))
+    return spoken
+
+
+def measure(friendly, strip, rounds):
+    """Microseconds per response"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for response in RESPONSES:
+            process(response, friendly, strip)
+    return (time.perf_counter() - start) / (rounds * len(RESPONSES)) * 1e6
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    for response in RESPONSES:
+        expected = process(response, legacy_make_sentence_friendly, legacy_remove_emojis)
+        actual = process(response, make_sentence_friendly, remove_emojis)
+        assert actual == expected, (expected, actual)
+    print(f"✅ Same output as before for {len(RESPONSES)} sample responses")
+
+    legacy = measure(legacy_make_sentence_friendly, legacy_remove_emojis, rounds)
+    compiled = measure(make_sentence_friendly, remove_emojis, rounds)
+    print(f"Before: {legacy:.1f} µs per response")
+    print(f"After:  {compiled:.1f} µs per response ({legacy / compiled:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
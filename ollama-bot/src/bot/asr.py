@@ -0,0 +1,368 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import speech_recognition as sr
+
+from config import settings
+
+# Loaded models are shared by every backend instance so they load only once
+_MODEL_CACHE: Dict[tuple, object] = {}
+_MODEL_LOCK = threading.Lock()
+
+
+def _cached_model(key: tuple, loader):
+    """Load a model once per process and keep it warm"""
+    with _MODEL_LOCK:
+        if key not in _MODEL_CACHE:
+            _MODEL_CACHE[key] = loader()
+        return _MODEL_CACHE[key]
+
+
+class Hypothesis:
+    """A recognition result for the utterance so far"""
+
+    def __init__(self, text: str, final: bool = False):
+        self.text = text.strip()
+        self.final = final
+
+    def __repr__(self):
+        return f"Hypothesis({self.text!r}, final={self.final})"
+
+
+class StreamingSession:
+    """Recognizes one utterance incrementally, chunk by chunk"""
+
+    def accept(self, chunk: bytes) -> Optional[Hypothesis]:
+        """
+        Feed the next chunk of 16-bit mono PCM
+
+        Returns:
+            A partial (or engine-final) hypothesis, or None if there is nothing new
+        """
+        raise NotImplementedError
+
+    def finish(self) -> Hypothesis:
+        """End the utterance and return the final hypothesis"""
+        raise NotImplementedError
+
+
+class BufferedSession(StreamingSession):
+    """Streaming wrapper for engines without partial results: transcribes at the end"""
+
+    def __init__(self, backend: 'ASRBackend', sample_rate: int, sample_width: int = 2):
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.chunks: List[bytes] = []
+
+    def accept(self, chunk: bytes) -> Optional[Hypothesis]:
+        self.chunks.append(chunk)
+        return None
+
+    def finish(self) -> Hypothesis:
+        audio = sr.AudioData(b"".join(self.chunks), self.sample_rate, self.sample_width)
+        self.chunks = []
+        return Hypothesis(self.backend.transcribe(audio) or "", final=True)
+
+
+class VoskSession(StreamingSession):
+    """Vosk recognizer fed directly from the microphone"""
+
+    def __init__(self, model, sample_rate: int):
+        import vosk
+
+        self.recognizer = vosk.KaldiRecognizer(model, sample_rate)
+
+    def accept(self, chunk: bytes) -> Optional[Hypothesis]:
+        if self.recognizer.AcceptWaveform(chunk):
+            # Vosk found an endpoint on its own
+            return Hypothesis(json.loads(self.recognizer.Result()).get('text', ''), final=True)
+        return Hypothesis(json.loads(self.recognizer.PartialResult()).get('partial', ''))
+
+    def finish(self) -> Hypothesis:
+        return Hypothesis(json.loads(self.recognizer.FinalResult()).get('text', ''), final=True)
+
+
+class Endpointer:
+    """
+    Decides when the user has finished an utterance, based on live partial hypotheses
+
+    The utterance ends once the partial text has stopped changing for a short
+    time. Very short phrases without end punctuation ("what is") get a longer
+    grace period, since they are usually the start of a longer sentence.
+    """
+
+    def __init__(self, stable_time: float = 0.6, incomplete_stable_time: float = 1.5,
+                 max_duration: float = 10.0):
+        """
+        Args:
+            stable_time: Seconds the partial must stay unchanged to end the utterance
+            incomplete_stable_time: Same, for phrases that look incomplete
+            max_duration: Hard limit on utterance length (like phrase_time_limit)
+        """
+        self.stable_time = stable_time
+        self.incomplete_stable_time = incomplete_stable_time
+        self.max_duration = max_duration
+        self.reset()
+
+    def reset(self):
+        """Start a new utterance"""
+        self.text = ""
+        self.started_at = None
+        self.changed_at = None
+
+    def update(self, hypothesis: Optional[Hypothesis], now: Optional[float] = None,
+               in_speech: Optional[bool] = None) -> bool:
+        """
+        Track the latest hypothesis
+
+        Args:
+            hypothesis: Latest result from the streaming session (may be None)
+            now: Current time (default: time.monotonic())
+            in_speech: Voice activity state, if a VAD is running. Once it drops
+                after some text was recognized, the utterance is over.
+
+        Returns:
+            True once the utterance is complete
+        """
+        now = time.monotonic() if now is None else now
+
+        if hypothesis is not None and hypothesis.text:
+            if self.started_at is None:
+                self.started_at = now
+            if hypothesis.text != self.text:
+                self.text = hypothesis.text
+                self.changed_at = now
+            if hypothesis.final:
+                return True
+
+        if not self.text:
+            return False
+
+        if now - self.started_at >= self.max_duration:
+            return True
+
+        if in_speech is True:
+            return False  # Still talking, whatever the partials say
+        if in_speech is False and self.looks_complete(self.text):
+            return True
+
+        wait = self.stable_time if self.looks_complete(self.text) else self.incomplete_stable_time
+        return now - self.changed_at >= wait
+
+    @staticmethod
+    def looks_complete(text: str) -> bool:
+        """Very short phrases without end punctuation are probably cut off"""
+        return len(text.split()) >= 3 or text.endswith(('.', '!', '?'))
+
+
+class ASRBackend:
+    """Base class for speech-to-text engines"""
+
+    name = "base"
+    offline = False
+    streaming = False
+    install_hint = ""
+
+    def __init__(self, language: str = settings.ASR_LANGUAGE):
+        """
+        Args:
+            language: Language hint such as 'en-IN'
+        """
+        self.language = language
+
+    def load(self):
+        """Load the engine's model (called once, before the first utterance)"""
+
+    def transcribe(self, audio: sr.AudioData) -> Optional[str]:
+        """
+        Convert captured audio to text
+
+        Args:
+            audio: AudioData from speech_recognition
+
+        Returns:
+            The recognized text, or None if nothing was understood
+        """
+        raise NotImplementedError
+
+    def start_stream(self, sample_rate: int, sample_width: int = 2) -> StreamingSession:
+        """
+        Start recognizing a new utterance incrementally
+
+        Engines without native streaming buffer the audio and transcribe at the end.
+        """
+        return BufferedSession(self, sample_rate, sample_width)
+
+
+class GoogleASR(ASRBackend):
+    """Google Web Speech API (needs internet, one round trip per utterance)"""
+
+    name = "google"
+
+    def __init__(self, language: str = settings.ASR_LANGUAGE):
+        super().__init__(language)
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, audio: sr.AudioData) -> Optional[str]:
+        try:
+            text = self.recognizer.recognize_google(audio, language=self.language, show_all=False)
+        except sr.UnknownValueError:
+            return None
+        return text.strip() if text else None
+
+
+class SphinxASR(ASRBackend):
+    """CMU PocketSphinx (offline, lower accuracy)"""
+
+    name = "sphinx"
+    offline = True
+    install_hint = "Install it with: pip3 install pocketsphinx"
+
+    def __init__(self, language: str = settings.ASR_LANGUAGE):
+        super().__init__(language)
+        self.recognizer = sr.Recognizer()
+
+    def load(self):
+        import pocketsphinx  # noqa: F401 (recognize_sphinx only imports it on the first utterance)
+
+    def transcribe(self, audio: sr.AudioData) -> Optional[str]:
+        try:
+            text = self.recognizer.recognize_sphinx(audio)
+        except sr.UnknownValueError:
+            return None
+        return text.strip() if text else None
+
+
+class VoskASR(ASRBackend):
+    """Vosk/Kaldi running locally on the CPU"""
+
+    name = "vosk"
+    offline = True
+    streaming = True
+    install_hint = ("Install it with: pip3 install vosk, and unpack a model from "
+                    "https://alphacephei.com/vosk/models into VOSK_MODEL_PATH")
+    sample_rate = 16000
+
+    def __init__(self, language: str = settings.ASR_LANGUAGE, model_path: str = settings.VOSK_MODEL_PATH):
+        """
+        Args:
+            language: Language hint, used to pick a model when model_path is missing
+            model_path: Directory of an unpacked Vosk model
+        """
+        super().__init__(language)
+        self.model_path = model_path
+        self.model = None
+
+    def load(self):
+        import vosk
+
+        vosk.SetLogLevel(-1)
+
+        def loader():
+            if os.path.isdir(self.model_path):
+                return vosk.Model(self.model_path)
+            return vosk.Model(lang=self.language.lower())
+
+        self.model = _cached_model((self.name, self.model_path, self.language), loader)
+
+    def transcribe(self, audio: sr.AudioData) -> Optional[str]:
+        session = VoskSession(self.model, self.sample_rate)
+        first = session.accept(audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2))
+        texts = [first.text] if first.final else []
+        texts.append(session.finish().text)
+        return " ".join(text for text in texts if text) or None
+
+    def start_stream(self, sample_rate: int, sample_width: int = 2) -> StreamingSession:
+        return VoskSession(self.model, sample_rate)
+
+
+class WhisperASR(ASRBackend):
+    """faster-whisper with an int8-quantized model on the CPU"""
+
+    name = "whisper"
+    offline = True
+    install_hint = "Install it with: pip3 install faster-whisper (the model downloads on first use)"
+    sample_rate = 16000
+
+    def __init__(self, language: str = settings.ASR_LANGUAGE, model_size: str = settings.WHISPER_MODEL_SIZE):
+        """
+        Args:
+            language: Language hint; Whisper only needs the language part ('en')
+            model_size: Whisper model name, e.g. 'tiny.en' or 'base.en'
+        """
+        super().__init__(language)
+        self.model_size = model_size
+        self.model = None
+
+    def load(self):
+        from faster_whisper import WhisperModel
+
+        self.model = _cached_model(
+            (self.name, self.model_size),
+            lambda: WhisperModel(self.model_size, device="cpu", compute_type="int8")
+        )
+
+    def transcribe(self, audio: sr.AudioData) -> Optional[str]:
+        import numpy as np
+
+        pcm = audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2)
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        segments, _ = self.model.transcribe(samples, language=self.language.split('-')[0], beam_size=1)
+        text = " ".join(segment.text.strip() for segment in segments).strip()
+        return text or None
+
+
+ASR_BACKENDS = {
+    backend.name: backend for backend in (VoskASR, WhisperASR, SphinxASR, GoogleASR)
+}
+# Used when an offline engine can't load; it must be offline too, so the
+# user's audio never leaves the machine unless ASR_ENGINE=google was chosen
+OFFLINE_FALLBACK = SphinxASR.name
+
+
+def create_asr_backend(name: Optional[str] = None, **kwargs) -> ASRBackend:
+    """
+    Create and load the configured speech recognition backend
+
+    If an offline engine (or its model) is not installed, falls back to
+    offline Sphinx recognition. Audio is only sent to Google's online
+    recognizer when ASR_ENGINE=google is set explicitly.
+
+    Args:
+        name: Backend name (default: settings.ASR_ENGINE)
+        **kwargs: Passed to the backend constructor
+
+    Returns:
+        A loaded ASRBackend
+
+    Raises:
+        RuntimeError: If neither the engine nor the offline fallback can load
+    """
+    name = (name or settings.ASR_ENGINE).lower()
+    if name not in ASR_BACKENDS:
+        raise ValueError(f"Unknown ASR engine '{name}'. Choose from: {', '.join(ASR_BACKENDS)}")
+
+    backend = ASR_BACKENDS[name](**kwargs)
+    try:
+        backend.load()
+    except Exception as e:
+        if not backend.offline or name == OFFLINE_FALLBACK:
+            raise RuntimeError(f"Could not load '{name}' speech recognition ({e}). {backend.install_hint}".strip()) from e
+        print(f"Could not load '{name}' speech recognition ({e}). Falling back to offline {OFFLINE_FALLBACK} recognition.")
+        fallback = ASR_BACKENDS[OFFLINE_FALLBACK](language=kwargs.get('language', settings.ASR_LANGUAGE))
+        try:
+            fallback.load()
+        except Exception as fallback_error:
+            raise RuntimeError(
+                f"Could not load '{name}' speech recognition ({e}) nor the offline {OFFLINE_FALLBACK} fallback "
+                f"({fallback_error}). {backend.install_hint}, or set ASR_ENGINE=google to use Google's online "
+                f"recognizer."
+            ) from e
+        backend = fallback
+
+    print(f"Speech recognition engine: {backend.name}{' (offline)' if backend.offline else ''}")
+    return backend
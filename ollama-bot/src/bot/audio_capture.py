@@ -0,0 +1,397 @@
+import socket
+import threading
+import time
+import wave
+from typing import Callable, Optional, Union
+
+import numpy as np
+import speech_recognition as sr
+
+
+class RingBuffer:
+    def __init__(self, capacity: int):
+        """
+        Pre-allocated ring buffer of 16-bit samples with one writer and many readers
+
+        Samples are addressed by absolute position (number of samples written
+        since start), so each reader keeps its own cursor and never blocks the
+        writer. Reads that don't wrap around return views into the buffer
+        without copying; a view stays valid until the writer laps it.
+
+        Args:
+            capacity: Number of samples kept
+        """
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=np.int16)
+        self.written = 0
+        self.condition = threading.Condition()
+
+    def write(self, samples: np.ndarray):
+        """Append samples, overwriting the oldest ones"""
+        n = len(samples)
+        if n > self.capacity:
+            self.written += n - self.capacity
+            samples = samples[-self.capacity:]
+            n = self.capacity
+
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        self.buffer[start:start + first] = samples[:first]
+        self.buffer[:n - first] = samples[first:]
+
+        with self.condition:
+            self.written += n
+            self.condition.notify_all()
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """
+        Samples in [start, end) by absolute position
+
+        Returns:
+            A view into the buffer, or a copy if the range wraps around
+        """
+        oldest = self.written - self.capacity
+        if start < oldest:
+            raise ValueError("Requested samples have already been overwritten")
+        begin = start % self.capacity
+        stop = begin + (end - start)
+        if stop <= self.capacity:
+            return self.buffer[begin:stop]
+        return np.concatenate((self.buffer[begin:], self.buffer[:stop - self.capacity]))
+
+    def wait_until(self, position: int, timeout: Optional[float] = None,
+                   stopped: Optional[Callable[[], bool]] = None) -> bool:
+        """Block until at least `position` samples have been written (or stopped() says give up)"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.written >= position or (stopped is not None and stopped()), timeout)
+            return self.written >= position
+
+
+class ListenAborted(sr.WaitTimeoutError):
+    """CaptureReader.listen() was told to give up by its abort check"""
+
+
+class CaptureReader:
+    def __init__(self, capture: 'AudioSource', backlog: float = 0.0):
+        """
+        A consumer's cursor into the shared capture buffer
+
+        Args:
+            capture: The running AudioSource (microphone, file, PCM or socket)
+            backlog: Seconds of already-captured audio to start with
+        """
+        self.capture = capture
+        self.ring = capture.ring
+        self.position = max(0, self.ring.written - int(backlog * capture.sample_rate))
+
+    def fork(self) -> 'CaptureReader':
+        """Another reader starting exactly where this one is now"""
+        other = CaptureReader(self.capture)
+        other.position = self.position
+        return other
+
+    def skip_to_live(self):
+        """Drop everything captured so far and continue from now"""
+        self.position = self.ring.written
+
+    def read(self, n: int, timeout: Optional[float] = None, stop_early: bool = False) -> Optional[np.ndarray]:
+        """
+        Next n samples, waiting for them to be captured
+
+        Args:
+            n: Number of samples
+            timeout: Seconds to wait (None waits forever)
+            stop_early: Give up as soon as the source is stopped instead of
+                        sitting out the timeout
+
+        Returns:
+            int16 samples (usually a zero-copy view), or None on timeout
+        """
+        stopped = (lambda: not self.capture.running) if stop_early else None
+        if not self.ring.wait_until(self.position + n, timeout, stopped):
+            return None
+
+        # If we fell so far behind that the writer lapped us, skip ahead
+        oldest = self.ring.written - self.ring.capacity
+        if self.position < oldest:
+            self.position = oldest
+
+        data = self.ring.read(self.position, self.position + n)
+        self.position += n
+        return data
+
+    def listen(self, vad, timeout: Optional[float] = None, phrase_time_limit: Optional[float] = None,
+               preroll: float = 0.3, on_speech: Optional[Callable[[], None]] = None,
+               abort: Optional[Callable[[], bool]] = None) -> sr.AudioData:
+        """
+        Wait for the user to speak and return the utterance (replaces Recognizer.listen)
+
+        Args:
+            vad: VoiceActivityDetector used to find the start and end of speech
+            timeout: Seconds to wait for speech to start
+            phrase_time_limit: Maximum utterance length in seconds
+            preroll: Seconds of audio kept before the speech onset
+            on_speech: Called at the speech onset, before the utterance is complete
+            abort: Checked every chunk; once it returns True the audio is
+                   dropped (e.g. ARKA started talking and would be recorded)
+
+        Returns:
+            The utterance as AudioData
+
+        Raises:
+            sr.WaitTimeoutError: No speech started within the timeout
+            ListenAborted: abort() returned True
+        """
+        rate = self.capture.sample_rate
+        chunk = self.capture.chunk_size
+        vad.reset()
+
+        waited = 0
+        start = None
+        while True:
+            data = self.read(chunk, timeout=1.0, stop_early=True)
+            if data is None:
+                if not self.capture.running:
+                    raise sr.WaitTimeoutError("Microphone capture stopped")
+                continue
+
+            if abort is not None and abort():
+                raise ListenAborted("listening aborted")
+
+            states = vad.process(data)
+            if start is None:
+                waited += len(data)
+                if any(states):
+                    start = max(self.position - len(data) - int(preroll * rate), self.ring.written - self.ring.capacity)
+                    if on_speech is not None:
+                        on_speech()
+                elif timeout is not None and waited >= timeout * rate:
+                    raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+            elif not vad.in_speech or (phrase_time_limit and self.position - start >= phrase_time_limit * rate):
+                break
+
+        pcm = self.ring.read(start, self.position)
+        return sr.AudioData(pcm.tobytes(), rate, 2)
+
+
+class AudioSource:
+    def __init__(self, sample_rate: int = 16000, chunk_size: int = 1024, buffer_seconds: float = 30.0):
+        """
+        Where ARKA's ears get their audio: 16-bit mono PCM in a shared ring buffer
+
+        Listeners only ever see the ring buffer through CaptureReaders, so the
+        bots work the same whether the audio comes from the local microphone,
+        a WAV file, PCM pushed in from memory or a network socket.
+
+        Args:
+            sample_rate: Samples per second
+            chunk_size: Samples per read for listeners
+            buffer_seconds: How much audio the ring buffer keeps
+        """
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self.ring = RingBuffer(int(buffer_seconds * sample_rate))
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start delivering audio (does nothing if already running)"""
+        self.running = True
+
+    def stop(self):
+        """Stop delivering audio; waiting readers give up"""
+        self.running = False
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1)
+        self._wake_readers()
+
+    def reader(self, backlog: float = 0.0) -> CaptureReader:
+        """New cursor into the capture buffer, starting now (minus backlog seconds)"""
+        return CaptureReader(self, backlog)
+
+    def record(self, seconds: float) -> np.ndarray:
+        """Block for the given time and return what was captured"""
+        data = self.reader().read(int(seconds * self.sample_rate), timeout=seconds + 2)
+        return data if data is not None else np.zeros(0, dtype=np.int16)
+
+    def _wake_readers(self):
+        with self.ring.condition:
+            self.ring.condition.notify_all()
+
+
+class MicrophoneCapture(AudioSource):
+    def __init__(self, microphone: sr.Microphone, buffer_seconds: float = 30.0):
+        """
+        One long-lived microphone stream shared by every listener
+
+        A single thread reads the device and writes PCM into a ring buffer.
+        VAD, speech recognition and interrupt detection each read it through
+        their own CaptureReader, so the stream is opened once, nothing is lost
+        between listens and threads never fight over the device.
+
+        Args:
+            microphone: sr.Microphone to capture from (16-bit mono)
+            buffer_seconds: How much audio the ring buffer keeps
+        """
+        super().__init__(microphone.SAMPLE_RATE, microphone.CHUNK, buffer_seconds)
+        self.microphone = microphone
+        self._started = threading.Event()
+
+    def start(self):
+        """Open the microphone and start capturing (does nothing if already running)"""
+        if self.running:
+            return
+        self.running = True
+        self._started.clear()
+        self.thread = threading.Thread(target=self._capture_loop, name="mic-capture", daemon=True)
+        self.thread.start()
+        self._started.wait(5)
+
+    def _capture_loop(self):
+        try:
+            with self.microphone as source:
+                self._started.set()
+                while self.running:
+                    data = source.stream.read(source.CHUNK)
+                    self.ring.write(np.frombuffer(data, dtype=np.int16))
+        except Exception as e:
+            print(f"Microphone capture error: {e}")
+        finally:
+            self.running = False
+            self._started.set()
+            self._wake_readers()
+
+
+class PCMSource(AudioSource):
+    def __init__(self, sample_rate: int = 16000, chunk_size: int = 1024, buffer_seconds: float = 30.0):
+        """
+        Audio pushed in by the caller (in-memory buffers, network packets, tests)
+
+        Create readers before pushing: like a microphone, a reader only sees
+        audio that arrives after it was created (plus its backlog).
+        """
+        super().__init__(sample_rate, chunk_size, buffer_seconds)
+        self._odd_byte = b""
+
+    def push(self, pcm: Union[bytes, np.ndarray]):
+        """Append 16-bit mono samples (bytes may be split anywhere, even mid-sample)"""
+        if not self.running:
+            self.running = True
+        if isinstance(pcm, np.ndarray):
+            self.ring.write(pcm.astype(np.int16, copy=False))
+            return
+        pcm = self._odd_byte + pcm
+        usable = len(pcm) - len(pcm) % 2
+        self._odd_byte = pcm[usable:]
+        if usable:
+            self.ring.write(np.frombuffer(pcm[:usable], dtype=np.int16))
+
+    def end(self, silence: float = 1.0):
+        """
+        No more audio is coming
+
+        A little silence is appended first so the VAD can close an utterance
+        that was still going on when the input stopped.
+        """
+        if silence > 0:
+            self.ring.write(np.zeros(int(silence * self.sample_rate), dtype=np.int16))
+        self.running = False
+        self._wake_readers()
+
+
+class WavFileSource(PCMSource):
+    def __init__(self, path: str, speed: float = 1.0, chunk_size: int = 1024, buffer_seconds: float = 30.0):
+        """
+        Plays a WAV file into the capture buffer, as if someone said it into a microphone
+
+        Args:
+            path: 16-bit WAV file (stereo is mixed down to mono)
+            speed: 1.0 paces the audio in real time, 0 delivers it as fast as
+                   possible (create readers before start() then, and keep the
+                   file shorter than buffer_seconds)
+            chunk_size: Samples per read for listeners
+            buffer_seconds: How much audio the ring buffer keeps
+        """
+        with wave.open(path, 'rb') as f:
+            if f.getsampwidth() != 2:
+                raise ValueError(f"{path}: only 16-bit WAV files are supported")
+            sample_rate = f.getframerate()
+            samples = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+            channels = f.getnchannels()
+        if channels > 1:
+            samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+        super().__init__(sample_rate, chunk_size, buffer_seconds)
+        self.path = path
+        self.samples = samples.astype(np.int16)
+        self.speed = speed
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.sample_rate
+
+    def start(self):
+        """Start playing the file in the background"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._feed_loop, name="wav-source", daemon=True)
+        self.thread.start()
+
+    def _feed_loop(self):
+        started = time.monotonic()
+        for position in range(0, len(self.samples), self.chunk_size):
+            if not self.running:
+                return
+            if self.speed > 0:
+                # Absolute deadlines, so sleep overshoot doesn't add up over the file
+                delay = started + position / (self.sample_rate * self.speed) - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            self.ring.write(self.samples[position:position + self.chunk_size])
+        self.end()
+
+
+class SocketSource(PCMSource):
+    def __init__(self, sock: socket.socket, sample_rate: int = 16000, chunk_size: int = 1024,
+                 buffer_seconds: float = 30.0):
+        """
+        Raw 16-bit mono PCM received on a connected socket, until the peer closes it
+
+        Args:
+            sock: Connected stream socket (the caller still owns and closes it)
+            sample_rate: Rate the peer sends at
+            chunk_size: Samples per read for listeners
+            buffer_seconds: How much audio the ring buffer keeps
+        """
+        super().__init__(sample_rate, chunk_size, buffer_seconds)
+        self.sock = sock
+
+    def start(self):
+        """Start receiving in the background"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._receive_loop, name="socket-source", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop receiving (unblocks the receiving thread by shutting down the read side)"""
+        self.running = False
+        try:
+            self.sock.shutdown(socket.SHUT_RD)
+        except OSError:
+            pass
+        super().stop()
+
+    def _receive_loop(self):
+        try:
+            while self.running:
+                data = self.sock.recv(self.chunk_size * 2)
+                if not data:
+                    break
+                self.push(data)
+        except OSError as e:
+            if self.running:
+                print(f"Audio socket error: {e}")
+        finally:
+            self.end()
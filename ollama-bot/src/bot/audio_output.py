@@ -0,0 +1,255 @@
+import socket
+import threading
+import time
+import wave
+from typing import Callable, Dict, Optional, Tuple
+
+
+class AudioClip:
+    def __init__(self, pcm: bytes, sample_rate: int, channels: int = 1, sample_width: int = 2):
+        """
+        Raw PCM audio ready to be played
+
+        Args:
+            pcm: Interleaved little-endian samples
+            sample_rate: Samples per second
+            channels: Number of channels
+            sample_width: Bytes per sample
+        """
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+
+    @property
+    def frame_bytes(self) -> int:
+        return self.channels * self.sample_width
+
+    @property
+    def duration(self) -> float:
+        """Length in seconds"""
+        return len(self.pcm) / (self.frame_bytes * self.sample_rate)
+
+    @classmethod
+    def from_wav(cls, path: str) -> 'AudioClip':
+        """Load a WAV file"""
+        with wave.open(path, 'rb') as f:
+            return cls(f.readframes(f.getnframes()), f.getframerate(), f.getnchannels(), f.getsampwidth())
+
+    def to_wav(self, path: str):
+        """Save as a WAV file"""
+        with wave.open(path, 'wb') as f:
+            f.setnchannels(self.channels)
+            f.setsampwidth(self.sample_width)
+            f.setframerate(self.sample_rate)
+            f.writeframes(self.pcm)
+
+
+class AudioSink:
+    # Plays on this machine's speakers (the TTS engine may then speak by itself as a fallback)
+    local = False
+
+    def __init__(self, chunk_ms: int = 20, reference=None, realtime: bool = False, lead_ms: int = 100):
+        """
+        Where ARKA's voice goes: PCM clips written out in small chunks
+
+        Writing chunk by chunk means playback can stop within about chunk_ms
+        of being asked to, whatever the destination. Subclasses only write
+        chunks; they don't know about stopping or echo references.
+
+        Args:
+            chunk_ms: Milliseconds of audio written at a time
+            reference: Told about every chunk before it's played (PlaybackReference, for echo cancellation)
+            realtime: Pace writes at playback speed (for destinations that would
+                      otherwise swallow a whole clip at once, so stop() still cuts it short)
+            lead_ms: How far ahead of real time a paced sink may run
+        """
+        self.chunk_ms = chunk_ms
+        self.reference = reference
+        self.realtime = realtime
+        self.lead = lead_ms / 1000
+        self._lock = threading.Lock()
+
+    def play(self, clip: AudioClip, should_stop: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Play a clip, blocking until it ends or should_stop() returns True
+
+        Returns:
+            True if the whole clip was played
+        """
+        chunk = max(1, clip.sample_rate * self.chunk_ms // 1000) * clip.frame_bytes
+        bytes_per_second = clip.frame_bytes * clip.sample_rate
+        with self._lock:
+            started = time.monotonic()
+            for start in range(0, len(clip.pcm), chunk):
+                if should_stop is not None and should_stop():
+                    return False
+                if self.realtime:
+                    ahead = start / bytes_per_second - (time.monotonic() - started)
+                    if ahead > self.lead:
+                        time.sleep(ahead - self.lead)
+                        if should_stop is not None and should_stop():
+                            return False
+                pcm = clip.pcm[start:start + chunk]
+                if self.reference is not None:
+                    self.reference.write(pcm, clip.sample_rate, clip.channels, clip.sample_width)
+                self._write(clip, pcm)
+        return True
+
+    def _write(self, clip: AudioClip, pcm: bytes):
+        """Write one chunk of clip"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release the destination"""
+
+
+class PCMPlayer(AudioSink):
+    local = True
+
+    def __init__(self, chunk_ms: int = 20, pyaudio_module=None, reference=None):
+        """
+        Plays PCM clips on the default output device
+
+        Audio is written in small chunks, so playback can stop within about
+        chunk_ms of being asked to. Output streams are kept open per format
+        and reused, so starting a clip costs no device setup.
+
+        Args:
+            chunk_ms: Milliseconds of audio written at a time
+            pyaudio_module: PyAudio module to use (default: import pyaudio)
+            reference: Told about every chunk before it's played (PlaybackReference, for echo cancellation)
+        """
+        super().__init__(chunk_ms, reference)
+        self._pyaudio_module = pyaudio_module
+        self._audio = None
+        self._streams: Dict[Tuple[int, int, int], object] = {}
+
+    def _stream(self, clip: AudioClip):
+        key = (clip.sample_rate, clip.channels, clip.sample_width)
+        stream = self._streams.get(key)
+        if stream is None:
+            if self._audio is None:
+                if self._pyaudio_module is None:
+                    import pyaudio
+                    self._pyaudio_module = pyaudio
+                self._audio = self._pyaudio_module.PyAudio()
+            stream = self._audio.open(format=self._audio.get_format_from_width(clip.sample_width),
+                                      channels=clip.channels, rate=clip.sample_rate, output=True)
+            self._streams[key] = stream
+        return stream
+
+    def _write(self, clip: AudioClip, pcm: bytes):
+        # The device blocks until it has room, which paces playback
+        self._stream(clip).write(pcm)
+
+    def close(self):
+        """Close the output streams"""
+        with self._lock:
+            for stream in self._streams.values():
+                stream.stop_stream()
+                stream.close()
+            self._streams.clear()
+            if self._audio is not None:
+                self._audio.terminate()
+                self._audio = None
+
+
+class _FormatCheck:
+    """Sinks that produce one continuous stream need every clip in the same format"""
+    def __init__(self):
+        self.format: Optional[Tuple[int, int, int]] = None
+
+    def check(self, clip: AudioClip) -> bool:
+        """True the first time a format is seen; raises ValueError if it changes"""
+        key = (clip.sample_rate, clip.channels, clip.sample_width)
+        if self.format is None:
+            self.format = key
+            return True
+        if key != self.format:
+            raise ValueError(f"Clip format {key} doesn't match the stream's {self.format}")
+        return False
+
+
+class BufferSink(AudioSink):
+    def __init__(self, chunk_ms: int = 20, reference=None, realtime: bool = False):
+        """
+        Keeps everything played in memory (tests, benchmarks, post-processing)
+
+        Args:
+            chunk_ms: Milliseconds of audio written at a time
+            reference: Told about every chunk before it's played
+            realtime: Take as long as the audio lasts, like a real device
+        """
+        super().__init__(chunk_ms, reference, realtime)
+        self.formats = _FormatCheck()
+        self.chunks = []
+
+    def _write(self, clip: AudioClip, pcm: bytes):
+        self.formats.check(clip)
+        self.chunks.append(pcm)
+
+    def clip(self) -> Optional[AudioClip]:
+        """Everything played so far as one clip (None if nothing was)"""
+        if self.formats.format is None:
+            return None
+        sample_rate, channels, sample_width = self.formats.format
+        return AudioClip(b"".join(self.chunks), sample_rate, channels, sample_width)
+
+    def clear(self):
+        self.chunks = []
+
+
+class WavFileSink(AudioSink):
+    def __init__(self, path: str, chunk_ms: int = 20, reference=None):
+        """
+        Writes everything played to a WAV file (opened with the first clip's format)
+
+        Args:
+            path: Output file
+            chunk_ms: Milliseconds of audio written at a time
+            reference: Told about every chunk before it's played
+        """
+        super().__init__(chunk_ms, reference)
+        self.path = path
+        self.formats = _FormatCheck()
+        self._file = None
+
+    def _write(self, clip: AudioClip, pcm: bytes):
+        if self.formats.check(clip):
+            self._file = wave.open(self.path, 'wb')
+            self._file.setnchannels(clip.channels)
+            self._file.setsampwidth(clip.sample_width)
+            self._file.setframerate(clip.sample_rate)
+        self._file.writeframes(pcm)
+
+    def close(self):
+        """Finish the WAV file"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class SocketSink(AudioSink):
+    def __init__(self, sock: socket.socket, chunk_ms: int = 20, reference=None, realtime: bool = True):
+        """
+        Sends raw PCM to a connected socket
+
+        The peer has to know the format (see .formats.format once something
+        was played). Writes are paced in real time by default, so a stopped
+        sentence stops on the far end too instead of sitting in its buffer.
+
+        Args:
+            sock: Connected stream socket (the caller still owns and closes it)
+            chunk_ms: Milliseconds of audio written at a time
+            reference: Told about every chunk before it's played
+            realtime: Pace writes at playback speed
+        """
+        super().__init__(chunk_ms, reference, realtime)
+        self.sock = sock
+        self.formats = _FormatCheck()
+
+    def _write(self, clip: AudioClip, pcm: bytes):
+        self.formats.check(clip)
+        self.sock.sendall(pcm)
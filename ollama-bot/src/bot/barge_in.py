@@ -0,0 +1,307 @@
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+from bot.audio_capture import RingBuffer
+from bot.events import Flag
+from config import settings
+
+
+class PlaybackReference:
+    def __init__(self, capture, latency_ms: float = 0.0):
+        """
+        What the speakers are playing, on the microphone's sample clock
+
+        Every chunk handed to the output device is converted to 16-bit mono at
+        the microphone's rate and stored at the capture position it will be
+        heard at, so reference sample n lines up with microphone sample n
+        (give or take the acoustic and device delay, which the echo canceller
+        estimates). Gaps between sentences are filled with silence.
+
+        Args:
+            capture: MicrophoneCapture (or anything with .ring and .sample_rate)
+            latency_ms: Known output latency added to every chunk
+        """
+        self.capture = capture
+        self.sample_rate = capture.sample_rate
+        self.latency = int(latency_ms * self.sample_rate / 1000)
+        self.ring = RingBuffer(capture.ring.capacity)
+        self.lock = threading.Lock()
+
+    def write(self, pcm: bytes, sample_rate: int, channels: int = 1, sample_width: int = 2):
+        """Record a chunk that is about to be played"""
+        if sample_width != 2 or not pcm:
+            return
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        if channels > 1:
+            samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+        if sample_rate != self.sample_rate:
+            n = int(len(samples) * self.sample_rate / sample_rate)
+            samples = np.interp(np.arange(n) * (sample_rate / self.sample_rate), np.arange(len(samples)), samples)
+        samples = samples.astype(np.int16)
+
+        with self.lock:
+            # Play right after what's already queued, or now if the speakers went quiet
+            start = max(self.ring.written, self.capture.ring.written + self.latency)
+            if start > self.ring.written:
+                self.ring.write(np.zeros(min(start - self.ring.written, self.ring.capacity), dtype=np.int16))
+                self.ring.written = start
+            self.ring.write(samples)
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """Reference samples [start, end) as float32; silence where nothing was played"""
+        out = np.zeros(end - start, dtype=np.float32)
+        with self.lock:
+            lo = max(start, self.ring.written - self.ring.capacity, 0)
+            hi = min(end, self.ring.written)
+            if hi > lo:
+                out[lo - start:hi - start] = self.ring.read(lo, hi)
+        return out
+
+
+class EchoCanceller:
+    def __init__(self, sample_rate: int = 16000, filter_ms: float = settings.ECHO_FILTER_MS,
+                 max_delay_ms: float = settings.ECHO_MAX_DELAY_MS, step: float = 1.0):
+        """
+        Block NLMS echo canceller driven by the known playback signal
+
+        The bulk delay between playback and microphone (device buffers plus
+        the distance to the speaker) is found by cross-correlation, and a short
+        adaptive filter around that delay models the room. Subtracting its
+        output leaves the user's voice and background noise.
+
+        Args:
+            sample_rate: Microphone sample rate
+            filter_ms: Length of the adaptive filter
+            max_delay_ms: Longest playback-to-microphone delay searched
+            step: NLMS step size (0-1)
+        """
+        self.taps = max(8, int(sample_rate * filter_ms / 1000))
+        self.max_delay = int(sample_rate * max_delay_ms / 1000)
+        self.window = sample_rate // 2  # audio per delay estimate
+        self.step = step
+        self.weights = np.zeros(self.taps, dtype=np.float64)
+        self.delay: Optional[int] = None
+        # Set once two estimates agree; barge-in detection waits for it
+        self.locked = False
+        self._candidate: Optional[int] = None
+
+    def estimate_delay(self, mic: np.ndarray, reference: np.ndarray) -> Optional[int]:
+        """
+        Delay of the echo in samples, from a stretch of microphone audio
+
+        Args:
+            mic: Microphone samples
+            reference: Reference samples ending at the same position, max_delay longer
+
+        Returns:
+            The delay, or None if the reference was too quiet to tell
+        """
+        if float(np.mean(reference * reference)) < 1e4:
+            return None
+        n = len(reference) + len(mic)
+        size = 1 << (n - 1).bit_length()
+        spectrum = np.fft.rfft(mic, size) * np.conj(np.fft.rfft(reference, size))
+        magnitude = np.abs(spectrum)
+        # Partly whitened (regularized PHAT): sharp peaks without blowing up empty bands
+        correlation = np.fft.irfft(spectrum / (magnitude + 0.1 * magnitude.mean() + 1e-9), size)
+        # mic[i] ~ reference[i + max_delay - delay]: the lag sits at size - (max_delay - delay)
+        lags = correlation[size - self.max_delay:] if self.max_delay else correlation[:1]
+        delay = int(np.argmax(lags)) if self.max_delay else 0
+
+        if self.delay is not None and abs(delay - self.delay) <= self.taps // 4:
+            # Same echo path (the filter covers small shifts); two agreeing estimates lock it
+            self.locked = True
+        elif not self.locked:
+            self._move(delay)
+        else:
+            # Voiced speech also correlates at multiples of the pitch period; only
+            # move for a clearly better match that shows up twice in a row
+            if delay == self._candidate and lags[delay] > 1.3 * lags[self.delay]:
+                self._move(delay)
+            self._candidate = delay
+        return self.delay
+
+    def _move(self, delay: int):
+        """Switch to a new delay, keeping what the filter learned about the room at the new offset"""
+        if self.delay is not None:
+            shift = delay - self.delay
+            if abs(shift) >= self.taps:
+                self.weights[:] = 0
+            elif shift > 0:
+                self.weights[:-shift] = self.weights[shift:].copy()
+                self.weights[-shift:] = 0
+            elif shift < 0:
+                self.weights[-shift:] = self.weights[:shift].copy()
+                self.weights[:-shift] = 0
+        self.delay = delay
+        self._candidate = None
+
+    def reference_span(self, position: int, n: int):
+        """
+        Reference positions [start, end) the filter needs for mic samples [position, position + n)
+
+        The filter covers echo delays from delay - taps/2 to delay + taps/2.
+        """
+        first = position - (self.delay or 0) + self.taps // 2
+        return first - self.taps + 1, first + n
+
+    def process(self, mic: np.ndarray, reference: np.ndarray, adapt: bool = True) -> np.ndarray:
+        """
+        Remove the echo from one frame
+
+        Args:
+            mic: Microphone frame (float)
+            reference: Reference over reference_span() of the frame
+            adapt: Update the filter (turn off while the user talks over ARKA)
+
+        Returns:
+            The residual: microphone minus estimated echo
+        """
+        echo = np.convolve(reference, self.weights, 'valid')
+        residual = mic - echo
+        if adapt:
+            # Normalized by the energy under the filter, summed over the block
+            power = float(np.dot(reference, reference)) / len(reference) * self.taps * len(mic) + 1e3
+            gradient = np.correlate(reference[::-1], residual[::-1], 'valid')
+            self.weights += self.step * gradient / power
+        return residual
+
+
+class BargeInDetector:
+    def __init__(self, reference: PlaybackReference, vad, trigger_ms: float = settings.BARGE_IN_TRIGGER_MS,
+                 margin: float = 6.0, canceller: Optional[EchoCanceller] = None):
+        """
+        Notices the user talking over ARKA within a few frames
+
+        Each microphone frame goes through the echo canceller; the residual is
+        speech when the VAD says so and it is clearly louder than the echo
+        that usually leaks through (tracked while only ARKA is talking).
+        trigger_ms of such frames in a row is a barge-in.
+
+        Args:
+            reference: What is being played
+            vad: VoiceActivityDetector for the residual (a clone, it keeps state)
+            trigger_ms: Speech needed to trigger
+            margin: How much louder than the leaking echo the residual must be
+            canceller: EchoCanceller (default: one at the reference's rate)
+        """
+        self.reference = reference
+        self.vad = vad
+        self.frame_length = vad.frame_length
+        self.trigger_frames = max(1, int(round(trigger_ms / vad.frame_ms)))
+        self.margin = margin
+        self.canceller = canceller or EchoCanceller(reference.sample_rate)
+        # Share of reference energy that still leaks through after cancellation
+        self.leak = 1.0
+        self.run = 0
+        self._since_estimate = 0
+
+    def reset(self):
+        self.run = 0
+
+    def process(self, position: int, frame: np.ndarray, history: Optional[Callable[[int, int], np.ndarray]] = None) -> bool:
+        """
+        Feed one microphone frame
+
+        Args:
+            position: Capture position of the frame's first sample
+            frame: int16 samples (one VAD frame)
+            history: Reads earlier microphone samples [start, end), for delay estimation
+
+        Returns:
+            True when this frame completes a barge-in
+        """
+        canceller = self.canceller
+        self._since_estimate += len(frame)
+        if history is not None and self._since_estimate >= canceller.window:
+            end = position + len(frame)
+            start = end - canceller.window
+            if start >= 0:
+                mic = history(start, end).astype(np.float32)
+                if canceller.estimate_delay(mic, self.reference.read(start - canceller.max_delay, end)) is not None:
+                    self._since_estimate = 0
+
+        mic = frame.astype(np.float32)
+        reference = self.reference.read(*canceller.reference_span(position, len(frame)))
+        echo_energy = float(np.mean(reference * reference))
+        playing = echo_energy > 1e4
+
+        # Adapt only while the user is quiet, so their voice isn't learned as echo
+        residual = canceller.process(mic, reference, adapt=playing and self.run == 0)
+        speech = bool(self.vad.classify(np.clip(residual, -32768, 32767).astype(np.int16)).any())
+        if playing:
+            if not canceller.locked:
+                return False  # Echo path not known yet; nothing to compare against
+            ratio = float(np.mean(residual * residual)) / echo_energy
+            louder = ratio > self.margin * self.leak
+            if not (louder and speech):
+                # Average in the log domain (about a second), so single spikes barely move it
+                self.leak *= (max(ratio, 1e-6) / self.leak) ** 0.05
+            speech = speech and louder
+
+        self.run = self.run + 1 if speech else 0
+        return self.run == self.trigger_frames
+
+
+class BargeInMonitor:
+    def __init__(self, capture, reference: PlaybackReference, vad, active: Callable[[], bool],
+                 on_barge_in: Callable[[], None], speaking: Flag):
+        """
+        Watches the microphone while ARKA talks and calls on_barge_in at speech onset
+
+        Stopping doesn't wait for the user to finish or for speech recognition:
+        the listeners keep recording the interrupt and transcribe it in parallel.
+        While ARKA is quiet the thread sleeps on the speaking flag instead of
+        reading the microphone.
+
+        Args:
+            capture: Running MicrophoneCapture
+            reference: PlaybackReference fed by the audio player
+            vad: VoiceActivityDetector to clone for the residual (once calibrated, at start())
+            active: True while ARKA is speaking through the reference player
+            on_barge_in: Called once per barge-in
+            speaking: Flag set while ARKA talks; active() is re-checked when it changes
+        """
+        self.capture = capture
+        self.reference = reference
+        self.vad = vad
+        self.detector: Optional[BargeInDetector] = None
+        self.active = active
+        self.on_barge_in = on_barge_in
+        self.speaking = speaking
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.running:
+            return
+        if self.detector is None:
+            self.detector = BargeInDetector(self.reference, self.vad.clone())
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="barge-in", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.speaking.notify()
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+
+    def _run(self):
+        reader = self.capture.reader()
+        n = self.detector.frame_length
+        while self.running:
+            if not self.active():
+                # Nothing to interrupt: sleep until ARKA talks, then start from live audio
+                self.detector.reset()
+                self.speaking.wait_until(lambda: self.active() or not self.running)
+                reader.skip_to_live()
+                continue
+            frame = reader.read(n, timeout=0.5)
+            if frame is None or not self.active():
+                continue
+            if self.detector.process(reader.position - n, frame, self.capture.ring.read):
+                print("🛑 Barge-in: you started talking")
+                self.on_barge_in()
@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config import settings
+
+
+class NoiseCalibration:
+    def __init__(self, microphone, vad, path: str = settings.CALIBRATION_PATH,
+                 max_age: float = settings.CALIBRATION_MAX_AGE, save_interval: float = 30.0):
+        """
+        Noise calibration for one input device, saved to disk between runs
+
+        The detector keeps refining its noise floor from non-speech frames while
+        it listens; a background thread saves the refined value every
+        save_interval seconds, so the next start can skip measuring silence.
+
+        Args:
+            microphone: sr.Microphone the profile belongs to
+            vad: VoiceActivityDetector whose noise floor is restored and saved
+            path: JSON file holding the profiles of every device
+            max_age: Seconds after which a saved profile is measured again
+            save_interval: Seconds between background saves
+        """
+        self.microphone = microphone
+        self.vad = vad
+        self.path = path
+        self.max_age = max_age
+        self.save_interval = save_interval
+        self.key = self.device_key(microphone)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def device_key(microphone) -> str:
+        """Identify the input device by name, index and sample rate"""
+        index = getattr(microphone, 'device_index', None)
+        name = 'default'
+        try:
+            audio = microphone.pyaudio_module.PyAudio()
+            try:
+                info = audio.get_default_input_device_info() if index is None else audio.get_device_info_by_index(index)
+                name = info.get('name', name)
+            finally:
+                audio.terminate()
+        except Exception:
+            pass  # Fall back to the index alone
+        return f"{name}#{'default' if index is None else index}@{microphone.SAMPLE_RATE}"
+
+    def _load_all(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def restore(self) -> bool:
+        """Load this device's saved noise floor into the detector, if there is a recent one"""
+        profile = self._load_all().get(self.key)
+        if not profile or time.time() - profile.get('updated', 0) > self.max_age:
+            return False
+        self.vad.noise_floor = float(profile['noise_floor'])
+        return True
+
+    def calibrate(self, capture, seconds: float) -> bool:
+        """
+        Use the saved profile, or measure the background noise and save it
+
+        Args:
+            capture: Running MicrophoneCapture to record from
+            seconds: How long to measure when there is no saved profile
+
+        Returns:
+            True if a saved profile was used
+        """
+        if self.restore():
+            print(f"Using saved noise calibration for this microphone (threshold {self.vad.threshold:.0f})")
+            return True
+        self.measure(capture, seconds)
+        return False
+
+    def measure(self, capture, seconds: float):
+        """Measure the background noise now (ARKA must be quiet meanwhile) and save it"""
+        self.vad.calibrate(capture.record(seconds))
+        self.save()
+
+    def save(self):
+        """Write the detector's current noise floor to disk"""
+        if self.vad.noise_floor is None:
+            return
+        with self._lock:
+            profiles = self._load_all()
+            profiles[self.key] = {
+                'noise_floor': self.vad.noise_floor,
+                'energy_threshold': self.vad.threshold,
+                'updated': time.time()
+            }
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(profiles, f, indent=2)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Could not save noise calibration: {e}")
+
+    def start(self):
+        """Keep saving the refined noise floor in the background"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._autosave_loop, name="calibration", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background saver and save one last time"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self.save()
+
+    def _autosave_loop(self):
+        last_saved = self.vad.noise_floor
+        while not self._stop.wait(self.save_interval):
+            # Only touch the disk when the estimate actually moved
+            if self.vad.noise_floor != last_saved:
+                last_saved = self.vad.noise_floor
+                self.save()
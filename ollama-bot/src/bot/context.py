@@ -0,0 +1,185 @@
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from config import settings
+
+
+class ConversationContext:
+    def __init__(self, token_budget: int = settings.CONTEXT_TOKEN_BUDGET,
+                 max_messages: int = settings.CONTEXT_MAX_MESSAGES,
+                 reanchor_fill: float = settings.CONTEXT_REANCHOR_FILL):
+        """
+        Conversation history that fits the prompt into a token budget
+
+        Messages live in a bounded deque together with an approximate token
+        count, so memory stays flat however long the session runs.
+
+        Prompts are built so consecutive turns share as long a prefix as
+        possible, letting Ollama reuse its cached prompt evaluation: the system
+        prompt comes first, and history starts at a fixed anchor and only grows
+        at the end. Only when that no longer fits the budget is the anchor moved
+        forward, leaving the newest turns at reanchor_fill of the budget so the
+        next several turns append again. Turns before the anchor can be folded
+        into a running summary (see RollingSummarizer) sent with the system prompt.
+
+        Args:
+            token_budget: Approximate tokens for system prompt + history + new message
+            max_messages: Messages kept in memory; the oldest are dropped first
+            reanchor_fill: Share of the history budget kept when re-anchoring
+        """
+        self.token_budget = token_budget
+        self.reanchor_fill = reanchor_fill
+        self.messages: Deque[Tuple[Dict[str, str], int]] = deque(maxlen=max_messages)
+        self.summary = ""
+        # The summary actually in the prompt; only changes when the prefix may change
+        self.prompt_summary = ""
+
+        # Messages are numbered from the start of the conversation so the
+        # summarizer can tell which ones it has already covered
+        self.appended = 0
+        self.summarized_upto = 0
+        self.window_start = 0
+        self.anchor = 0
+        self.reanchors = 0
+        self.epoch = 0
+        self.on_update: Optional[Callable[[], None]] = None
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Rough token count: about 4 characters per token, plus the chat template overhead"""
+        return len(text) // 4 + 4
+
+    def append(self, message: Dict[str, str]):
+        """Add one {'role', 'content'} message"""
+        with self.lock:
+            self.messages.append((message, self.estimate_tokens(message['content'])))
+            self.appended += 1
+        if self.on_update is not None:
+            self.on_update()
+
+    def add_exchange(self, user_text: str, assistant_text: str):
+        """Add a user message and the reply to it (together, so no other thread's message lands in between)"""
+        with self.lock:
+            self.append({'role': 'user', 'content': user_text})
+            self.append({'role': 'assistant', 'content': assistant_text})
+
+    def clear(self):
+        """Forget the whole conversation"""
+        with self.lock:
+            self.messages.clear()
+            self.summary = self.prompt_summary = ""
+            self.summarized_upto = self.window_start = self.anchor = self.appended
+            self.epoch += 1
+
+    @property
+    def total_tokens(self) -> int:
+        """Approximate tokens of everything kept in memory"""
+        return sum(tokens for _, tokens in self.messages)
+
+    def window(self, budget: Optional[int] = None) -> List[Dict[str, str]]:
+        """
+        The newest messages that fit in the budget
+
+        The window always starts with a user message, so the model never sees a
+        reply whose question was cut off.
+
+        Args:
+            budget: Token budget for history (default: the whole token_budget)
+        """
+        budget = self.token_budget if budget is None else budget
+        picked = []
+        used = 0
+        with self.lock:
+            for message, tokens in reversed(self.messages):
+                if used + tokens > budget:
+                    break
+                picked.append(message)
+                used += tokens
+        picked.reverse()
+
+        while picked and picked[0]['role'] != 'user':
+            picked.pop(0)
+        return picked
+
+    def build(self, system_prompt: Optional[str], user_input: str) -> List[Dict[str, str]]:
+        """
+        Chat messages for a new turn: system prompt, the history that fits, then the new message
+
+        Args:
+            system_prompt: Optional system prompt
+            user_input: What the user just said
+        """
+        with self.lock:
+            oldest = self.appended - len(self.messages)
+            self.anchor = max(self.anchor, oldest)
+
+            # A newer summary goes in once it covers everything before the anchor
+            if self.summary != self.prompt_summary and self.summarized_upto >= self.anchor:
+                self.prompt_summary = self.summary
+
+            system = self._system_message(system_prompt)
+            reserved = self.estimate_tokens(user_input) + self.estimate_tokens(system or "")
+            history = list(self.messages)[self.anchor - oldest:]
+
+            if reserved + sum(tokens for _, tokens in history) > self.token_budget:
+                # Re-anchor: the prefix changes once, then stays stable for a while
+                self.prompt_summary = self.summary
+                system = self._system_message(system_prompt)
+                reserved = self.estimate_tokens(user_input) + self.estimate_tokens(system or "")
+                window = self.window(int(max(0, self.token_budget - reserved) * self.reanchor_fill))
+                self.reanchors += 1
+            else:
+                window = [message for message, _ in history]
+                while window and window[0]['role'] != 'user':
+                    window.pop(0)
+
+            self.anchor = self.appended - len(window)
+            # Everything before the window is left to the summary
+            self.window_start = self.anchor
+
+        messages = [{'role': 'system', 'content': system}] if system else []
+        messages.extend(window)
+        messages.append({'role': 'user', 'content': user_input})
+        return messages
+
+    def _system_message(self, system_prompt: Optional[str]) -> Optional[str]:
+        """System prompt with the summary in the prompt appended"""
+        if not self.prompt_summary:
+            return system_prompt
+        summary = f"Earlier in this conversation: {self.prompt_summary}"
+        return f"{system_prompt}\n\n{summary}" if system_prompt else summary
+
+    def pending_summary(self) -> Tuple[List[Dict[str, str]], int, int]:
+        """
+        Messages that fell out of the prompt window and aren't in the summary yet
+
+        Returns:
+            (messages, number to pass to set_summary as upto, epoch)
+        """
+        with self.lock:
+            oldest = self.appended - len(self.messages)
+            start = max(self.summarized_upto, oldest)
+            end = self.window_start
+            pending = [message for message, _ in list(self.messages)[start - oldest:end - oldest]]
+            return pending, end, self.epoch
+
+    def set_summary(self, summary: str, upto: int, epoch: int):
+        """Replace the running summary, now covering every message before `upto`"""
+        with self.lock:
+            if epoch != self.epoch:
+                return  # History was cleared while summarizing
+            self.summary = summary.strip()
+            self.summarized_upto = max(self.summarized_upto, upto)
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        return (message for message, _ in self.messages)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        return self.messages[index][0]
@@ -2,32 +2,126 @@ import speech_recognition as sr
 import pyttsx3
 import time
 import threading
-import queue
-from typing import Optional
+from typing import List, Optional, Tuple
+
+from bot.asr import create_asr_backend
+from bot.audio_capture import AudioSource, ListenAborted, MicrophoneCapture
+from bot.audio_output import AudioSink, PCMPlayer
+from bot.barge_in import BargeInMonitor, PlaybackReference
+from bot.calibration import NoiseCalibration
+from bot.events import EventQueue, Flag
+from bot.pipeline import Pipeline, Turn
+from bot.scheduler import PRIORITY_URGENT
+from bot.session import ARKA_VOICE_PROMPT, CANNED_PHRASES as SESSION_PHRASES, SessionEngine
+from bot.startup import StartupOrchestrator
+from bot.text_normalization import normalize_for_speech, split_sentences
+from bot.tts_worker import TTSWorker
+from bot.vad import VoiceActivityDetector
+from config import settings
+
+# Fixed phrases, pre-rendered by the TTS audio cache so they play instantly
+VOICE_MODE_GREETING = "Hey! ARKA's voice mode is active now, yaar! I'm listening and I'll stop if you want to interrupt me!"
+VOICE_MODE_EXIT = "Cool, switching back to text mode, yaar!"
+CANNED_PHRASES = (VOICE_MODE_GREETING, VOICE_MODE_EXIT) + SESSION_PHRASES
 
 class Conversation:
-    def __init__(self, ollama_client):
+    def __init__(self, ollama_client, asr_engine: Optional[str] = None,
+                 source: Optional[AudioSource] = None, sink: Optional[AudioSink] = None):
         """
         Initialize conversation handler
         
+        Text mode needs no audio at all: the speech model, TTS and audio
+        devices are set up the first time voice mode starts.
+        
         Args:
             ollama_client: Instance of OllamaClient
+            asr_engine: Speech recognition engine (default: ASR_ENGINE setting, offline Vosk)
+            source: Where the user's voice comes from (default: the local microphone)
+            sink: Where ARKA's voice goes (default: the local speakers)
         """
         self.ollama_client = ollama_client
+        # Voice mode runs on the same headless engine as the other front ends
+        # (streaming, response cache, sentence cap, voice commands); it shares
+        # the client's history, so text and voice mode continue one conversation
+        self.session = SessionEngine(ollama_client, ARKA_VOICE_PROMPT, history=ollama_client.conversation_history)
+        self.asr_engine = asr_engine
+        self.source = source
+        self.sink = sink
         
-        # Initialize speech recognition and TTS (optional for voice mode)
+        # Speech recognition and TTS (set up by _init_voice)
         self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
-        self.tts_engine = pyttsx3.init()
+        self.asr = None
+        self.microphone = None
+        self.capture = None
+        self.vad = None
+        self.calibration = None
+        self.tts_engine = None
+        self.echo_reference = None
+        self.tts = None
         
-        # Voice interrupt detection
-        self.is_speaking = False
+        # Voice interrupt detection. The background listener posts interrupts and
+        # ARKA going quiet posts 'speech_done', so the main loop never polls.
+        self.events = EventQueue()
+        self.speaking = Flag(on_change=self._speaking_changed)
         self.should_stop_speaking = False
-        self.interrupt_queue = queue.Queue()
         self.background_listening = False
+        self.barge_in = None
+        
+        # Staged ASR -> LLM -> TTS pipeline used in voice mode
+        self.pipeline = None
+        self.current_turn = None
+        self.voice_exit = None
+        self.tts_lock = threading.Lock()
+
+    def _init_voice(self):
+        """Set up audio input and output, the speech model and TTS (once, when voice mode first starts)"""
+        if self.tts is not None:
+            return
+        
+        # Local devices are only opened when no other source/sink was given
+        self.microphone = sr.Microphone() if self.source is None else None
+        self.capture = self.source if self.source is not None else MicrophoneCapture(self.microphone)
+        self.vad = VoiceActivityDetector(sample_rate=self.capture.sample_rate)
+        if self.microphone is not None:
+            self.calibration = NoiseCalibration(self.microphone, self.vad)
+        # Everything ARKA plays is kept as the echo reference for barge-in detection
+        self.echo_reference = PlaybackReference(self.capture)
+        sink = self.sink if self.sink is not None else PCMPlayer(reference=self.echo_reference)
+        # The engine lives on the worker's thread; canned phrases are pre-rendered while idle
+        self.tts = TTSWorker(self._create_tts_engine, player=sink,
+                             prewarm=[speech for phrase in CANNED_PHRASES
+                                      for _, speech in self._speech_sentences(phrase)])
+        
+        # Stops ARKA the moment the user talks over it (echo-cancelled VAD, no ASR needed),
+        # only against the local speakers: other sinks aren't on the microphone's clock
+        if settings.BARGE_IN_AEC and sink.reference is self.echo_reference:
+            self.barge_in = BargeInMonitor(self.capture, self.echo_reference, self.vad,
+                                           active=lambda: self.is_speaking and self.tts.file_output,
+                                           on_barge_in=self._stop_speaking, speaking=self.speaking)
         
-        # Configure TTS
+        # Load the speech model and set up TTS at the same time
+        startup = StartupOrchestrator()
+        startup.add('asr', lambda: self._init_asr(self.asr_engine))
+        startup.add('tts', self._init_tts)
+        try:
+            startup.run()
+        except BaseException:
+            self.tts = None  # Try again next time voice mode starts
+            raise
+
+    def _init_asr(self, asr_engine: Optional[str]):
+        """Load the speech recognition model"""
+        self.asr = create_asr_backend(asr_engine)
+
+    def _init_tts(self):
+        """Start the TTS worker and wait until its engine is set up"""
+        self.tts.start().wait_ready()
+
+    def _create_tts_engine(self):
+        """Create and configure the voice (runs on the TTS worker's thread)"""
+        self.tts_engine = pyttsx3.init()
         self._configure_tts()
+        return self.tts_engine
 
     def _configure_tts(self):
         """Configure Text-to-Speech settings for natural voice"""
@@ -116,9 +210,18 @@ class Conversation:
         
         # Adjust for ambient noise
         try:
-            with self.microphone as source:
-                self.recognizer.adjust_for_ambient_noise(source, duration=1)
-            self.speak_with_interrupt("Hey! ARKA's voice mode is active now, yaar! I'm listening and I'll stop if you want to interrupt me!")
+            self._init_voice()
+            # The capture stream stays open for the rest of the session
+            self.capture.start()
+            if not self.capture.running:
+                raise RuntimeError("could not open the microphone")
+            # Saved per microphone and refined while listening, so this only
+            # measures silence the very first time
+            if self.calibration is not None:
+                if self.vad.noise_floor is None:
+                    self.calibration.calibrate(self.capture, 1)
+                self.calibration.start()
+            self.speak_with_interrupt(VOICE_MODE_GREETING, fixed=True)
         except Exception as e:
             print(f"Microphone setup error: {e}")
             print("Returning to text mode...")
@@ -128,58 +231,51 @@ class Conversation:
         self.background_listening = True
         interrupt_thread = threading.Thread(target=self._background_listener, daemon=True)
         interrupt_thread.start()
+        if self.barge_in is not None:
+            self.barge_in.start()
         
-        while True:
+        # Recognition, generation and speech run in their own pipeline stages
+        self.voice_exit = None
+        self.pipeline = self._build_pipeline()
+        self.pipeline.start()
+        
+        reader = self.capture.reader()
+        
+        while self.voice_exit is None:
             try:
-                # Check if user interrupted during previous response
-                if not self.interrupt_queue.empty():
-                    interrupted_text = self.interrupt_queue.get()
-                    print(f"You interrupted: {interrupted_text}")
-                    
-                    # Process the interrupt
-                    if any(phrase in interrupted_text.lower() for phrase in ['exit voice mode', 'text mode', 'stop voice']):
-                        self.speak_with_interrupt("Cool, switching back to text mode, yaar!")
-                        break
-                    elif any(phrase in interrupted_text.lower() for phrase in ['exit', 'quit', 'goodbye']):
-                        self.speak_with_interrupt("Arre yaar, it was awesome chatting! Take care!")
-                        self.background_listening = False
-                        return "exit"
-                    else:
-                        # Process the interrupted input
-                        response = self.process_input(interrupted_text)
-                        print(f"\nARKA: {response}")
-                        self.speak_with_interrupt(response)
+                # The background listener handles speech while ARKA talks (or was just
+                # cut off): sleep until it reports an interrupt or ARKA goes quiet
+                if self.is_speaking or self.should_stop_speaking or self.events.pending():
+                    event = self.events.get()
+                    if event.kind == 'interrupt':
+                        interrupted_text = event.payload
+                        print(f"You interrupted: {interrupted_text}")
+                        
+                        # Drop whatever the old turn was still doing
+                        self._cancel_current_turn()
+                        self.should_stop_speaking = False
+                        
+                        turn = self._handle_transcript(interrupted_text)
+                        if turn is not None:
+                            # The user is waiting: this reply jumps the Ollama queue
+                            turn.state['priority'] = PRIORITY_URGENT
+                            self.pipeline.put(turn, stage='llm')
+                    reader.skip_to_live()
                     continue
                 
                 print("\nListening...")
                 
-                # Listen for audio with shorter timeout for better responsiveness
-                with self.microphone as source:
-                    audio = self.recognizer.listen(source, timeout=8, phrase_time_limit=8)
-                
-                # Convert speech to text
-                print("Processing speech...")
-                text = self.speech_to_text(audio)
+                # Listen for audio with shorter timeout for better responsiveness. The
+                # pipeline may start speaking meanwhile: drop the audio then, or ARKA's
+                # own voice from the speakers would come back as the next user turn
+                audio = reader.listen(self.vad, timeout=8, phrase_time_limit=8,
+                                      abort=lambda: self.is_speaking or self.should_stop_speaking)
                 
-                if text:
-                    print(f"You said: {text}")
-                    
-                    # Check for exit commands
-                    if any(phrase in text.lower() for phrase in ['exit voice mode', 'text mode', 'stop voice']):
-                        self.speak_with_interrupt("Cool, switching back to text mode, yaar!")
-                        break
-                    elif any(phrase in text.lower() for phrase in ['exit', 'quit', 'goodbye']):
-                        self.speak_with_interrupt("Arre yaar, it was awesome chatting! Take care!")
-                        self.background_listening = False
-                        return "exit"
-                    
-                    # Get and speak response with interrupt capability
-                    response = self.process_input(text)
-                    print(f"\nARKA: {response}")
-                    self.speak_with_interrupt(response)
-                else:
-                    print("Could not understand. Please try again.")
+                # Hand off to the pipeline and go straight back to listening
+                self.pipeline.put(audio)
                     
+            except ListenAborted:
+                continue  # The background listener takes over while ARKA talks
             except sr.WaitTimeoutError:
                 print("No speech detected. Say something or 'exit voice mode'...")
             except KeyboardInterrupt:
@@ -188,85 +284,228 @@ class Conversation:
             except Exception as e:
                 print(f"Voice error: {e}")
         
+        self.pipeline.stop()
+        if self.barge_in is not None:
+            self.barge_in.stop()
+        if self.calibration is not None:
+            self.calibration.stop()
+        print(self.ollama_client.metrics.report())
+        if self.tts.cache is not None:
+            print(self.tts.cache.report())
         self.background_listening = False
+        self.speaking.notify()
+        if self.voice_exit == "exit":
+            return "exit"
+        
         print("=== Returned to Text Mode ===")
         return None
 
+    def _build_pipeline(self) -> Pipeline:
+        """Build the ASR -> LLM -> post-process -> TTS pipeline for voice mode"""
+        pipeline = Pipeline(maxsize=4)
+        pipeline.add_stage('asr', self._asr_stage)
+        pipeline.add_stage('llm', self.session.generate)
+        pipeline.add_stage('postprocess', self._postprocess_stage)
+        pipeline.add_stage('tts', self._tts_stage, maxsize=8)
+        return pipeline
+
+    def _handle_transcript(self, text: str) -> Optional[Turn]:
+        """Handle mode switches and voice commands, returning the turn to answer if any"""
+        if any(phrase in text.lower() for phrase in ['exit voice mode', 'text mode', 'stop voice']):
+            self.speak_with_interrupt(VOICE_MODE_EXIT, fixed=True)
+            self.voice_exit = "text"
+            self.events.post('stop')
+            return None
+        
+        command = self.session.handle_command(text)
+        if command is not None:
+            reply, end = command
+            self.speak_with_interrupt(reply, fixed=True)
+            if end:
+                self.voice_exit = "exit"
+                self.events.post('stop')
+            return None
+        
+        return Turn(text)
+
+    def _asr_stage(self, audio, emit):
+        """Convert speech to text and handle exit commands"""
+        print("Processing speech...")
+        
+        # Don't send silence to the recognizer
+        speech = self.vad.trim(audio.frame_data)
+        if not speech:
+            print("Could not understand. Please try again.")
+            return
+        text = self.speech_to_text(sr.AudioData(speech, audio.sample_rate, audio.sample_width))
+        
+        if text:
+            print(f"You said: {text}")
+            turn = self._handle_transcript(text)
+            if turn is not None:
+                emit(turn)
+        else:
+            print("Could not understand. Please try again.")
+
+    def _postprocess_stage(self, item, emit):
+        """Make each sentence short, friendly and respectful"""
+        turn, sentence = item
+        if sentence is None:
+            emit(item)
+            return
+        
+        friendly = self.session.next_friendly_sentence(turn, sentence)
+        if friendly:
+            emit((turn, friendly))
+
+    def _tts_stage(self, item, emit):
+        """Speak sentences as they arrive and record the turn once it is complete"""
+        turn, sentence = item
+        if sentence is None:
+            if self.current_turn is turn:
+                self.current_turn = None
+                self.is_speaking = False
+            self.session.finish_turn(turn)
+            return
+        
+        if turn.state.get('interrupted'):
+            return
+        
+        self.current_turn = turn
+        self.is_speaking = True
+        print(f"\nARKA: {sentence}")
+        
+        # Spell out numbers and drop emojis for speech (keep them in printed text)
+        speech = normalize_for_speech(sentence)
+        if not speech:
+            return
+        with self.tts_lock:
+            job = self.tts.say(speech, pause=0.3)
+            # Returns as soon as the sentence ends or an interrupt stops the worker
+            job.wait()
+        if job.started.is_set():
+            turn.spoken.append(sentence)
+
+    def _cancel_current_turn(self):
+        """Drop the old turn: queued work, the in-flight Ollama request and the unspoken part of the reply"""
+        self.pipeline.flush()
+        self.session.cancel()
+        if self.current_turn is not None:
+            self.session.finish_turn(self.current_turn)
+            self.current_turn = None
+        # Its end-of-turn marker was flushed with it
+        self.is_speaking = False
+
     def _background_listener(self):
         """Background thread to listen for interrupts while speaking"""
+        reader = self.capture.reader()
+        vad = self.vad.clone()
+        
         while self.background_listening:
             try:
-                if self.is_speaking:
-                    # Only listen for interrupts when ARKA is speaking
-                    with self.microphone as source:
-                        # Very short listen to detect if user starts speaking
-                        audio = self.recognizer.listen(source, timeout=0.5, phrase_time_limit=3)
+                if self.is_speaking or self.should_stop_speaking:
+                    # Only listen for interrupts when ARKA is speaking (or a barge-in just stopped it).
+                    # Very short listen to detect if user starts speaking
+                    audio = reader.listen(vad, timeout=0.5, phrase_time_limit=3)
                         
                     # If we get here, user started speaking - interrupt!
-                    self.should_stop_speaking = True
+                    self._stop_speaking()
                     
                     # Try to recognize what they said
                     try:
-                        interrupted_text = self.recognizer.recognize_google(audio)
-                        if interrupted_text.strip():
-                            self.interrupt_queue.put(interrupted_text)
+                        interrupted_text = self.asr.transcribe(audio)
+                        if interrupted_text:
+                            self.events.post('interrupt', interrupted_text)
                             print(f"\n🛑 Interrupted! You said: {interrupted_text}")
                     except:
                         # Even if we can't recognize, we detected speech
                         print("\n🛑 Interrupted! (couldn't understand)")
                         
                 else:
-                    # Small delay when not speaking
-                    time.sleep(0.1)
+                    # Sleep until ARKA starts talking; the main loop handles that audio
+                    self.speaking.wait_until(
+                        lambda: self.is_speaking or self.should_stop_speaking or not self.background_listening)
+                    reader.skip_to_live()
                     
             except sr.WaitTimeoutError:
                 # No interruption detected, continue
-                time.sleep(0.1)
+                if not self.is_speaking and self.should_stop_speaking:
+                    # A barge-in nobody followed up on: let the main loop listen again
+                    self.should_stop_speaking = False
+                    self.events.post('speech_done')
             except Exception:
                 # Ignore errors in background listening
                 time.sleep(0.1)
 
-    def speak_with_interrupt(self, text: str):
-        """Convert text to speech with interrupt detection"""
+    def speak_with_interrupt(self, text: str, turn: Optional[Turn] = None, fixed: bool = False):
+        """
+        Convert text to speech with interrupt detection
+        
+        Args:
+            text: What to say
+            turn: If given, every sentence that was started is added to turn.spoken
+            fixed: A canned phrase, played from the TTS audio cache
+        """
+        self._init_voice()
+        with self.tts_lock:
+            self._speak_with_interrupt(text, turn, fixed)
+
+    @staticmethod
+    def _speech_sentences(text: str) -> List[Tuple[str, str]]:
+        """
+        Split text into sentences for natural pauses and interrupt points
+        
+        Returns:
+            (sentence, text to speak) pairs, with numbers spelled out and emojis removed
+        """
+        pairs = ((sentence, normalize_for_speech(sentence)) for sentence in split_sentences(text))
+        return [(sentence, speech) for sentence, speech in pairs if speech]
+
+    @property
+    def is_speaking(self) -> bool:
+        """True while ARKA is talking (self.speaking can be waited on)"""
+        return self.speaking.is_set()
+
+    @is_speaking.setter
+    def is_speaking(self, value: bool):
+        self.speaking.set(value)
+
+    def _speaking_changed(self, speaking: bool):
+        if not speaking:
+            self.events.post('speech_done')
+
+    def _stop_speaking(self):
+        """Cut ARKA off right away: the sentence playing stops within a few milliseconds"""
+        self.should_stop_speaking = True
+        turn = self.current_turn
+        if turn is not None:
+            # The rest of the reply is dropped, and generating it stops
+            turn.state['interrupted'] = True
+            turn.done = True
+        self.speaking.notify()
+        self.tts.stop()
+
+    def _speak_with_interrupt(self, text: str, turn: Optional[Turn] = None, fixed: bool = False):
         try:
             self.is_speaking = True
             self.should_stop_speaking = False
             
-            # Split into sentences for natural pauses and interrupt points
-            sentences = text.split('. ')
+            sentences = self._speech_sentences(text)
             
-            for i, sentence in enumerate(sentences):
-                if sentence.strip() and not self.should_stop_speaking:
-                    # Add period back if it was removed by split
-                    if i < len(sentences) - 1:
-                        sentence += '.'
-                    
-                    # Speak the sentence
-                    self.tts_engine.say(sentence.strip())
-                    
-                    # Check for interrupt during speech
-                    start_time = time.time()
-                    while self.tts_engine.isBusy() and not self.should_stop_speaking:
-                        time.sleep(0.05)  # Check every 50ms for interrupts
-                        
-                        # Safety timeout
-                        if time.time() - start_time > 10:
-                            break
-                    
-                    if self.should_stop_speaking:
-                        # Stop TTS immediately
-                        self.tts_engine.stop()
-                        print("🛑 ARKA stopped speaking - listening to you...")
-                        break
-                    
-                    # Natural pause between sentences (if not interrupted)
-                    if i < len(sentences) - 1 and not self.should_stop_speaking:
-                        pause_start = time.time()
-                        while time.time() - pause_start < 0.3 and not self.should_stop_speaking:
-                            time.sleep(0.05)
-                        
-                        if self.should_stop_speaking:
-                            break
+            # Queue every sentence at once: the worker renders the next one while
+            # this one plays, with a natural pause in between
+            jobs = [(sentence, self.tts.say(speech, fixed, pause=0.3 if i < len(sentences) - 1 else 0.0))
+                    for i, (sentence, speech) in enumerate(sentences)]
+            
+            for sentence, job in jobs:
+                # Returns as soon as the sentence ends or an interrupt stops the worker
+                job.wait()
+                if turn is not None and job.started.is_set():
+                    turn.spoken.append(sentence)
+                
+                if self.should_stop_speaking:
+                    print("🛑 ARKA stopped speaking - listening to you...")
+                    break
                             
         except Exception as e:
             print(f"TTS error: {e}")
@@ -276,8 +515,7 @@ class Conversation:
     def speech_to_text(self, audio) -> Optional[str]:
         """Convert speech to text"""
         try:
-            text = self.recognizer.recognize_google(audio)
-            return text
+            return self.asr.transcribe(audio)
         except sr.UnknownValueError:
             return None
         except sr.RequestError as e:
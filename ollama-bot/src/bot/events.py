@@ -0,0 +1,116 @@
+import heapq
+import itertools
+import threading
+from typing import Any, Callable, Optional
+
+# Lower numbers are handled first: a stop request beats everything, an
+# interrupt beats audio captured before it, and end-of-speech notices come last
+PRIORITIES = {
+    'stop': 0,
+    'interrupt': 1,
+    'capture': 2,
+    'speech_done': 3
+}
+
+
+class BotEvent:
+    def __init__(self, kind: str, payload: Any = None):
+        """
+        Something the main loop has to react to
+
+        Args:
+            kind: One of PRIORITIES
+            payload: Interrupt text, captured audio or a Turn, depending on kind
+        """
+        self.kind = kind
+        self.payload = payload
+
+    def __repr__(self) -> str:
+        return f"BotEvent({self.kind!r})"
+
+
+class EventQueue:
+    def __init__(self):
+        """
+        Events posted by the capture, interrupt and TTS threads for the main loop
+
+        get() blocks on a condition variable until something is posted, so an
+        idle bot uses no CPU and a new event is handled the moment it arrives
+        instead of at the next polling tick. Events come out by priority, and
+        in the order they were posted within a priority.
+        """
+        self._heap = []
+        self._order = itertools.count()
+        self.condition = threading.Condition()
+
+    def post(self, kind: str, payload: Any = None):
+        """Queue an event and wake the main loop"""
+        with self.condition:
+            heapq.heappush(self._heap, (PRIORITIES[kind], next(self._order), BotEvent(kind, payload)))
+            self.condition.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[BotEvent]:
+        """
+        Next event by priority, waiting for one if necessary
+
+        Returns:
+            The event, or None on timeout
+        """
+        with self.condition:
+            if not self.condition.wait_for(lambda: self._heap, timeout):
+                return None
+            return heapq.heappop(self._heap)[2]
+
+    def pending(self) -> bool:
+        return bool(self._heap)
+
+    def discard(self, kind: str):
+        """Drop queued events of one kind (e.g. audio captured for a turn that was cancelled)"""
+        with self.condition:
+            self._heap = [entry for entry in self._heap if entry[2].kind != kind]
+            heapq.heapify(self._heap)
+
+
+class Flag:
+    def __init__(self, value: bool = False, on_change: Optional[Callable[[bool], None]] = None):
+        """
+        A boolean that threads can wait on, in either direction
+
+        threading.Event can only wait for True; listeners also need to sleep
+        until ARKA stops talking, or until one of several conditions holds.
+
+        Args:
+            value: Initial value
+            on_change: Called with the new value whenever it changes (outside the lock)
+        """
+        self._value = value
+        self.on_change = on_change
+        self.condition = threading.Condition()
+
+    def is_set(self) -> bool:
+        return self._value
+
+    def set(self, value: bool = True):
+        with self.condition:
+            changed = value != self._value
+            self._value = value
+            self.condition.notify_all()
+        if changed and self.on_change is not None:
+            self.on_change(value)
+
+    def clear(self):
+        self.set(False)
+
+    def wait(self, value: bool = True, timeout: Optional[float] = None) -> bool:
+        """Block until the flag equals value; False on timeout"""
+        return self.wait_until(lambda: self._value == value, timeout)
+
+    def wait_until(self, predicate: Callable[[], bool], timeout: Optional[float] = None) -> bool:
+        """Block until predicate() holds; it is re-checked on every change and notify()"""
+        with self.condition:
+            return self.condition.wait_for(predicate, timeout)
+
+    def notify(self):
+        """Wake waiters so they re-check their predicate (after changing state it depends on)"""
+        with self.condition:
+            self.condition.notify_all()
@@ -0,0 +1,57 @@
+import json
+import os
+import time
+from typing import Dict
+
+from config import settings
+
+
+class ModelHealthCache:
+    def __init__(self, path: str = settings.HEALTH_CACHE_PATH, ttl: float = settings.HEALTH_CACHE_TTL):
+        """
+        Remembers on disk which models were recently found on which Ollama host
+
+        Lets startup skip asking Ollama for its model list when we checked a
+        little while ago. A stale or unreadable cache just means checking again.
+
+        Args:
+            path: JSON file the results are kept in
+            ttl: Seconds a successful check stays valid
+        """
+        self.path = path
+        self.ttl = ttl
+
+    def _load(self) -> Dict[str, float]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def is_fresh(self, host: str, model_name: str) -> bool:
+        """True if the model was seen on this host within the TTL"""
+        checked_at = self._load().get(f"{host}|{model_name}")
+        return checked_at is not None and time.time() - checked_at < self.ttl
+
+    def _save(self, entries: Dict[str, float]):
+        """Write the cache atomically, so an interrupted write never leaves a corrupt file"""
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save model check cache: {e}")
+
+    def mark_ok(self, host: str, model_name: str):
+        """Record that the model is available on this host now"""
+        entries = self._load()
+        entries[f"{host}|{model_name}"] = time.time()
+        self._save(entries)
+
+    def invalidate(self, host: str, model_name: str):
+        """Forget a model, e.g. after a request for it failed"""
+        entries = self._load()
+        if entries.pop(f"{host}|{model_name}", None) is not None:
+            self._save(entries)
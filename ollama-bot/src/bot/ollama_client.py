@@ -1,109 +1,578 @@
-import ollama
+import asyncio
+import concurrent.futures
+import queue
+import threading
 import sys
-from typing import List, Dict, Any
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Hashable, Iterator, List, Dict, Optional, Tuple
 
-class OllamaClient:
-    def __init__(self, model_name: str = "gemma3:latest"):
+from bot.context import ConversationContext
+from bot.events import Flag
+from bot.health import ModelHealthCache
+from bot.response_cache import ResponseCache
+from bot.router import Backend, LLMRouter, parse_backends
+from bot.scheduler import PRIORITY_BACKGROUND, PRIORITY_NORMAL, GenerationScheduler
+from bot.summarizer import RollingSummarizer
+from config import settings
+
+ARKA_SYSTEM_PROMPT = """You are ARKA, a friendly and enthusiastic 25-year-old Indian guy having a casual conversation with a friend.
+
+Your personality and speech patterns:
+- Speak like a young, educated Indian person with natural Indian English expressions
+- Use Indian expressions occasionally: "yaar", "actually", "basically", "totally", "obviously", "no problem", "definitely", "for sure"
+- Be warm, enthusiastic, and genuinely helpful like a close Indian friend
+- Use contractions naturally (I'm, you're, don't, can't, that's, it's)
+- Sound energetic and passionate about helping
+- Use expressions like "That's awesome!", "Cool!", "Interesting!", "Amazing!"
+- Speak confidently but humbly, like a well-educated young Indian professional
+- Keep responses conversational and under 150 words
+- Occasionally use mild Indian English patterns like "I am telling you", "What to do", "Like that only"
+- Be genuinely excited to help and show authentic enthusiasm
+
+Remember: You're ARKA, a young Indian friend who's always excited to help and chat!"""
+
+
+class GenerationMetrics:
+    def __init__(self, keep: int = 100):
         """
-        Initialize Ollama client with specified model
-        
+        Timings Ollama reports with each finished reply
+
+        prompt_tokens counts only the prompt tokens Ollama actually had to
+        evaluate, so it drops when the prompt prefix is reused from its cache.
+
+        Args:
+            keep: Number of recent requests remembered
+        """
+        self.requests = deque(maxlen=keep)
+        self.count = 0
+
+    def record(self, response) -> Dict[str, float]:
+        """Store the timings from a final (done) chat response"""
+        entry = {
+            'prompt_tokens': response.get('prompt_eval_count') or 0,
+            'prompt_ms': (response.get('prompt_eval_duration') or 0) / 1e6,
+            'tokens': response.get('eval_count') or 0,
+            'eval_ms': (response.get('eval_duration') or 0) / 1e6,
+            'load_ms': (response.get('load_duration') or 0) / 1e6,
+        }
+        self.requests.append(entry)
+        self.count += 1
+        return entry
+
+    @property
+    def last(self) -> Optional[Dict[str, float]]:
+        return self.requests[-1] if self.requests else None
+
+    def describe(self, entry: Optional[Dict[str, float]] = None) -> str:
+        """One-line description of a request (default: the last one)"""
+        entry = entry or self.last
+        if entry is None:
+            return "no requests yet"
+        return (f"prompt {entry['prompt_tokens']} tokens in {entry['prompt_ms']:.0f} ms, "
+                f"reply {entry['tokens']} tokens in {entry['eval_ms']:.0f} ms")
+
+    def report(self) -> str:
+        """Average timings over the remembered requests"""
+        if not self.requests:
+            return "📊 No Ollama requests yet"
+        n = len(self.requests)
+        average: Dict[str, Any] = {key: sum(r[key] for r in self.requests) / n for key in self.requests[0]}
+        return f"📊 Ollama average over {n} requests: {self.describe(average)}"
+
+
+class AsyncOllamaClient:
+    def __init__(self, model_name: str = "gemma3:latest", host: Optional[str] = None,
+                 pool_size: int = settings.OLLAMA_POOL_SIZE, timeout: float = settings.OLLAMA_TIMEOUT,
+                 keep_alive: str = settings.OLLAMA_KEEP_ALIVE, num_parallel: int = settings.OLLAMA_NUM_PARALLEL,
+                 backends: Optional[List[Backend]] = None):
+        """
+        Initialize an asyncio Ollama client on pooled HTTP connections
+
+        Connections are kept alive and reused between requests, and up to
+        pool_size requests can be in flight at once, so one process can serve
+        many sessions. Cancelling the awaiting task aborts the HTTP request.
+        Generations go through a GenerationScheduler, which sends at most
+        num_parallel at once, lets urgent requests and quiet sessions go
+        first, and shares one generation between identical prompts.
+
+        Requests are sent through an LLMRouter, so the client can use several
+        Ollama servers (OLLAMA_BACKENDS): each request goes to the least-loaded
+        healthy one and fails over if it doesn't answer. The scheduler's
+        limit is the combined num_parallel of the servers that are up.
+
         Args:
             model_name: Name of the Ollama model to use
+            host: Ollama server URL (default: OLLAMA_BACKENDS, or else OLLAMA_HOST)
+            pool_size: Maximum number of open connections per server
+            timeout: Seconds to wait for a server to respond
+            keep_alive: How long Ollama keeps the model loaded after a request
+            num_parallel: Generations sent to each server at once (0: no scheduler)
+            backends: Servers to use instead of host
         """
+        if backends is None:
+            if host is None:
+                backends = parse_backends(settings.OLLAMA_BACKENDS, model_name, num_parallel,
+                                          pool_size=pool_size, timeout=timeout)
+            backends = backends or [Backend(host or settings.OLLAMA_HOST, model_name, num_parallel, pool_size, timeout)]
         self.model_name = model_name
-        self.conversation_history = []
-        self.initialize_model()
+        self.router = LLMRouter(backends)
+        self.host = ','.join(backend.host for backend in backends)
+        self.keep_alive = keep_alive
+        self.conversation_history = ConversationContext()
+        self.metrics = GenerationMetrics()
+        self.response_cache = ResponseCache() if settings.RESPONSE_CACHE else None
+        self.embed_model = settings.RESPONSE_CACHE_EMBED_MODEL
+        self.scheduler = None
+        if num_parallel > 0:
+            self.scheduler = GenerationScheduler(self.router.capacity)
+            # Fewer requests at once while a server is down, more once it is back
+            self.router.on_health_change = lambda: self.scheduler.resize(self.router.capacity)
+
+    async def _missing_model(self) -> List[Backend]:
+        """Servers that don't have their model installed (cheap /api/tags calls)"""
+        async def installed(backend: Backend) -> bool:
+            models = await backend.client.list()
+            model_names = [model.get('model') or model.get('name') for model in models['models']]
+            return backend.model in model_names
+
+        results = await self.router.each(installed)
+        return [backend for backend, result in zip(self.router.backends, results) if result is False]
+
+    async def has_model(self) -> bool:
+        """True if the model is installed on every Ollama server that answers"""
+        return not await self._missing_model()
+
+    async def pull(self):
+        """Download the model where it is missing"""
+        for backend in await self._missing_model():
+            print(f"Model {backend.model} not found on {backend.host}. Pulling model...")
+            await backend.client.pull(backend.model)
+            print(f"Model {backend.model} downloaded successfully!")
+
+    async def preload(self):
+        """Load the model into memory on every server without generating anything (an empty chat)"""
+        await self.router.each(lambda backend: backend.client.chat(model=backend.model, messages=[],
+                                                                   keep_alive=self.keep_alive))
+
+    async def initialize_model(self):
+        """Verify the model is available, pulling it if needed, and warm it up"""
+        if not await self.has_model():
+            await self.pull()
+
+        # Test the model
+        await self.router.call(lambda backend: backend.client.chat(model=backend.model, messages=[
+            {'role': 'user', 'content': 'Hello'}
+        ], keep_alive=self.keep_alive))
+        print(f"Ollama client initialized successfully with model: {self.model_name}")
+
+    def _build_messages(self, query: str, system_prompt: str = None) -> List[Dict[str, str]]:
+        """System prompt, recent history and the new query"""
+        # As much recent history as fits the token budget
+        return self.conversation_history.build(system_prompt, query)
+
+    def remember(self, query: str, bot_response: str):
+        """Update conversation history"""
+        self.conversation_history.add_exchange(query, bot_response)
+
+    def _prompt_key(self, kind: str, messages: List[Dict[str, str]]) -> Tuple:
+        """Identifies a prompt for coalescing identical requests"""
+        return (self.model_name, kind) + tuple((m['role'], m['content']) for m in messages)
 
-    def initialize_model(self):
-        """Initialize and verify the Ollama model"""
+    async def chat(self, messages: List[Dict[str, str]], session: Hashable = None,
+                   priority: int = PRIORITY_NORMAL) -> str:
+        """
+        Send a full message list and return the reply (history is not touched)
+
+        Args:
+            messages: Chat messages
+            session: Who is asking (sessions take turns in the scheduler queue)
+            priority: Scheduler priority (PRIORITY_URGENT, _NORMAL or _BACKGROUND)
+        """
+        if self.scheduler is None:
+            return await self._chat(messages, session)
+        return await self.scheduler.call(lambda: self._chat(messages, session), self._prompt_key('chat', messages),
+                                         session, priority)
+
+    def chat_stream(self, messages: List[Dict[str, str]], session: Hashable = None,
+                    priority: int = PRIORITY_NORMAL) -> AsyncIterator[str]:
+        """
+        Stream the reply to a full message list (history is not touched)
+
+        Closing the generator early (aclose(), or cancelling the task) closes
+        the HTTP stream, which tells Ollama to stop generating (once no other
+        caller is sharing the same generation).
+        """
+        if self.scheduler is None:
+            return self._chat_stream(messages, session)
+        return self.scheduler.stream(lambda: self._chat_stream(messages, session),
+                                     self._prompt_key('stream', messages), session, priority)
+
+    async def _chat(self, messages: List[Dict[str, str]], session: Hashable = None) -> str:
+        response = await self.router.call(lambda backend: backend.client.chat(
+            model=backend.model, messages=messages, keep_alive=self.keep_alive), session)
+        self.metrics.record(response)
+        return response['message']['content']
+
+    def _chat_stream(self, messages: List[Dict[str, str]], session: Hashable = None) -> AsyncIterator[str]:
+        async def tokens(backend: Backend) -> AsyncIterator[str]:
+            stream = await backend.client.chat(
+                model=backend.model,
+                messages=messages,
+                stream=True,
+                keep_alive=self.keep_alive
+            )
+            try:
+                async for chunk in stream:
+                    if chunk.get('done'):
+                        self.metrics.record(chunk)
+                    yield chunk['message']['content']
+            finally:
+                await stream.aclose()
+
+        return self.router.stream(tokens, session)
+
+    async def embed(self, text: str) -> Optional[List[float]]:
+        """Embedding of the text for similarity matching in the response cache (None if not configured)"""
+        if not self.embed_model:
+            return None
         try:
-            # Check if Ollama is running and model is available
-            models = ollama.list()
-            model_names = [model.model for model in models.models]
-            
-            if self.model_name not in model_names:
-                print(f"Model {self.model_name} not found. Pulling model...")
-                ollama.pull(self.model_name)
-                print(f"Model {self.model_name} downloaded successfully!")
-            
-            # Test the model
-            response = ollama.chat(model=self.model_name, messages=[
-                {'role': 'user', 'content': 'Hello'}
-            ])
-            print(f"Ollama client initialized successfully with model: {self.model_name}")
-            
+            # Not counted against the server's health: the embedding model may just be missing there
+            backend = self.router.pick()
+            response = await backend.client.embeddings(model=self.embed_model, prompt=text)
+            return response['embedding']
         except Exception as e:
-            print(f"Error initializing Ollama: {e}")
-            print("Please make sure Ollama is installed and running.")
-            sys.exit(1)
+            print(f"Embedding failed, using exact cache matches only: {e}")
+            return None
 
-    def send_query(self, query: str, system_prompt: str = None) -> str:
+    async def send_query(self, query: str, system_prompt: str = None, remember: bool = True,
+                         session: Hashable = None) -> str:
         """
         Send a query to the Ollama model and receive a response
-        
+
         Args:
             query: User query string
             system_prompt: Optional system prompt for context
-            
+            remember: Add the exchange to the history. Voice mode passes False
+                and calls remember() with only the part that was spoken.
+            session: Who is asking (for the scheduler)
+
         Returns:
             Model response as string
         """
         try:
-            # Prepare messages
-            messages = []
-            
-            if system_prompt:
-                messages.append({'role': 'system', 'content': system_prompt})
-            
-            # Add conversation history (last 10 messages)
-            messages.extend(self.conversation_history[-10:])
-            
-            # Add current query
-            messages.append({'role': 'user', 'content': query})
-            
-            # Get response from Ollama
-            response = ollama.chat(model=self.model_name, messages=messages)
-            
-            bot_response = response['message']['content']
-            
-            # Update conversation history
-            self.conversation_history.append({'role': 'user', 'content': query})
-            self.conversation_history.append({'role': 'assistant', 'content': bot_response})
-            
+            # Repeated context-free queries are answered from the cache in milliseconds
+            vector = None
+            if self.response_cache is not None:
+                # Follow-ups skip the cache, so don't spend a round trip embedding them
+                if not self.response_cache.is_context_dependent(query, self.conversation_history):
+                    vector = await self.embed(query)
+                cached = self.response_cache.get(query, system_prompt, self.conversation_history, vector)
+                if cached is not None:
+                    if remember:
+                        self.remember(query, cached)
+                    return cached
+
+            bot_response = await self.chat(self._build_messages(query, system_prompt), session)
+            if self.response_cache is not None:
+                self.response_cache.put(query, bot_response, system_prompt, self.conversation_history, vector)
+            if remember:
+                self.remember(query, bot_response)
             return bot_response
-            
+
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             error_msg = f"Error getting response from {self.model_name}: {str(e)}"
             print(error_msg)
             return f"Sorry, I encountered an error: {str(e)}"
 
-    def get_response(self, user_input: str) -> str:
+    async def send_query_stream(self, query: str, system_prompt: str = None,
+                                session: Hashable = None) -> AsyncIterator[str]:
         """
-        Get response for user input as ARKA - friendly Indian voice assistant
+        Stream the response to a query token by token
+
+        Whatever was streamed before the generator was closed is kept in the history.
+
+        Args:
+            query: User query string
+            system_prompt: Optional system prompt for context
+            session: Who is asking (for the scheduler)
+
+        Yields:
+            Pieces of the response as they are generated
         """
-        system_prompt = """You are ARKA, a friendly and enthusiastic 25-year-old Indian guy having a casual conversation with a friend. 
+        parts = []
+        try:
+            async for token in self.chat_stream(self._build_messages(query, system_prompt), session):
+                parts.append(token)
+                yield token
+        finally:
+            if parts:
+                self.remember(query, ''.join(parts))
 
-Your personality and speech patterns:
-- Speak like a young, educated Indian person with natural Indian English expressions
-- Use Indian expressions occasionally: "yaar", "actually", "basically", "totally", "obviously", "no problem", "definitely", "for sure"
-- Be warm, enthusiastic, and genuinely helpful like a close Indian friend
-- Use contractions naturally (I'm, you're, don't, can't, that's, it's)
-- Sound energetic and passionate about helping
-- Use expressions like "That's awesome!", "Cool!", "Interesting!", "Amazing!"
-- Speak confidently but humbly, like a well-educated young Indian professional
-- Keep responses conversational and under 150 words
-- Occasionally use mild Indian English patterns like "I am telling you", "What to do", "Like that only"
-- Be genuinely excited to help and show authentic enthusiasm
+    async def get_response(self, user_input: str, remember: bool = True) -> str:
+        """
+        Get response for user input as ARKA - friendly Indian voice assistant
+        """
+        return await self.send_query(user_input, ARKA_SYSTEM_PROMPT, remember)
 
-Remember: You're ARKA, a young Indian friend who's always excited to help and chat!"""
-        
-        return self.send_query(user_input, system_prompt)
+    def get_response_stream(self, user_input: str) -> AsyncIterator[str]:
+        """Stream ARKA's response to user input"""
+        return self.send_query_stream(user_input, ARKA_SYSTEM_PROMPT)
 
     def clear_history(self):
         """Clear conversation history"""
         self.conversation_history.clear()
         print("Conversation history cleared.")
 
+    async def aclose(self):
+        """Close the pooled connections"""
+        await self.router.aclose()
+
+
+_END_OF_STREAM = object()
+
+
+class _EventLoopThread:
+    """One background asyncio loop shared by every sync OllamaClient in the process"""
+
+    _shared = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="ollama-loop", daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def shared(cls) -> '_EventLoopThread':
+        with cls._lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+class OllamaClient:
+    def __init__(self, model_name: str = "gemma3:latest", initialize: bool = True,
+                 summarize: bool = settings.SUMMARIZE_HISTORY,
+                 async_client: Optional[AsyncOllamaClient] = None, **kwargs):
+        """
+        Initialize Ollama client with specified model
+
+        Blocking facade over AsyncOllamaClient for existing callers. Requests
+        run on a shared background event loop; cancel() aborts the ones in flight.
+
+        Args:
+            model_name: Name of the Ollama model to use
+            initialize: Check (and pull) the model now
+            summarize: Fold turns that no longer fit the context into a running
+                summary while no request is in flight
+            async_client: Share another client's connection pool, scheduler,
+                metrics and response cache (e.g. one per server session);
+                cancel() still only aborts this facade's own requests, and
+                the scheduler lets each facade take its turn
+            **kwargs: host, pool_size, timeout, keep_alive, num_parallel, backends for AsyncOllamaClient
+        """
+        self.model_name = model_name
+        self.async_client = async_client if async_client is not None else AsyncOllamaClient(model_name, **kwargs)
+        self._loop = _EventLoopThread.shared()
+        self._inflight = set()
+        # Notified whenever a request finishes, for threads waiting for the client to go idle
+        self._activity = Flag()
+        self.health_cache = ModelHealthCache()
+        self.summarizer = None
+        if summarize:
+            # Summaries wait behind every reply someone is listening for
+            self.summarizer = RollingSummarizer(self.conversation_history,
+                                                lambda messages: self.chat(messages, PRIORITY_BACKGROUND),
+                                                idle=lambda: not self._inflight, activity=self._activity)
+            self.summarizer.start()
+        if initialize:
+            self.initialize_model()
+
+    @property
+    def conversation_history(self) -> ConversationContext:
+        return self.async_client.conversation_history
+
+    @property
+    def metrics(self) -> GenerationMetrics:
+        return self.async_client.metrics
+
+    @property
+    def response_cache(self) -> Optional[ResponseCache]:
+        return self.async_client.response_cache
+
+    def _run(self, coro):
+        """Run a coroutine on the background loop and wait for its result"""
+        future = self._loop.submit(coro)
+        self._inflight.add(future)
+        try:
+            return future.result()
+        finally:
+            self._inflight.discard(future)
+            self._activity.notify()
+
+    def initialize_model(self, fast: bool = settings.FAST_STARTUP):
+        """
+        Initialize and verify the Ollama model
+
+        Args:
+            fast: Trust a recent cached model check and load the model in the
+                background instead of waiting for a test chat
+        """
+        try:
+            if fast:
+                self.ensure_model()
+                self.preload()
+                print(f"Ollama client ready with model: {self.model_name} (loading in the background)")
+            else:
+                # Check if Ollama is running and model is available
+                self._run(self.async_client.initialize_model())
+
+        except Exception as e:
+            print(f"Error initializing Ollama: {e}")
+            print("Please make sure Ollama is installed and running.")
+            sys.exit(1)
+
+    def ensure_model(self, on_pull: Optional[Callable[[], None]] = None, use_cache: bool = True):
+        """
+        Make sure the model is installed, pulling it if needed
+
+        Args:
+            on_pull: Called before a (slow) download starts
+            use_cache: Skip the server round trip if the model was seen recently
+        """
+        host = self.async_client.host
+        if use_cache and self.health_cache.is_fresh(host, self.model_name):
+            return
+
+        if not self._run(self.async_client.has_model()):
+            if on_pull is not None:
+                on_pull()
+            self._run(self.async_client.pull())
+        self.health_cache.mark_ok(host, self.model_name)
+
+    def preload(self) -> concurrent.futures.Future:
+        """Start loading the model into Ollama's memory without waiting for it"""
+        future = self._loop.submit(self.async_client.preload())
+
+        def report(done: concurrent.futures.Future):
+            if not done.cancelled() and done.exception() is not None:
+                print(f"Ollama preload failed: {done.exception()}")
+                self.health_cache.invalidate(self.async_client.host, self.model_name)
+
+        future.add_done_callback(report)
+        return future
+
+    def send_query(self, query: str, system_prompt: str = None, remember: bool = True) -> str:
+        """
+        Send a query to the Ollama model and receive a response
+
+        Args:
+            query: User query string
+            system_prompt: Optional system prompt for context
+            remember: Add the exchange to the history
+
+        Returns:
+            Model response as string
+        """
+        return self._run(self.async_client.send_query(query, system_prompt, remember, self))
+
+    def send_query_stream(self, query: str, system_prompt: str = None) -> Iterator[str]:
+        """
+        Stream the response to a query token by token
+
+        The partial reply stays in the history if the stream is closed early.
+        """
+        return self._iterate(self.async_client.send_query_stream(query, system_prompt, self))
+
+    def chat(self, messages: List[Dict[str, str]], priority: int = PRIORITY_NORMAL) -> str:
+        """Send a full message list and return the reply (history is not touched)"""
+        return self._run(self.async_client.chat(messages, self, priority))
+
+    def embed(self, text: str) -> Optional[List[float]]:
+        """Embedding for the response cache, or None if no embedding model is set"""
+        return self._run(self.async_client.embed(text))
+
+    def chat_stream(self, messages: List[Dict[str, str]], priority: int = PRIORITY_NORMAL) -> Iterator[str]:
+        """
+        Stream the reply to a full message list (history is not touched)
+
+        Args:
+            messages: Chat messages
+            priority: Scheduler priority; PRIORITY_URGENT for the reply after a barge-in
+        """
+        return self._iterate(self.async_client.chat_stream(messages, self, priority))
+
+    def _iterate(self, stream: AsyncIterator[str]) -> Iterator[str]:
+        """
+        Read an async token stream on the background loop and hand it over through a queue
+
+        Closing the iterator early, or cancel(), closes the HTTP stream and the
+        iterator simply ends.
+        """
+        tokens = queue.Queue()
+        finished = threading.Event()
+
+        async def pump():
+            try:
+                async for token in stream:
+                    tokens.put(token)
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                tokens.put(e)
+            finally:
+                tokens.put(_END_OF_STREAM)
+                finished.set()
+
+        future = self._loop.submit(pump())
+        self._inflight.add(future)
+        try:
+            while True:
+                item = tokens.get()
+                if item is _END_OF_STREAM:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+            finished.wait(5)
+            self._inflight.discard(future)
+            self._activity.notify()
+
+    def get_response(self, user_input: str, remember: bool = True) -> str:
+        """
+        Get response for user input as ARKA - friendly Indian voice assistant
+        """
+        return self.send_query(user_input, ARKA_SYSTEM_PROMPT, remember)
+
+    def get_response_stream(self, user_input: str) -> Iterator[str]:
+        """Stream ARKA's response to user input"""
+        return self.send_query_stream(user_input, ARKA_SYSTEM_PROMPT)
+
+    def cancel(self):
+        """
+        Abort every request this client has in flight
+
+        A blocked send_query() raises concurrent.futures.CancelledError; a
+        stream just stops yielding.
+        """
+        for future in list(self._inflight):
+            future.cancel()
+
+    def remember(self, query: str, bot_response: str):
+        """Update conversation history"""
+        self.async_client.remember(query, bot_response)
+
+    def clear_history(self):
+        """Clear conversation history"""
+        self.async_client.clear_history()
+
     def _mock_response(self, query):
         """Legacy mock response method (kept for compatibility)"""
-        return f"Response from {self.model_name} for query: {query}"
\ No newline at end of file
+        return f"Response from {self.model_name} for query: {query}"
@@ -0,0 +1,178 @@
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from bot.events import Flag
+
+
+class Turn:
+    """One user utterance travelling through the pipeline, plus its per-turn state"""
+
+    def __init__(self, user_text: Optional[str] = None):
+        self.user_text = user_text
+        self.state: Dict[str, Any] = {}
+        self.spoken: List[str] = []
+        self.done = False
+
+
+class Stage:
+    def __init__(self, name: str, handler: Callable, maxsize: int = 4):
+        """
+        A pipeline stage: one worker thread reading from a bounded input queue
+
+        Args:
+            name: Stage name, used in logs and for Pipeline.put(stage=...)
+            handler: Called as handler(item, emit) for every input item. It may
+                call emit(output) zero or more times; emit returns False once the
+                item has been flushed so long-running handlers can stop early.
+            maxsize: Input queue size. A full queue blocks the upstream stage.
+        """
+        self.name = name
+        self.handler = handler
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.next_stage: Optional['Stage'] = None
+        self.pipeline: Optional['Pipeline'] = None
+        self.thread: Optional[threading.Thread] = None
+        self.busy = False
+
+    def start(self):
+        """Start the worker thread"""
+        self.thread = threading.Thread(target=self._run, name=f"stage-{self.name}", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        """Worker loop: take an item, run the handler, pass outputs downstream"""
+        while True:
+            entry = self.queue.get()
+            self.pipeline._made_room()
+            if entry is Pipeline.STOP:
+                break
+
+            generation, item = entry
+            if generation != self.pipeline.generation:
+                continue  # Flushed while waiting in the queue
+
+            def emit(output, generation=generation) -> bool:
+                if generation != self.pipeline.generation:
+                    return False
+                if self.next_stage is None:
+                    return True
+                return self.pipeline._put(self.next_stage, generation, output)
+
+            self.busy = True
+            try:
+                self.handler(item, emit)
+            except Exception as e:
+                print(f"Pipeline stage '{self.name}' error: {e}")
+            finally:
+                self.busy = False
+                if self.pipeline.activity is not None:
+                    self.pipeline.activity.notify()
+
+
+class Pipeline:
+    """
+    Chain of stages, each running in its own thread with bounded queues between them
+
+    A slow stage only blocks the stages feeding it once their queues are full
+    (backpressure); every other stage keeps working on the items it already has.
+    """
+
+    STOP = object()
+
+    def __init__(self, maxsize: int = 4, activity: Optional[Flag] = None):
+        """
+        Args:
+            maxsize: Default queue size for stages added to this pipeline
+            activity: Flag notified after every item a stage finishes, so
+                threads waiting on it can re-check is_idle()
+        """
+        self.maxsize = maxsize
+        self.activity = activity
+        self.stages: List[Stage] = []
+        self.generation = 0
+        self.running = False
+        # Upstream stages blocked on a full queue wait here for room, a flush or stop()
+        self.room = threading.Condition()
+
+    def add_stage(self, name: str, handler: Callable, maxsize: Optional[int] = None) -> Stage:
+        """Append a stage to the end of the pipeline"""
+        stage = Stage(name, handler, maxsize or self.maxsize)
+        stage.pipeline = self
+        if self.stages:
+            self.stages[-1].next_stage = stage
+        self.stages.append(stage)
+        return stage
+
+    def start(self):
+        """Start all stage workers"""
+        self.running = True
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self):
+        """Stop all stage workers, dropping anything still queued"""
+        self.running = False
+        self.flush()
+        for stage in self.stages:
+            try:
+                stage.queue.put_nowait(self.STOP)
+            except queue.Full:
+                pass
+
+    def put(self, item, stage: Optional[str] = None) -> bool:
+        """
+        Feed an item into the pipeline, blocking while the stage is full
+
+        Args:
+            item: Input for the stage
+            stage: Name of the stage to enter at (default: the first one)
+
+        Returns:
+            True if the item was queued, False if the pipeline was stopped or flushed
+        """
+        target = self.stages[0] if stage is None else self._stage(stage)
+        return self._put(target, self.generation, item)
+
+    def flush(self):
+        """
+        Drop every queued item and tell in-flight handlers to stop emitting
+
+        Used when the user interrupts: whatever was being recognized, generated
+        or spoken for the old turn is no longer wanted.
+        """
+        with self.room:
+            self.generation += 1
+            for stage in self.stages:
+                while True:
+                    try:
+                        stage.queue.get_nowait()
+                    except queue.Empty:
+                        break
+            self.room.notify_all()
+
+    def is_idle(self) -> bool:
+        """True when no stage has queued or in-flight work"""
+        return all(stage.queue.empty() and not stage.busy for stage in self.stages)
+
+    def _stage(self, name: str) -> Stage:
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        raise ValueError(f"Unknown pipeline stage: {name}")
+
+    def _put(self, stage: Stage, generation: int, item) -> bool:
+        # Block while the queue is full, but give up if we are flushed or stopped
+        with self.room:
+            while self.running and generation == self.generation:
+                try:
+                    stage.queue.put_nowait((generation, item))
+                    return True
+                except queue.Full:
+                    self.room.wait()
+            return False
+
+    def _made_room(self):
+        """Wake upstream stages waiting for room in a queue"""
+        with self.room:
+            self.room.notify_all()
@@ -0,0 +1,91 @@
+import re
+from typing import Any, Dict
+
+# Natural contractions for friendliness, applied in one pass
+CONTRACTIONS = {
+    'I am': "I'm", 'you are': "you're", 'it is': "it's", 'that is': "that's",
+    'I will': "I'll", 'you will': "you'll", 'I would': "I'd", 'you would': "you'd",
+    'cannot': "can't", 'do not': "don't", 'does not': "doesn't", 'will not': "won't",
+    'should not': "shouldn't", 'could not': "couldn't", 'would not': "wouldn't",
+    'have not': "haven't", 'has not': "hasn't", 'had not': "hadn't"
+}
+_CONTRACTION_LOOKUP = {full.lower(): short for full, short in CONTRACTIONS.items()}
+CONTRACTION_PATTERN = re.compile(r'\b(?:' + '|'.join(map(re.escape, CONTRACTIONS)) + r')\b', re.IGNORECASE)
+
+RESPECT_WORDS = ('sir', 'madam', 'great question', 'smart', 'absolutely right', 'good thinking')
+FRIENDLY_WORDS = ('yaar', 'bhai', 'actually', 'basically', 'no worries', 'totally')
+
+GOOD = re.compile(r'\bgood\b', re.IGNORECASE)
+RIGHT = re.compile(r'\bright\b', re.IGNORECASE)
+YES = re.compile(r'\byes\b', re.IGNORECASE)
+SURE = re.compile(r'\bsure\b', re.IGNORECASE)
+
+# Light humor: (word, replacement, pattern); only one is added per response
+HUMOR_ADDITIONS = tuple(
+    (original, replacement, re.compile(r'\b' + original + r'\b', re.IGNORECASE))
+    for original, replacement in (
+        ('great', 'totally great'),
+        ('interesting', 'quite interesting'),
+        ('cool', 'pretty cool'),
+        ('nice', 'really nice')
+    )
+)
+
+
+def make_sentence_friendly(text: str, state: Dict[str, Any]) -> str:
+    """
+    Apply ARKA's personality to a single sentence
+
+    Args:
+        text: Sentence from the model
+        state: Carried across the sentences of one response, so each touch
+            (respect, friendliness, humor) is added at most once
+
+    Returns:
+        The friendly sentence
+    """
+    text = CONTRACTION_PATTERN.sub(lambda m: _CONTRACTION_LOOKUP[m.group(0).lower()], text)
+    lower = text.lower()
+
+    # Add respectful expressions if not present
+    if any(word in lower for word in RESPECT_WORDS):
+        state['respect_seen'] = True
+    elif not state.get('respect_seen') and len(text) > 30:
+        # Add subtle respect
+        if 'good' in lower:
+            text = GOOD.sub('really good', text)
+            state['respect_seen'] = True
+        elif 'right' in lower:
+            text = RIGHT.sub('absolutely right', text)
+            state['respect_seen'] = True
+
+    # Add friendly Indian expressions if missing
+    if any(word in lower for word in FRIENDLY_WORDS):
+        state['friendly_seen'] = True
+    elif not state.get('friendly_seen') and len(text) > 20:
+        # Add one friendly expression
+        if 'yes' in lower:
+            text = YES.sub('yes, totally', text)
+            state['friendly_seen'] = True
+        elif 'sure' in lower:
+            text = SURE.sub('sure, yaar', text)
+            state['friendly_seen'] = True
+        elif 'no problem' not in lower and 'help' in lower:
+            text = text.rstrip('.!?') + ', no worries!'
+            state['friendly_seen'] = True
+
+    # Add light humor elements
+    if not state.get('humor_added'):
+        lower = text.lower()
+        for original, replacement, pattern in HUMOR_ADDITIONS:
+            if original in lower and replacement not in lower:
+                text = pattern.sub(replacement, text)
+                state['humor_added'] = True
+                break  # Only add one humor element
+
+    # Ensure it ends properly
+    text = text.strip()
+    if text and text[-1] not in '.!?':
+        text += '.'
+
+    return text
@@ -0,0 +1,158 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from config import settings
+
+# Words that usually point back at something said earlier ("tell me more about it")
+# or at the user themselves ("what's my name"), whose answer comes from the history
+FOLLOW_UP = re.compile(
+    r"\b(it|its|that|this|these|those|they|them|their|he|she|him|her|again|more|else|also|too|another|then)\b"
+    r"|\b(i|me|my|mine|we|us|our|remember|earlier|before|said|told)\b"
+    r"|^(and|but|so|what about|how about)\b"
+)
+NON_WORD = re.compile(r"[^\w\s]")
+SPACES = re.compile(r"\s+")
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = settings.RESPONSE_CACHE_SIZE, ttl: float = settings.RESPONSE_CACHE_TTL,
+                 similarity: float = settings.RESPONSE_CACHE_SIMILARITY):
+        """
+        Cache of replies to queries that don't depend on the conversation so far
+
+        Lookups are by normalized text ("Hey, what can you do?" and "hey what
+        can you do" match). If the caller passes embedding vectors, a query
+        whose vector is close enough to a cached one also matches. Entries
+        expire after ttl seconds and the least recently used one is evicted
+        when the cache is full.
+
+        Args:
+            max_entries: Number of replies kept
+            ttl: Seconds a reply stays valid
+            similarity: Minimum cosine similarity for an embedding match
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self.entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Lowercase, drop punctuation and collapse whitespace"""
+        return SPACES.sub(' ', NON_WORD.sub(' ', text.lower())).strip()
+
+    @staticmethod
+    def is_context_dependent(query: str, history: Iterable) -> bool:
+        """True if the query probably refers to earlier turns, so a cached reply could be wrong"""
+        if not any(True for _ in history):
+            return False
+        return FOLLOW_UP.search(ResponseCache.normalize(query)) is not None
+
+    def _key(self, query: str, system_prompt: Optional[str]) -> str:
+        return f"{hash(system_prompt or '')}|{self.normalize(query)}"
+
+    def get(self, query: str, system_prompt: Optional[str] = None, history: Sequence = (),
+            vector: Optional[Sequence[float]] = None) -> Optional[str]:
+        """
+        Cached reply for a query, or None
+
+        Args:
+            query: What the user said
+            system_prompt: The persona the reply was generated for
+            history: Conversation so far, used to skip follow-up questions
+            vector: Optional embedding of the query for similarity matching
+        """
+        if self.is_context_dependent(query, history):
+            self.bypassed += 1
+            return None
+
+        key = self._key(query, system_prompt)
+        now = time.time()
+        with self.lock:
+            self._expire(now)
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry['response']
+
+            if vector is not None:
+                match = self._nearest(np.asarray(vector, dtype=np.float32), hash(system_prompt or ''))
+                if match is not None:
+                    self.entries.move_to_end(match)
+                    self.semantic_hits += 1
+                    return self.entries[match]['response']
+
+            self.misses += 1
+            return None
+
+    def put(self, query: str, response: str, system_prompt: Optional[str] = None, history: Sequence = (),
+            vector: Optional[Sequence[float]] = None):
+        """
+        Store a reply (ignored for follow-up questions and empty replies)
+
+        Only replies generated without any history are stored: one built from
+        a conversation may draw on it in ways no word list catches, and the
+        cache is shared by every session of the process.
+        """
+        if not response or self.is_context_dependent(query, history) or any(True for _ in history):
+            return
+        key = self._key(query, system_prompt)
+        with self.lock:
+            self.entries[key] = {
+                'response': response,
+                'created': time.time(),
+                'system': hash(system_prompt or ''),
+                'vector': self._unit(vector) if vector is not None else None
+            }
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.semantic_hits + self.misses
+        return (self.hits + self.semantic_hits) / lookups if lookups else 0.0
+
+    def report(self) -> str:
+        """Hit-rate summary"""
+        return (f"💾 Response cache: {self.hit_rate:.0%} hit rate ({self.hits} exact, {self.semantic_hits} similar, "
+                f"{self.misses} misses, {self.bypassed} follow-ups skipped, {len(self.entries)} stored)")
+
+    @staticmethod
+    def _unit(vector: Sequence[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(array))
+        return array / norm if norm else array
+
+    def _nearest(self, vector: np.ndarray, system: int) -> Optional[str]:
+        """Key of the most similar cached query above the threshold"""
+        candidates: List[str] = [key for key, entry in self.entries.items()
+                                 if entry['vector'] is not None and entry['system'] == system]
+        if not candidates:
+            return None
+        matrix = np.stack([self.entries[key]['vector'] for key in candidates])
+        scores = matrix @ self._unit(vector)
+        best = int(np.argmax(scores))
+        return candidates[best] if scores[best] >= self.similarity else None
+
+    def _expire(self, now: float):
+        # Entries are in least-recently-used order, not age order, so check them all
+        expired = [key for key, entry in self.entries.items() if now - entry['created'] > self.ttl]
+        for key in expired:
+            del self.entries[key]
@@ -0,0 +1,277 @@
+import asyncio
+import collections
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable, List, Optional
+
+import httpx
+import ollama
+
+from config import settings
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """True if the error says the backend is unusable (not that the request was bad)"""
+    if isinstance(error, (httpx.TransportError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, ollama.ResponseError):
+        # 5xx, model not installed there, or an error reported mid-stream
+        return error.status_code >= 500 or error.status_code in (404, -1)
+    return False
+
+
+class Backend:
+    def __init__(self, host: str, model: str, num_parallel: int = settings.OLLAMA_NUM_PARALLEL,
+                 pool_size: int = settings.OLLAMA_POOL_SIZE, timeout: float = settings.OLLAMA_TIMEOUT,
+                 cooldown: float = settings.OLLAMA_BACKEND_COOLDOWN, alpha: float = 0.3):
+        """
+        One Ollama server the router can send requests to, with its health
+
+        Latency (time to the first token, or to the whole reply) and errors
+        are tracked as exponentially weighted moving averages. After a
+        failure the backend sits out for cooldown seconds, doubling with
+        every further failure in a row (up to a minute); the first request
+        after that is the probe that brings it back.
+
+        Args:
+            host: Server URL
+            model: Model name on this server
+            num_parallel: Replies it generates at once (its OLLAMA_NUM_PARALLEL)
+            pool_size: Maximum open connections to it
+            timeout: Seconds to wait for it to respond
+            cooldown: Seconds it sits out after a failure
+            alpha: Weight of the newest sample in the moving averages
+        """
+        self.host = host
+        self.model = model
+        self.num_parallel = max(1, num_parallel)
+        self.cooldown = cooldown
+        self.alpha = alpha
+        # The connection pool is ours, so shutdown doesn't depend on the ollama client's internals
+        self.transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=60.0
+            )
+        )
+        self.client = ollama.AsyncClient(
+            host=host,
+            timeout=httpx.Timeout(timeout, connect=5.0),
+            transport=self.transport
+        )
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.down = False
+        self.down_until = 0.0
+        self.last_error: Optional[str] = None
+
+    @property
+    def healthy(self) -> bool:
+        """Up, or down but its cooldown is over (the next request probes it)"""
+        return not self.down or time.monotonic() >= self.down_until
+
+    @property
+    def load(self) -> float:
+        """Requests in flight per generation slot"""
+        return self.in_flight / self.num_parallel
+
+    def record_success(self, seconds: float) -> bool:
+        """Returns True if the backend was down until now"""
+        recovered = self.down
+        self.requests += 1
+        self.consecutive_failures = 0
+        self.down = False
+        self.latency = seconds if self.latency is None else self.alpha * seconds + (1 - self.alpha) * self.latency
+        self.error_rate *= 1 - self.alpha
+        return recovered
+
+    def record_failure(self, error: BaseException) -> bool:
+        """Returns True if the backend was up until now"""
+        self.requests += 1
+        self.failures += 1
+        self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+        self.last_error = str(error) or type(error).__name__
+        if self.down and time.monotonic() < self.down_until:
+            return False  # Sent before it went down; it is already sitting out
+        went_down = not self.down
+        self.down = True
+        self.consecutive_failures += 1
+        self.down_until = time.monotonic() + min(60.0, self.cooldown * 2 ** (self.consecutive_failures - 1))
+        return went_down
+
+    def describe(self) -> str:
+        latency = f"{self.latency * 1000:.0f} ms" if self.latency is not None else "no latency yet"
+        state = f"down ({self.last_error})" if self.down else "healthy"
+        return (f"{self.host} [{self.model}]: {self.requests} requests, {self.failures} failed, "
+                f"{latency}, {self.in_flight} in flight, {state}")
+
+
+def parse_backends(spec: str, default_model: str, default_parallel: int = settings.OLLAMA_NUM_PARALLEL,
+                   **kwargs) -> List[Backend]:
+    """
+    Backends from a list like "http://box1:11434=gemma3:latest=4,http://box2:11434"
+
+    Each entry is a URL, optionally followed by =model and =num_parallel.
+    """
+    backends = []
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        fields = entry.split('=')
+        model = fields[1] if len(fields) > 1 and fields[1] else default_model
+        parallel = int(fields[2]) if len(fields) > 2 and fields[2] else default_parallel
+        backends.append(Backend(fields[0], model, parallel, **kwargs))
+    return backends
+
+
+class LLMRouter:
+    def __init__(self, backends: List[Backend], attempts: int = settings.OLLAMA_FAILOVER_ATTEMPTS,
+                 on_health_change: Optional[Callable[[], None]] = None):
+        """
+        Spreads requests over several Ollama servers
+
+        Each request goes to the healthy backend with the fewest requests in
+        flight per generation slot; on a tie, the one that served the same
+        session last (its Ollama still has that conversation's prompt prefix
+        evaluated), then the one with fewer recent errors, then the fastest.
+        If a backend fails before anything was returned, the request is
+        retried on another one, up to `attempts` backends in total. When
+        every backend is down, the one that comes back first is tried anyway.
+
+        Args:
+            backends: Servers to use
+            attempts: Backends tried per request
+            on_health_change: Called when a backend goes down or comes back
+        """
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = backends
+        self.attempts = max(1, attempts)
+        self.on_health_change = on_health_change
+        self.failovers = 0
+        self._affinity: "collections.OrderedDict[Hashable, Backend]" = collections.OrderedDict()
+
+    @property
+    def capacity(self) -> int:
+        """Generation slots on the backends that are up (at least one)"""
+        return max(1, sum(backend.num_parallel for backend in self.backends if not backend.down))
+
+    def pick(self, exclude=(), session: Hashable = None) -> Optional[Backend]:
+        """The backend for the next attempt (None once every backend was tried)"""
+        candidates = [backend for backend in self.backends if backend not in exclude]
+        if not candidates:
+            return None
+        healthy = [backend for backend in candidates if backend.healthy]
+        if not healthy:
+            return min(candidates, key=lambda backend: backend.down_until)
+        preferred = self._affinity.get(session) if session is not None else None
+        return min(healthy, key=lambda backend: (
+            backend.load,
+            backend is not preferred,
+            round(backend.error_rate, 1),
+            backend.latency if backend.latency is not None else 0.0
+        ))
+
+    async def call(self, request: Callable[[Backend], Awaitable[Any]], session: Hashable = None) -> Any:
+        """
+        Run a request on the best backend, failing over to others
+
+        Args:
+            request: Sends the request to the given backend
+            session: Who is asking (kept on the same backend when loads are equal)
+        """
+        async def single(backend):
+            yield await request(backend)
+
+        stream = self.stream(single, session)
+        try:
+            async for result in stream:
+                return result
+        finally:
+            await stream.aclose()
+
+    async def stream(self, request: Callable[[Backend], AsyncIterator[Any]],
+                     session: Hashable = None) -> AsyncIterator[Any]:
+        """
+        Run a streaming request on the best backend, failing over to others
+
+        A backend that fails before the first item is replaced; once items
+        were passed on, its error is raised (they can't be taken back).
+        """
+        tried = []
+        while True:
+            backend = self.pick(tried, session)
+            tried.append(backend)
+            backend.in_flight += 1
+            started = time.perf_counter()
+            source = request(backend)
+            first = True
+            try:
+                try:
+                    async for item in source:
+                        if first:
+                            first = False
+                            self._succeeded(backend, time.perf_counter() - started, session)
+                        yield item
+                finally:
+                    await source.aclose()
+                if first:
+                    self._succeeded(backend, time.perf_counter() - started, session)
+                return
+            except Exception as e:
+                if not first or not is_backend_failure(e):
+                    raise
+                if backend.record_failure(e):
+                    self._health_changed()
+                if len(tried) >= self.attempts or self.pick(tried) is None:
+                    raise
+                self.failovers += 1
+                print(f"⚠️ Ollama at {backend.host} failed ({backend.last_error}), trying another server")
+            finally:
+                backend.in_flight -= 1
+
+    async def each(self, request: Callable[[Backend], Awaitable[Any]]) -> List[Any]:
+        """
+        Run a request on every backend at once (model checks, preloading)
+
+        Returns:
+            One result per backend; a backend that failed gets its exception
+            (and is marked down). Raises if every backend failed.
+        """
+        results = await asyncio.gather(*(request(backend) for backend in self.backends), return_exceptions=True)
+        changed = False
+        for backend, result in zip(self.backends, results):
+            if isinstance(result, Exception) and is_backend_failure(result):
+                changed = backend.record_failure(result) or changed
+        if changed:
+            self._health_changed()
+        errors = [result for result in results if isinstance(result, Exception)]
+        if len(errors) == len(results):
+            raise errors[0]
+        return results
+
+    def report(self) -> str:
+        """One line per backend"""
+        lines = [f"🔀 Ollama router: {len(self.backends)} backends, {self.failovers} failovers"]
+        lines += [f"   {backend.describe()}" for backend in self.backends]
+        return "\n".join(lines)
+
+    async def aclose(self):
+        for backend in self.backends:
+            await backend.transport.aclose()
+
+    def _succeeded(self, backend: Backend, seconds: float, session: Hashable):
+        if backend.record_success(seconds):
+            print(f"✅ Ollama at {backend.host} is back")
+            self._health_changed()
+        if session is not None:
+            self._affinity[session] = backend
+            self._affinity.move_to_end(session)
+            while len(self._affinity) > 1024:
+                self._affinity.popitem(last=False)
+
+    def _health_changed(self):
+        if self.on_health_change is not None:
+            self.on_health_change()
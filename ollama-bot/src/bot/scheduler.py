@@ -0,0 +1,271 @@
+import asyncio
+import collections
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+
+from config import settings
+
+# Lower runs first. A reply after the user interrupted ARKA is awaited by
+# someone who is already talking; background work (summaries) can wait.
+PRIORITY_URGENT = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2
+PRIORITY_NAMES = {PRIORITY_URGENT: 'urgent', PRIORITY_NORMAL: 'normal', PRIORITY_BACKGROUND: 'background'}
+
+
+class SchedulerMetrics:
+    def __init__(self, keep: int = 200):
+        """
+        Queueing statistics of a GenerationScheduler
+
+        Args:
+            keep: Number of recent wait times remembered per priority
+        """
+        self.waits: Dict[int, Deque[float]] = collections.defaultdict(lambda: collections.deque(maxlen=keep))
+        self.submitted = 0
+        self.coalesced = 0
+        self.depth = 0
+        self.peak_depth = 0
+
+    def queued(self, depth: int):
+        self.depth = depth
+        self.peak_depth = max(self.peak_depth, depth)
+
+    def record_wait(self, priority: int, seconds: float):
+        self.waits[priority].append(seconds)
+
+    @staticmethod
+    def percentile(values, p: float) -> float:
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] if ordered else 0.0
+
+    def report(self) -> str:
+        """Requests, coalescing, queue depth and wait times per priority"""
+        if not self.submitted:
+            return "📊 No scheduled Ollama requests yet"
+        waits = ", ".join(
+            f"{PRIORITY_NAMES.get(priority, priority)} p50 {self.percentile(w, 50) * 1000:.0f} ms / "
+            f"p95 {self.percentile(w, 95) * 1000:.0f} ms"
+            for priority, w in sorted(self.waits.items()) if w)
+        return (f"📊 Scheduler: {self.submitted} requests, {self.coalesced} coalesced, "
+                f"queue depth {self.depth} (peak {self.peak_depth}); waits: {waits or 'none'}")
+
+
+class _SharedGeneration:
+    """One generation on Ollama, replayed to every caller that asked for the same prompt"""
+
+    def __init__(self, key: Optional[Hashable], session: Hashable, priority: int):
+        self.key = key
+        self.session = session
+        self.priority = priority
+        # The queued request for a slot, while it waits
+        self.waiter: Optional[asyncio.Future] = None
+        self.items: List[Any] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.changed = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+    async def publish(self, item=None, finished: bool = False):
+        async with self.changed:
+            if finished:
+                self.finished = True
+            else:
+                self.items.append(item)
+            self.changed.notify_all()
+
+
+class GenerationScheduler:
+    def __init__(self, max_concurrent: int = settings.OLLAMA_NUM_PARALLEL, coalesce: bool = settings.OLLAMA_COALESCE):
+        """
+        Queue in front of Ollama shared by every session of the process
+
+        Ollama only generates num_parallel replies at once and queues the rest
+        first come, first served. Holding the excess here instead lets the
+        next free slot go to the most deserving request: the lowest priority
+        number first, and within a priority the sessions take turns
+        (round-robin), so one chatty session can't starve the others.
+        Identical prompts that are queued or generating at the same time are
+        sent to Ollama once and the reply is streamed to every caller; a
+        more urgent caller joining moves the shared request up the queue.
+
+        Lives on the asyncio loop of the client that uses it.
+
+        Args:
+            max_concurrent: Requests sent to Ollama at once (its num_parallel)
+            coalesce: Share one generation between identical prompts
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.coalesce = coalesce
+        self.active = 0
+        self.metrics = SchedulerMetrics()
+        # priority -> session -> waiters, sessions in round-robin order
+        self._waiting: Dict[int, "collections.OrderedDict[Hashable, Deque[asyncio.Future]]"] = {}
+        self._shared: Dict[Hashable, _SharedGeneration] = {}
+
+    @property
+    def depth(self) -> int:
+        """Requests waiting for a slot"""
+        return sum(len(waiters) for sessions in self._waiting.values() for waiters in sessions.values())
+
+    def resize(self, max_concurrent: int):
+        """Change how many requests may run at once (e.g. when a server goes down or comes back)"""
+        self.max_concurrent = max(1, max_concurrent)
+        self._grant()
+
+    async def stream(self, factory: Callable[[], AsyncIterator[Any]], key: Optional[Hashable] = None,
+                     session: Hashable = None, priority: int = PRIORITY_NORMAL) -> AsyncIterator[Any]:
+        """
+        Run a streaming request once a slot is free
+
+        Args:
+            factory: Starts the request and returns its async iterator
+            key: Identifies the prompt for coalescing (None: never shared)
+            session: Who is asking; sessions take turns within a priority
+            priority: PRIORITY_URGENT, PRIORITY_NORMAL or PRIORITY_BACKGROUND
+
+        Yields:
+            The items of the stream (all of them, even when joining a shared
+            generation that already started). Closing the iterator withdraws
+            the request; Ollama is only stopped once nobody is listening.
+        """
+        self.metrics.submitted += 1
+        shared = self._shared.get(key) if self.coalesce and key is not None else None
+        if shared is not None and not shared.finished:
+            self.metrics.coalesced += 1
+            if priority < shared.priority:
+                self._promote(shared, priority)
+        else:
+            shared = _SharedGeneration(key, session, priority)
+            if self.coalesce and key is not None:
+                self._shared[key] = shared
+            shared.task = asyncio.ensure_future(self._generate(shared, factory))
+
+        shared.subscribers += 1
+        position = 0
+        try:
+            while True:
+                async with shared.changed:
+                    await shared.changed.wait_for(lambda: len(shared.items) > position or shared.finished)
+                while position < len(shared.items):
+                    position += 1
+                    yield shared.items[position - 1]
+                if shared.finished and position == len(shared.items):
+                    if shared.error is not None:
+                        raise shared.error
+                    return
+        finally:
+            shared.subscribers -= 1
+            if shared.subscribers == 0 and not shared.finished:
+                if self._shared.get(shared.key) is shared:
+                    del self._shared[shared.key]  # New callers start afresh
+                shared.task.cancel()
+
+    async def call(self, factory: Callable[[], Awaitable[Any]], key: Optional[Hashable] = None,
+                   session: Hashable = None, priority: int = PRIORITY_NORMAL) -> Any:
+        """Run a single request (like stream(), for a coroutine with one result)"""
+        async def single():
+            yield await factory()
+
+        stream = self.stream(single, key, session, priority)
+        try:
+            async for result in stream:
+                return result
+        finally:
+            await stream.aclose()
+
+    async def _generate(self, shared: _SharedGeneration, factory):
+        try:
+            await self._acquire(shared)
+            try:
+                source = factory()
+                try:
+                    async for item in source:
+                        await shared.publish(item)
+                finally:
+                    if hasattr(source, 'aclose'):
+                        await source.aclose()
+            finally:
+                self._release()
+        except asyncio.CancelledError:
+            shared.error = asyncio.CancelledError()
+        except Exception as e:
+            shared.error = e
+        finally:
+            if self._shared.get(shared.key) is shared:
+                del self._shared[shared.key]
+            await shared.publish(finished=True)
+
+    async def _acquire(self, shared: _SharedGeneration):
+        """Wait for a slot; queued requests are granted by _release()"""
+        enqueued = time.perf_counter()
+        if self.active < self.max_concurrent and not self.depth:
+            self.active += 1
+            self.metrics.record_wait(shared.priority, 0.0)
+            return
+
+        shared.waiter = waiter = asyncio.get_running_loop().create_future()
+        self._enqueue(shared.priority, shared.session, waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()  # Granted just as we were cancelled: pass the slot on
+            else:
+                self._withdraw(shared.priority, shared.session, waiter)
+            raise
+        finally:
+            shared.waiter = None
+        # Counted at the priority it was granted at (a joiner may have promoted it)
+        self.metrics.record_wait(shared.priority, time.perf_counter() - enqueued)
+
+    def _enqueue(self, priority: int, session: Hashable, waiter: asyncio.Future):
+        self._waiting.setdefault(priority, collections.OrderedDict()).setdefault(session, collections.deque()).append(waiter)
+        self.metrics.queued(self.depth)
+
+    def _promote(self, shared: _SharedGeneration, priority: int):
+        """A more urgent caller joined a shared generation: its queued request moves to that priority"""
+        waiter = shared.waiter
+        if waiter is not None and not waiter.done():
+            self._withdraw(shared.priority, shared.session, waiter)
+            self._enqueue(priority, shared.session, waiter)
+        shared.priority = priority
+
+    def _release(self):
+        self.active -= 1
+        self._grant()
+
+    def _grant(self):
+        """Hand free slots to the next waiters in line"""
+        while self.active < self.max_concurrent:
+            waiter = self._next_waiter()
+            if waiter is None:
+                break
+            if waiter.cancelled():
+                continue
+            self.active += 1
+            waiter.set_result(None)
+        self.metrics.queued(self.depth)
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        """First waiter of the next session in line, at the most urgent priority"""
+        for priority in sorted(self._waiting):
+            sessions = self._waiting[priority]
+            if not sessions:
+                continue
+            session, waiters = next(iter(sessions.items()))
+            waiter = waiters.popleft()
+            del sessions[session]
+            if waiters:
+                sessions[session] = waiters  # Back of the line
+            return waiter
+        return None
+
+    def _withdraw(self, priority: int, session: Hashable, waiter: asyncio.Future):
+        waiters = self._waiting.get(priority, {}).get(session)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiting[priority][session]
+        self.metrics.queued(self.depth)
@@ -0,0 +1,275 @@
+import concurrent.futures
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from bot.context import ConversationContext
+from bot.pipeline import Turn
+from bot.postprocess import make_sentence_friendly
+from bot.text_normalization import segment_stream, split_sentences
+
+
+# ARKA - a friendly, humorous, respectful 25-year-old Indian guy. Kept as one
+# constant so every prompt starts with exactly the same text (Ollama reuses the
+# evaluated prefix instead of processing it again).
+ARKA_VOICE_PROMPT = """You are ARKA, a friendly and humorous 25-year-old Indian guy who's respectful and fun to chat with.
+
+Your personality traits:
+- Keep responses SHORT and concise (2-3 sentences max, under 80 words)
+- Be genuinely respectful - use "sir/madam" occasionally, show appreciation for the user
+- Add light humor and wit - make friendly jokes, use playful expressions
+- Use Indian expressions naturally: "yaar", "bhai", "actually", "basically", "no worries"
+- Be enthusiastic but not overwhelming - like a cheerful friend who listens well
+- Show respect: "That's a great question!", "You're absolutely right!", "Smart thinking!"
+- Use gentle humor: "Haha, good one!", "That made me smile!", "You're funny, yaar!"
+- Keep it conversational and warm - like talking to a good friend who respects you
+- You can use emojis in text but keep them minimal and natural
+
+Key rules:
+- MAXIMUM 2-3 sentences per response
+- Always be respectful and appreciative 
+- Add light humor when appropriate
+- Use contractions (I'm, you're, that's, etc.)
+- Sound like a fun, respectful friend - not a formal assistant
+- Use emojis sparingly and naturally (they won't be spoken, just shown in text)
+
+Remember: Be brief, funny, respectful, and genuinely caring!"""
+
+# Fixed phrases, pre-rendered by the TTS audio cache so they play instantly
+ARKA_GREETING = "Hey there! I'm ARKA, your friendly voice buddy! Ready to chat and have some fun? 😄"
+ARKA_GOODBYE = "Arre yaar, it was awesome chatting with you! Take care, and come back soon! 😄"
+ARKA_FAREWELL = "Thanks for the awesome chat, yaar! Have a great day! 😊"
+ARKA_CLEARED = "Done! Fresh start, yaar. What's cooking now? 😊"
+ARKA_HELP = "Hey! I'm ARKA, your friendly voice buddy! Ask me anything, and I'll keep it short and sweet, yaar! 😄"
+ARKA_ERROR = "Oops! Having a tiny tech hiccup, yaar. Mind trying again? 😅"
+CANNED_PHRASES = (ARKA_GREETING, ARKA_GOODBYE, ARKA_FAREWELL, ARKA_CLEARED, ARKA_HELP, ARKA_ERROR)
+
+
+class SessionEngine:
+    def __init__(self, llm, system_prompt: str = ARKA_VOICE_PROMPT,
+                 history: Optional[ConversationContext] = None, stream_responses: bool = True):
+        """
+        One conversation with ARKA, without any audio
+
+        Owns everything between a final transcript and the sentences to speak:
+        the history, the prompt, the response cache, post-processing and the
+        voice commands. The bots feed it text and speak what it returns, so the
+        same logic runs against microphones and speakers, files, in-memory PCM
+        or network streams, or no audio at all.
+
+        Args:
+            llm: OllamaClient (or anything with chat, chat_stream, embed, cancel,
+                 metrics and response_cache)
+            system_prompt: Persona prompt put in front of every request
+            history: Conversation context (default: a new, empty one)
+            stream_responses: Generate sentence by sentence instead of waiting for the whole reply
+        """
+        self.llm = llm
+        self.system_prompt = system_prompt
+        self.history = history if history is not None else ConversationContext()
+        self.stream_responses = stream_responses
+
+    def build_messages(self, user_input: str) -> List[Dict[str, str]]:
+        """Build the chat messages for a new user turn"""
+        # The same system prompt every time, then history that only grows at the
+        # end, so Ollama can reuse the prompt prefix it already evaluated
+        return self.history.build(self.system_prompt, user_input)
+
+    def handle_command(self, text: str) -> Optional[Tuple[str, bool]]:
+        """
+        Handle the voice commands
+
+        Args:
+            text: Final transcript
+
+        Returns:
+            None if text isn't a command, otherwise (phrase to say, True if the
+            session should end)
+        """
+        text_lower = text.lower().strip()
+
+        if any(word in text_lower for word in ['exit', 'quit', 'goodbye', 'stop', 'end']):
+            return ARKA_GOODBYE, True
+        elif 'clear history' in text_lower or 'reset conversation' in text_lower:
+            self.history.clear()
+            return ARKA_CLEARED, False
+        elif 'help' in text_lower and len(text_lower.split()) == 1:
+            return ARKA_HELP, False
+
+        return None
+
+    def respond(self, user_input: str) -> str:
+        """Whole reply to user_input, post-processed and added to the history"""
+        try:
+            cache = self.llm.response_cache
+            vector = self._embed_for_cache(user_input)
+            bot_response = cache.get(user_input, self.system_prompt, self.history, vector) if cache else None
+
+            if bot_response is None:
+                bot_response = self.llm.chat(self.build_messages(user_input))
+                if cache is not None:
+                    cache.put(user_input, bot_response, self.system_prompt, self.history, vector)
+
+            # Post-process response to ensure it's short and add ARKA's personality
+            bot_response = self.make_response_short_and_friendly(bot_response)
+            self.history.add_exchange(user_input, bot_response)
+            return bot_response
+
+        except Exception as e:
+            print(f"Ollama error: {e}")
+            return ARKA_ERROR
+
+    def _embed_for_cache(self, user_input: str) -> Optional[List[float]]:
+        """Embedding for the response cache, only when the cache will be consulted (follow-ups skip it)"""
+        cache = self.llm.response_cache
+        if cache is None or cache.is_context_dependent(user_input, self.history):
+            return None
+        return self.llm.embed(user_input)
+
+    def stream_response(self, user_input: str) -> Iterator[str]:
+        """
+        Stream ARKA's response sentence by sentence while the model is still generating
+
+        Args:
+            user_input: What the user said
+
+        Yields:
+            Post-processed sentences; whatever was taken from the iterator is
+            added to the history once it is closed or exhausted
+        """
+        spoken = []
+        stream = None
+        try:
+            stream = self.llm.chat_stream(self.build_messages(user_input))
+
+            for sentence in self.make_stream_short_and_friendly(segment_stream(stream)):
+                spoken.append(sentence)
+                yield sentence
+
+        except Exception as e:
+            print(f"Ollama error: {e}")
+            if not spoken:
+                yield ARKA_ERROR
+        finally:
+            # Stop the model as soon as we have enough sentences (or were closed early)
+            if stream is not None and hasattr(stream, 'close'):
+                stream.close()
+
+            if spoken:
+                self.history.add_exchange(user_input, ' '.join(spoken))
+
+    def make_response_short_and_friendly(self, text: str) -> str:
+        """Make response short, friendly, humorous and respectful"""
+        sentences = split_sentences(text)
+        return ' '.join(self.make_stream_short_and_friendly(iter(sentences)))
+
+    def make_stream_short_and_friendly(self, sentences: Iterator[str]) -> Iterator[str]:
+        """
+        Make a stream of sentences short, friendly, humorous and respectful
+
+        Works one sentence at a time so each one can be spoken as soon as it is
+        ready. Stops pulling from the stream once the response is long enough.
+        """
+        turn = Turn()
+        for sentence in sentences:
+            friendly = self.next_friendly_sentence(turn, sentence)
+            if friendly:
+                yield friendly
+            if turn.done:
+                break
+
+    def next_friendly_sentence(self, turn: Turn, sentence: str) -> Optional[str]:
+        """
+        Post-process the next sentence of a response
+
+        Args:
+            turn: The response being built; its state carries across sentences
+            sentence: Raw sentence from the model
+
+        Returns:
+            The friendly sentence, or None if it should be dropped. Sets
+            turn.done once the response is long enough.
+        """
+        sentence = sentence.strip()
+        if not sentence or turn.done:
+            return None
+
+        # Keep maximum 2-3 sentences (about 80 words)
+        count = turn.state.get('count', 0) + 1
+        words = turn.state.get('words', 0) + len(sentence.split())
+        if count == 3 and words > 80:
+            turn.done = True
+            return None
+
+        turn.state['count'] = count
+        turn.state['words'] = words
+        if count >= 3:
+            turn.done = True
+
+        return make_sentence_friendly(sentence, turn.state)
+
+    def generate(self, turn: Turn, emit: Callable) -> None:
+        """
+        Generate the reply to a turn and pass it on sentence by sentence (the LLM pipeline stage)
+
+        Emits (turn, raw sentence) pairs and finally (turn, None). Stops early
+        once post-processing marked the turn done or emit() refuses (the
+        pipeline was flushed). Complete replies are stored in the response cache.
+        A scheduler priority in turn.state['priority'] (e.g. PRIORITY_URGENT
+        after a barge-in) is passed on to the LLM client.
+        """
+        print("🧠 ARKA is thinking...")
+        stream = None
+        options = {'priority': turn.state['priority']} if 'priority' in turn.state else {}
+        finished_requests = self.llm.metrics.count
+        cache = self.llm.response_cache
+        vector = None
+        emitted = []
+        cacheable = False
+        try:
+            cached = None
+            if cache is not None:
+                vector = self._embed_for_cache(turn.user_text)
+                cached = cache.get(turn.user_text, self.system_prompt, self.history, vector)
+
+            if cached is not None:
+                print("💾 Answering from the response cache")
+                sentences = iter(split_sentences(cached))
+            elif self.stream_responses:
+                stream = self.llm.chat_stream(self.build_messages(turn.user_text), **options)
+                sentences = segment_stream(stream)
+            else:
+                response = self.llm.chat(self.build_messages(turn.user_text), **options)
+                sentences = iter(split_sentences(response))
+
+            for sentence in sentences:
+                # Stop generating once post-processing has enough, or we were flushed
+                if turn.done or not emit((turn, sentence)):
+                    break
+                emitted.append(sentence)
+            cacheable = cache is not None and cached is None
+
+            if self.llm.metrics.count > finished_requests:
+                print(f"📊 Ollama: {self.llm.metrics.describe()}")
+
+        except concurrent.futures.CancelledError:
+            print("🛑 Generation cancelled")
+        except Exception as e:
+            print(f"Ollama error: {e}")
+            if not turn.state.get('count'):
+                emit((turn, ARKA_ERROR))
+        finally:
+            if stream is not None and hasattr(stream, 'close'):
+                stream.close()
+            # End-of-turn marker; it is rejected if the turn was flushed, so a cut-off reply isn't cached
+            if emit((turn, None)) and cacheable:
+                cache.put(turn.user_text, " ".join(emitted), self.system_prompt, self.history, vector)
+
+    def finish_turn(self, turn: Turn):
+        """Add what was actually spoken of a turn to the history (only once)"""
+        if turn.state.get('recorded') or not turn.spoken:
+            return
+        turn.state['recorded'] = True
+        self.history.add_exchange(turn.user_text, ' '.join(turn.spoken))
+
+    def cancel(self):
+        """Abort the request that is still generating"""
+        self.llm.cancel()
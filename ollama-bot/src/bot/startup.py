@@ -0,0 +1,83 @@
+import concurrent.futures
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class StartupOrchestrator:
+    def __init__(self, max_workers: int = 4):
+        """
+        Runs independent startup steps at the same time and reports how long each took
+
+        Cold start then takes as long as the slowest step instead of the sum of
+        all of them. A step that needs another one can call wait(name); keep
+        max_workers at least the number of steps so waiting can't deadlock.
+
+        Args:
+            max_workers: Number of steps allowed to run at once
+        """
+        self.max_workers = max_workers
+        self.tasks: List[tuple] = []
+        self.futures: Dict[str, concurrent.futures.Future] = {}
+        self.timings: Dict[str, float] = {}
+        self.total_time = 0.0
+
+    def add(self, name: str, func: Callable[[], Any]) -> 'StartupOrchestrator':
+        """Register a startup step (runs when run() is called)"""
+        self.tasks.append((name, func))
+        return self
+
+    def wait(self, name: str, timeout: Optional[float] = None) -> Any:
+        """Block until another step has finished and return its result"""
+        return self.futures[name].result(timeout)
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run every step and wait for all of them
+
+        Returns:
+            Result of each step by name
+
+        Raises:
+            The first step's exception (in the order the steps were added),
+            after the others have finished
+        """
+        start = time.perf_counter()
+
+        # Every future exists before any step starts, so wait() works in any order
+        self.futures = {name: concurrent.futures.Future() for name, _ in self.tasks}
+
+        def timed(name: str, func: Callable[[], Any]):
+            future = self.futures[name]
+            began = time.perf_counter()
+            try:
+                result = func()
+            except BaseException as e:
+                self.timings[name] = time.perf_counter() - began
+                future.set_exception(e)
+            else:
+                self.timings[name] = time.perf_counter() - began
+                future.set_result(result)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers,
+                                                   thread_name_prefix="startup") as pool:
+            for name, func in self.tasks:
+                pool.submit(timed, name, func)
+            concurrent.futures.wait(self.futures.values())
+
+        self.total_time = time.perf_counter() - start
+        print(self.report())
+
+        results = {}
+        for name, _ in self.tasks:
+            results[name] = self.futures[name].result()
+        return results
+
+    def report(self) -> str:
+        """Startup timing report"""
+        sequential = sum(self.timings.values())
+        lines = [f"⏱️  Startup took {self.total_time:.2f}s (one after another: {sequential:.2f}s)"]
+        for name, _ in self.tasks:
+            seconds = self.timings.get(name)
+            status = "failed" if self.futures[name].exception() is not None else "ok"
+            lines.append(f"   {name:<12} {seconds:.2f}s {status}" if seconds is not None else f"   {name:<12} -")
+        return "\n".join(lines)
@@ -0,0 +1,98 @@
+import threading
+from typing import Callable, Dict, List, Optional
+
+from bot.context import ConversationContext
+from bot.events import Flag
+from config import settings
+
+SUMMARY_PROMPT = """You keep a short running summary of a voice conversation between a user and ARKA, a friendly assistant.
+Update the summary with the new part of the conversation. Keep names, facts, preferences and open questions the user mentioned.
+Answer with the summary only, in at most {words} words."""
+
+
+class RollingSummarizer:
+    def __init__(self, context: ConversationContext, chat: Callable[[List[Dict[str, str]]], str],
+                 idle: Optional[Callable[[], bool]] = None, activity: Optional[Flag] = None,
+                 min_messages: int = settings.SUMMARY_MIN_MESSAGES,
+                 max_words: int = settings.SUMMARY_MAX_WORDS):
+        """
+        Folds turns that fell out of the prompt window into a running summary
+
+        Runs in its own thread and only calls the model while the bot is idle,
+        so summarizing never delays a reply. Long conversations keep their
+        memory without sending the whole transcript on every turn.
+
+        Args:
+            context: ConversationContext to summarize
+            chat: Sends a message list to the model and returns the reply
+            idle: Returns True when the model isn't needed for a reply right now
+            activity: Flag notified whenever idle() may have changed; the
+                thread sleeps on it while the bot is busy
+            min_messages: Wait until at least this many messages fell out of the window
+            max_words: Maximum length of the summary
+        """
+        self.context = context
+        self.chat = chat
+        self.idle = idle or (lambda: True)
+        self.activity = activity if activity is not None else Flag()
+        self.min_messages = min_messages
+        self.max_words = max_words
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        context.on_update = self._wake.set
+
+    def start(self):
+        """Start the background thread"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="summarizer", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the background thread"""
+        self.running = False
+        self._wake.set()
+        self.activity.notify()
+
+    def summarize_pending(self) -> bool:
+        """
+        Fold waiting messages into the summary now
+
+        Returns:
+            True if the summary was updated
+        """
+        pending, upto, epoch = self.context.pending_summary()
+        if len(pending) < self.min_messages:
+            return False
+
+        transcript = "\n".join(
+            f"{'User' if message['role'] == 'user' else 'ARKA'}: {message['content']}" for message in pending
+        )
+        previous = self.context.summary or "(nothing yet)"
+        summary = self.chat([
+            {'role': 'system', 'content': SUMMARY_PROMPT.format(words=self.max_words)},
+            {'role': 'user', 'content': f"Summary so far: {previous}\n\nNew part of the conversation:\n{transcript}"}
+        ])
+        if not summary or not summary.strip():
+            return False
+        self.context.set_summary(summary, upto, epoch)
+        return True
+
+    def _run(self):
+        while self.running:
+            self._wake.wait()
+            self._wake.clear()
+
+            # Only use the model when no reply is being generated or spoken
+            self.activity.wait_until(lambda: not self.running or self.idle())
+            if not self.running:
+                break
+
+            try:
+                if self.summarize_pending():
+                    print("📝 Updated conversation summary")
+            except Exception as e:
+                # Cancelled by an interrupt or Ollama hiccup; try again after the next turn
+                print(f"Summary update skipped: {e}")
@@ -0,0 +1,265 @@
+import re
+import unicodedata
+from typing import Iterable, Iterator, List, Optional
+
+# Words that end with a period without ending the sentence
+ABBREVIATIONS = frozenset({
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'mt', 'vs', 'approx', 'dept',
+    'fig', 'vol', 'inc', 'ltd', 'e.g', 'i.e', 'a.m', 'p.m', 'u.s', 'u.k'
+})
+# Abbreviations only when a number follows ("No. 5", "Jan. 3"); otherwise
+# usually the last word of a sentence ("I said no.")
+NUMBERED_ABBREVIATIONS = frozenset({
+    'no', 'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec'
+})
+# Abbreviations only when the sentence carries on in lowercase ("tea, coffee, etc. are fine")
+TRAILING_ABBREVIATIONS = frozenset({'etc', 'est', 'co'})
+# Capitalized words that usually start a new sentence rather than continue a
+# name, so "Plan B. Then we go." splits while "J. K. Rowling" doesn't
+SENTENCE_STARTERS = frozenset({
+    'a', 'after', 'also', 'an', 'and', 'are', 'at', 'but', 'do', 'for', 'he', 'her', 'here', 'his', 'how',
+    'i', 'if', 'in', 'is', 'it', 'its', 'just', 'let', 'my', 'no', 'now', 'ok', 'okay', 'on', 'or', 'our',
+    'please', 'she', 'so', 'sure', 'that', 'the', 'then', 'there', 'they', 'this', 'to', 'we', 'well',
+    'what', 'when', 'where', 'which', 'who', 'why', 'yes', 'you', 'your'
+})
+
+# Terminal punctuation (and closing quotes/brackets) followed by whitespace.
+# Needing the whitespace keeps decimals like 3.5 together and lets a stream
+# wait for the next token before deciding.
+SENTENCE_END = re.compile(r'[.!?]+["\')\]]*(?=\s)')
+LAST_WORD = re.compile(r'(\S+)$')
+NEXT_WORD = re.compile(r'(\S+)\s')
+
+# Characters TTS shouldn't read out: emoji blocks, plus anything that isn't a
+# word character, whitespace or basic punctuation
+EMOJI = re.compile("["
+                   "\U0001F300-\U0001FAFF"  # pictographs, emoticons, transport, supplemental symbols
+                   "\U0001F1E6-\U0001F1FF"  # flags (regional indicators)
+                   "\U00002600-\U000027BF"  # miscellaneous symbols & dingbats
+                   "\U0000FE00-\U0000FE0F"  # variation selectors
+                   "]")
+SPEAKABLE = re.compile(r'[\w\s.,!?\'":-]')
+
+ONES = ['zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine', 'ten',
+        'eleven', 'twelve', 'thirteen', 'fourteen', 'fifteen', 'sixteen', 'seventeen', 'eighteen', 'nineteen']
+TENS = ['', '', 'twenty', 'thirty', 'forty', 'fifty', 'sixty', 'seventy', 'eighty', 'ninety']
+SCALES = [(10 ** 9, 'billion'), (10 ** 6, 'million'), (1000, 'thousand')]
+ORDINAL_ENDINGS = {'one': 'first', 'two': 'second', 'three': 'third', 'five': 'fifth', 'eight': 'eighth',
+                   'nine': 'ninth', 'twelve': 'twelfth'}
+
+CURRENCIES = {'$': 'dollars', '₹': 'rupees', '€': 'euros', '£': 'pounds'}
+SYMBOLS = {'&': ' and ', '+': ' plus ', '=': ' equals ', '@': ' at ', '%': ' percent '}
+
+NUMBER = r'\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?'
+CURRENCY_AMOUNT = re.compile(r'([$₹€£])\s?(' + NUMBER + r')')
+PERCENTAGE = re.compile(r'(' + NUMBER + r')\s?%')
+TEMPERATURE = re.compile(r'(' + NUMBER + r')\s?°\s?([CF])\b')
+TIME = re.compile(r'\b(\d{1,2}):(\d{2})\b')
+ORDINAL = re.compile(r'\b(\d+)(?:st|nd|rd|th)\b', re.IGNORECASE)
+NEGATIVE = re.compile(r'(?<![\w.])-(?=\d)')
+NUMBERS = re.compile(r'\b(?:' + NUMBER + r')\b')
+SYMBOL = re.compile('[' + re.escape(''.join(SYMBOLS)) + ']')
+
+
+class SentenceSegmenter:
+    def __init__(self):
+        """
+        Cuts text into sentences, incrementally as tokens arrive
+
+        A sentence ends at terminal punctuation followed by whitespace, except
+        after abbreviations ("Dr.", "e.g.") and initials, so a streamed reply
+        can be spoken sentence by sentence without cutting "Dr. Rao" in two.
+        Words that are only sometimes abbreviations ("no.", "Jan.", "etc.")
+        and capital letters ("J. K. Rowling" but "Plan B. Then") are decided
+        by the next word, so those wait for it to arrive.
+        """
+        self.buffer = ""
+
+    def feed(self, token: str) -> List[str]:
+        """
+        Add a token to the buffer and return any sentences it completed
+
+        Args:
+            token: Next piece of text, e.g. from the model stream
+
+        Returns:
+            List of complete sentences (may be empty)
+        """
+        self.buffer += token
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self.buffer):
+            abbreviation = self._is_abbreviation(self.buffer[start:match.end()], self.buffer[match.end():].lstrip())
+            if abbreviation is None:
+                break  # Decided by the next word, which hasn't arrived yet
+            if abbreviation:
+                continue
+            sentence = self.buffer[start:match.end()].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = match.end()
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Return whatever is left in the buffer once the stream has ended"""
+        remainder = self.buffer.strip()
+        self.buffer = ""
+        return remainder or None
+
+    @staticmethod
+    def _is_abbreviation(text: str, following: str = "") -> Optional[bool]:
+        """
+        True if text ends with an abbreviation or initial rather than a full stop
+
+        Args:
+            text: Text up to and including the period
+            following: What comes after it, without the leading whitespace
+
+        Returns:
+            None if it depends on the next word and following is still empty
+        """
+        if not text.endswith('.') or text.endswith('..'):
+            return False
+        word = LAST_WORD.search(text[:-1])
+        if word is None:
+            return False
+        original = word.group(1).lstrip('("\'')
+        word = original.lower()
+        if word in NUMBERED_ABBREVIATIONS:
+            return following[:1].isdigit() if following else None
+        if word in TRAILING_ABBREVIATIONS:
+            return following[:1].islower() if following else None
+        if len(original) == 1 and original.isalpha() and original.isupper():
+            # An initial only if a name follows: another initial or a capitalized word
+            name = NEXT_WORD.match(following)
+            if name is None:
+                return None
+            name = name.group(1).rstrip('.,;:!?')
+            return name[:1].isupper() and (len(name) == 1 or name.lower() not in SENTENCE_STARTERS)
+        return word in ABBREVIATIONS
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split a complete text into sentences"""
+    segmenter = SentenceSegmenter()
+    sentences = segmenter.feed(text)
+    remainder = segmenter.flush()
+    if remainder:
+        sentences.append(remainder)
+    return sentences
+
+
+def segment_stream(tokens: Iterable[str]) -> Iterator[str]:
+    """Turn a stream of tokens into complete sentences as soon as each one ends"""
+    segmenter = SentenceSegmenter()
+    for token in tokens:
+        for sentence in segmenter.feed(token):
+            yield sentence
+    remainder = segmenter.flush()
+    if remainder:
+        yield remainder
+
+
+class _SpeechCharTable(dict):
+    """str.translate table that decides each character once and remembers it"""
+
+    def __missing__(self, code: int):
+        char = chr(code)
+        # Combining vowel signs and viramas (Devanagari, Tamil...) are part of the word
+        speakable = SPEAKABLE.match(char) or unicodedata.category(char) in ('Mn', 'Mc')
+        value = code if speakable and not EMOJI.match(char) else ' '
+        self[code] = value
+        return value
+
+
+SPEECH_CHARS = _SpeechCharTable()
+
+
+def remove_emojis(text: str) -> str:
+    """Remove emojis and other unspeakable symbols from text for speech"""
+    return ' '.join(text.translate(SPEECH_CHARS).split())
+
+
+def number_to_words(n: int) -> str:
+    """Spell out a whole number, e.g. 1205 -> 'one thousand two hundred five'"""
+    if n < 0:
+        return 'minus ' + number_to_words(-n)
+    if n < 20:
+        return ONES[n]
+    if n < 100:
+        tens, ones = divmod(n, 10)
+        return TENS[tens] + ('-' + ONES[ones] if ones else '')
+    if n < 1000:
+        hundreds, rest = divmod(n, 100)
+        return ONES[hundreds] + ' hundred' + (' ' + number_to_words(rest) if rest else '')
+    for scale, name in SCALES:
+        if n >= scale:
+            high, rest = divmod(n, scale)
+            return number_to_words(high) + ' ' + name + (' ' + number_to_words(rest) if rest else '')
+    return str(n)
+
+
+def ordinal_to_words(n: int) -> str:
+    """Spell out an ordinal, e.g. 21 -> 'twenty-first'"""
+    words = number_to_words(n)
+    split = max(words.rfind(' '), words.rfind('-')) + 1
+    head, last = words[:split], words[split:]
+    if last in ORDINAL_ENDINGS:
+        return head + ORDINAL_ENDINGS[last]
+    if last.endswith('y'):
+        return head + last[:-1] + 'ieth'
+    return head + last + 'th'
+
+
+def _spell_number(text: str) -> str:
+    """Spell out a number like '1,200', '3.05' or '1999'"""
+    whole, _, fraction = text.replace(',', '').partition('.')
+    n = int(whole)
+    if len(whole) > 12:
+        return ' '.join(ONES[int(digit)] for digit in whole)
+    if not fraction and ',' not in text and len(whole) == 4 and 1100 <= n < 2100 and not 2000 <= n < 2010:
+        # Read as a year: 1999 -> nineteen ninety-nine, 2024 -> twenty twenty-four
+        high, low = divmod(n, 100)
+        if low == 0:
+            return number_to_words(high) + ' hundred'
+        return number_to_words(high) + (' oh ' if low < 10 else ' ') + number_to_words(low)
+    words = number_to_words(n)
+    if fraction:
+        words += ' point ' + ' '.join(ONES[int(digit)] for digit in fraction)
+    return words
+
+
+def _spell_time(match) -> str:
+    hours, minutes = int(match.group(1)), int(match.group(2))
+    if hours > 24 or minutes > 59:
+        return match.group(0)
+    if minutes == 0:
+        return number_to_words(hours) + " o'clock"
+    return number_to_words(hours) + (' oh ' if minutes < 10 else ' ') + number_to_words(minutes)
+
+
+def normalize_numbers(text: str) -> str:
+    """Spell out amounts, percentages, temperatures, times, ordinals and plain numbers"""
+    text = CURRENCY_AMOUNT.sub(lambda m: f"{_spell_number(m.group(2))} {CURRENCIES[m.group(1)]}", text)
+    text = PERCENTAGE.sub(lambda m: f"{_spell_number(m.group(1))} percent", text)
+    text = TEMPERATURE.sub(
+        lambda m: f"{_spell_number(m.group(1))} degrees {'Celsius' if m.group(2) == 'C' else 'Fahrenheit'}", text)
+    text = TIME.sub(_spell_time, text)
+    text = ORDINAL.sub(lambda m: ordinal_to_words(int(m.group(1))), text)
+    text = NEGATIVE.sub('minus ', text)
+    return NUMBERS.sub(lambda m: _spell_number(m.group(0)), text)
+
+
+def normalize_for_speech(text: str) -> str:
+    """
+    Text as it should be handed to TTS
+
+    Numbers and symbols are spelled out ("24°C" -> "twenty-four degrees
+    Celsius", "R&D" -> "R and D"), then emojis and anything else TTS would
+    read out literally are removed.
+    """
+    text = normalize_numbers(text)
+    text = text.replace('°', ' degrees ')
+    text = SYMBOL.sub(lambda m: SYMBOLS[m.group(0)], text)
+    return remove_emojis(text)
@@ -0,0 +1,153 @@
+import hashlib
+import os
+import threading
+from collections import Counter, OrderedDict
+from typing import Iterable, Optional
+
+from bot.audio_output import AudioClip
+from config import settings
+
+
+def synthesize(engine, text: str, path: str) -> AudioClip:
+    """Render text to a WAV file with a pyttsx3 engine and load it"""
+    engine.save_to_file(text, path)
+    engine.runAndWait()
+    return AudioClip.from_wav(path)
+
+
+class TTSAudioCache:
+    def __init__(self, engine, directory: str = settings.TTS_CACHE_DIR,
+                 max_files: int = settings.TTS_CACHE_MAX_FILES, repeats: int = settings.TTS_CACHE_REPEATS,
+                 max_clips: int = 64):
+        """
+        Synthesized speech saved to disk, so fixed phrases are only rendered once
+
+        Clips are keyed by text, voice, rate and volume, so changing the voice
+        never plays stale audio. Fixed phrases (greetings, help, goodbyes) are
+        rendered on first use; other sentences once they have been said
+        `repeats` times. The caller must not use the engine while a clip is
+        being rendered.
+
+        Args:
+            engine: pyttsx3 engine used for rendering
+            directory: Where the WAV files are kept
+            max_files: Files kept on disk; the least recently played are removed
+            repeats: How often a sentence is said before it is rendered
+            max_clips: Clips kept in memory
+        """
+        self.engine = engine
+        self.directory = directory
+        self.max_files = max_files
+        self.repeats = repeats
+        self.max_clips = max_clips
+        self.clips: "OrderedDict[str, AudioClip]" = OrderedDict()
+        self.seen: Counter = Counter()
+        # Some drivers (e.g. macOS) don't write WAV; rendering is then switched off
+        self.supported = True
+        self.hits = 0
+        self.renders = 0
+        self.lock = threading.Lock()
+
+    def voice_key(self) -> str:
+        """Engine settings that change how text sounds"""
+        return "|".join(str(self.engine.getProperty(name)) for name in ('voice', 'rate', 'volume'))
+
+    def key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.voice_key()}|{text}".encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.wav")
+
+    def get(self, text: str) -> Optional[AudioClip]:
+        """Clip for the text from memory or disk, or None"""
+        key = self.key(text)
+        with self.lock:
+            clip = self.clips.get(key)
+            if clip is not None:
+                self.clips.move_to_end(key)
+                self.hits += 1
+                return clip
+
+        path = self._path(key)
+        try:
+            clip = AudioClip.from_wav(path)
+            os.utime(path)  # Recently played files survive pruning
+        except (OSError, EOFError, ValueError):
+            return None
+        with self.lock:
+            self._remember(key, clip)
+            self.hits += 1
+        return clip
+
+    def lookup(self, text: str, fixed: bool = False) -> Optional[AudioClip]:
+        """
+        Cached clip for the text, rendering it now if it's worth keeping
+
+        Args:
+            text: Sentence to speak
+            fixed: A canned phrase that is always worth rendering
+
+        Returns:
+            The clip, or None to let the engine speak the text directly
+        """
+        clip = self.get(text)
+        if clip is not None or not self.supported:
+            return clip
+
+        with self.lock:
+            if len(self.seen) > 4096:
+                self.seen.clear()
+            self.seen[text] += 1
+            worth_rendering = fixed or self.seen[text] >= self.repeats
+        return self.render(text) if worth_rendering else None
+
+    def render(self, text: str) -> Optional[AudioClip]:
+        """Synthesize the text to a WAV file and load it"""
+        key = self.key(text)
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp.wav"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            clip = synthesize(self.engine, text, tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"TTS audio cache disabled, could not render speech to a file: {e}")
+            self.supported = False
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+
+        with self.lock:
+            self._remember(key, clip)
+            self.renders += 1
+        self._prune()
+        return clip
+
+    def prewarm(self, texts: Iterable[str]):
+        """Render fixed phrases that aren't on disk yet"""
+        for text in texts:
+            if not self.supported:
+                return
+            if self.get(text) is None:
+                self.render(text)
+
+    def report(self) -> str:
+        return f"🔊 TTS audio cache: {self.hits} clips played from cache, {self.renders} rendered"
+
+    def _remember(self, key: str, clip: AudioClip):
+        self.clips[key] = clip
+        self.clips.move_to_end(key)
+        while len(self.clips) > self.max_clips:
+            self.clips.popitem(last=False)
+
+    def _prune(self):
+        """Delete the least recently played files beyond max_files"""
+        try:
+            files = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.wav')]
+            if len(files) <= self.max_files:
+                return
+            files.sort(key=os.path.getmtime)
+            for path in files[:len(files) - self.max_files]:
+                os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,423 @@
+import concurrent.futures
+import os
+import queue
+import tempfile
+import threading
+from typing import Callable, Iterable, Optional
+
+from bot.audio_output import AudioClip, AudioSink, PCMPlayer
+from bot.tts_cache import TTSAudioCache, synthesize
+from config import settings
+
+# Put on the job queue to wake the synthesis thread for sentences handed back by playback
+_RETRY = object()
+
+
+class SpeechJob:
+    def __init__(self, text: str, fixed: bool, pause: float, generation: int):
+        """
+        One sentence handed to the TTS worker
+
+        Args:
+            text: Text to speak (already normalized for speech)
+            fixed: A canned phrase, kept in the TTS audio cache
+            pause: Seconds of silence after the sentence
+            generation: Worker generation the job belongs to; stop() moves on
+        """
+        self.text = text
+        self.fixed = fixed
+        self.pause = pause
+        self.generation = generation
+        self.started = threading.Event()
+        self.done = threading.Event()
+        self.completed = False
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the sentence was played or dropped
+
+        Returns:
+            True if it was played to the end
+        """
+        self.done.wait(timeout)
+        return self.completed
+
+
+class SpeechSynthesizer:
+    def __init__(self, engine_factory: Callable, use_cache: bool = settings.TTS_CACHE, prewarm: Iterable[str] = ()):
+        """
+        One TTS engine rendering speech for one or many TTSWorkers
+
+        pyttsx3 hands out a single engine per driver and it isn't thread-safe,
+        so a server can't give every session an engine of its own. This one
+        lives on its own thread; workers queue sentences with render() and play
+        the clips on their own sinks. Canned phrases come from the shared TTS
+        audio cache and are rendered while idle. A worker without a shared
+        synthesizer drives a private one.
+
+        Args:
+            engine_factory: Creates and configures the pyttsx3 engine
+            use_cache: Keep canned and repeated sentences in a TTSAudioCache
+            prewarm: Canned sentences rendered into the cache while idle
+        """
+        self.engine_factory = engine_factory
+        self.use_cache = use_cache
+        self.prewarm = list(prewarm)
+        self.engine = None
+        self.cache: Optional[TTSAudioCache] = None
+        self.supported = True
+        self.error: Optional[BaseException] = None
+        self.ready = threading.Event()
+        self.requests: "queue.Queue" = queue.Queue()
+        self.thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def start(self) -> 'SpeechSynthesizer':
+        """Start the engine thread (once, however many workers call it)"""
+        with self._start_lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._loop, name="tts-synthesizer", daemon=True)
+                self.thread.start()
+        return self
+
+    def wait_ready(self, timeout: Optional[float] = None):
+        """Block until the engine is set up; raises the engine's error if it failed"""
+        self.ready.wait(timeout)
+        if self.error is not None:
+            raise self.error
+
+    def render(self, text: str, fixed: bool = False,
+               cancelled: Optional[Callable[[], bool]] = None) -> concurrent.futures.Future:
+        """
+        Queue a sentence for rendering
+
+        Args:
+            text: Text to speak (already normalized for speech)
+            fixed: A canned phrase, kept in the TTS audio cache
+            cancelled: Checked just before rendering; True skips the sentence
+
+        Returns:
+            Future with the AudioClip (None if the engine can't render to
+            files); cancelled if the sentence was skipped
+        """
+        future = concurrent.futures.Future()
+        self.requests.put((self._render, text, fixed, cancelled, future))
+        return future
+
+    def speak(self, text: str, cancelled: Optional[Callable[[], bool]] = None) -> concurrent.futures.Future:
+        """
+        Queue a sentence for the engine to play itself (for drivers that can't render to files)
+
+        Args:
+            text: Text to speak (already normalized for speech)
+            cancelled: Checked just before speaking; True skips the sentence
+
+        Returns:
+            Future that completes once the sentence was spoken; cancelled if it was skipped
+        """
+        future = concurrent.futures.Future()
+        self.requests.put((self._say, text, False, cancelled, future))
+        return future
+
+    def close(self):
+        """Shut the engine thread down"""
+        self.requests.put(None)
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+
+    def _loop(self):
+        try:
+            self.engine = self.engine_factory()
+            if self.use_cache:
+                self.cache = TTSAudioCache(self.engine)
+        except BaseException as e:
+            self.error = e
+            self.ready.set()
+            return
+        self.ready.set()
+
+        tmp_path = os.path.join(tempfile.gettempdir(), f"arka-tts-{os.getpid()}-{id(self)}.wav")
+        while True:
+            try:
+                item = self.requests.get_nowait()
+            except queue.Empty:
+                if self.prewarm and self.cache is not None and self.cache.supported:
+                    self.cache.prewarm([self.prewarm.pop(0)])
+                    continue
+                item = self.requests.get()
+            if item is None:
+                break
+            action, text, fixed, cancelled, future = item
+            if (cancelled is not None and cancelled()) or not future.set_running_or_notify_cancel():
+                future.cancel()
+                continue
+            future.set_result(action(text, fixed, tmp_path))
+
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    def _render(self, text: str, fixed: bool, tmp_path: str) -> Optional[AudioClip]:
+        if not self.supported:
+            return None
+        try:
+            clip = self.cache.lookup(text, fixed) if self.cache is not None else None
+            return clip if clip is not None else synthesize(self.engine, text, tmp_path)
+        except Exception as e:
+            print(f"TTS can't render to audio buffers: {e}")
+            self.supported = False
+            return None
+
+    def _say(self, text: str, fixed: bool, tmp_path: str):
+        self.engine.say(text)
+        self.engine.runAndWait()
+
+
+class TTSWorker:
+    def __init__(self, engine_factory: Optional[Callable] = None, player: Optional[AudioSink] = None,
+                 use_cache: bool = settings.TTS_CACHE, prewarm: Iterable[str] = (),
+                 synthesizer: Optional[SpeechSynthesizer] = None):
+        """
+        Renders speech on one thread and plays it on another
+
+        Sentences are queued with say(). The synthesis thread has each one
+        rendered to a PCM buffer (from the TTS audio cache when possible) while
+        the playback thread is still playing the previous one, so there is no
+        gap and no caller ever blocks on the engine. stop() drops everything
+        queued and cuts the current sentence within one playback chunk (about
+        20 ms).
+
+        pyttsx3 engines aren't thread-safe, so the engine lives on the thread
+        of a SpeechSynthesizer: a private one created from engine_factory, or
+        one shared by many workers (one per server session), each of which
+        still renders ahead and stops on its own. If the driver can't render to
+        files, a worker with its own engine has sentences spoken directly by
+        it instead (still off the caller's thread, but not stoppable
+        mid-sentence). That only makes sense when the player is the local
+        speaker; for files, buffers and sockets such sentences are dropped.
+
+        Args:
+            engine_factory: Creates and configures the pyttsx3 engine (unless a synthesizer is given)
+            player: AudioSink for the PCM buffers (default: PCMPlayer on the default output)
+            use_cache: Keep canned and repeated sentences in a TTSAudioCache
+            prewarm: Canned sentences rendered into the cache while idle
+            synthesizer: Shared engine to render with
+        """
+        # Direct speech would tie up a shared engine, so only a worker's own engine does it
+        self.owns_engine = synthesizer is None
+        self.synthesizer = synthesizer or SpeechSynthesizer(engine_factory, use_cache, prewarm)
+        self.player = player or PCMPlayer()
+        self.cache: Optional[TTSAudioCache] = None
+        self.file_output = True
+        self.error: Optional[BaseException] = None
+        self.ready = threading.Event()
+
+        self.generation = 0
+        self.jobs: "queue.Queue[Optional[SpeechJob]]" = queue.Queue()
+        self.playback: "queue.Queue" = queue.Queue()
+        # Sentences whose playback failed, spoken directly before anything newer
+        self.retry: "queue.Queue[SpeechJob]" = queue.Queue()
+        self.pending = 0
+        self.lock = threading.Lock()
+        self._wake = threading.Event()
+        self._threads = []
+
+    @property
+    def engine(self):
+        """The pyttsx3 engine (only to be used on the synthesizer's thread)"""
+        return self.synthesizer.engine
+
+    def start(self) -> 'TTSWorker':
+        """Start the synthesis and playback threads (the engine is created in the background)"""
+        if not self._threads:
+            self._threads = [
+                threading.Thread(target=self._synthesis_loop, name="tts-synthesis", daemon=True),
+                threading.Thread(target=self._playback_loop, name="tts-playback", daemon=True)
+            ]
+            for thread in self._threads:
+                thread.start()
+        return self
+
+    def wait_ready(self, timeout: Optional[float] = None):
+        """Block until the engine is set up; raises the engine's error if it failed"""
+        self.ready.wait(timeout)
+        if self.error is not None:
+            raise self.error
+
+    def say(self, text: str, fixed: bool = False, pause: float = 0.0) -> SpeechJob:
+        """Queue a sentence and return at once"""
+        with self.lock:
+            job = SpeechJob(text, fixed, pause, self.generation)
+            self.pending += 1
+        self.jobs.put(job)
+        return job
+
+    def speak(self, text: str, fixed: bool = False, pause: float = 0.0) -> bool:
+        """Queue a sentence and wait until it was played (True) or stopped (False)"""
+        return self.say(text, fixed, pause).wait()
+
+    @property
+    def busy(self) -> bool:
+        """True while any sentence is queued or playing"""
+        return self.pending > 0
+
+    def stop(self):
+        """Silence the worker: drop queued sentences and cut the one playing"""
+        with self.lock:
+            self.generation += 1
+        self._wake.set()
+        self._drain(self.jobs, lambda job: job)
+        self._drain(self.playback, lambda item: item[0], task_done=True)
+        self._drain(self.retry, lambda job: job)
+
+    def close(self):
+        """Stop and shut both threads down"""
+        self.stop()
+        self.jobs.put(None)
+        self.playback.put(None)
+        for thread in self._threads:
+            thread.join(timeout=1)
+        if self.owns_engine:
+            self.synthesizer.close()
+        self.player.close()
+
+    def _drain(self, jobs: queue.Queue, job_of, task_done: bool = False):
+        while True:
+            try:
+                item = jobs.get_nowait()
+            except queue.Empty:
+                return
+            if item is None:
+                jobs.put(None)  # Shutting down; keep the sentinel for the thread
+                return
+            if item is _RETRY:
+                continue
+            self._finish(job_of(item), False)
+            if task_done:
+                jobs.task_done()
+
+    def _finish(self, job: SpeechJob, completed: bool):
+        with self.lock:
+            if job.done.is_set():
+                return
+            job.completed = completed
+            self.pending -= 1
+            job.done.set()
+
+    def _cancelled(self, job: SpeechJob) -> bool:
+        if job.generation != self.generation:
+            self._finish(job, False)
+            return True
+        return False
+
+    def _synthesis_loop(self):
+        try:
+            self.synthesizer.start().wait_ready()
+            self.cache = self.synthesizer.cache
+        except BaseException as e:
+            self.error = e
+            self.ready.set()
+            return
+        self.ready.set()
+
+        while True:
+            self._speak_retried()
+            job = self.jobs.get()
+            if job is None:
+                break
+            if job is _RETRY or self._cancelled(job):
+                continue
+
+            clip = self._render(job)
+            if self._cancelled(job):
+                continue
+            if clip is not None:
+                self.playback.put((job, clip))
+            elif self.player.local and self.owns_engine:
+                self._speak_directly(job)
+            else:
+                self._finish(job, False)
+
+    def _render(self, job: SpeechJob) -> Optional[AudioClip]:
+        """PCM for a sentence, or None if the engine can't render to files"""
+        if not self.file_output:
+            return None
+        try:
+            clip = self.synthesizer.render(job.text, job.fixed, lambda: job.generation != self.generation).result()
+        except concurrent.futures.CancelledError:
+            return None  # stop() was called; the job is dropped as cancelled
+        if clip is None:
+            self.file_output = False
+            if self.player.local and self.owns_engine:
+                print("Speaking directly instead")
+        return clip
+
+    def _speak_directly(self, job: SpeechJob):
+        """Fallback: let the engine play the sentence itself, after anything already queued"""
+        self.playback.join()
+        # Earlier sentences whose playback failed meanwhile go first
+        self._speak_retried()
+        self._say_directly(job)
+
+    def _speak_retried(self):
+        """Speak the sentences handed back by the playback thread, in their original order"""
+        while True:
+            try:
+                job = self.retry.get_nowait()
+            except queue.Empty:
+                return
+            self._say_directly(job)
+
+    def _say_directly(self, job: SpeechJob):
+        if self._cancelled(job):
+            return
+        job.started.set()
+        try:
+            self.synthesizer.speak(job.text, lambda: job.generation != self.generation).result()
+        except concurrent.futures.CancelledError:
+            pass  # stop() was called before the engine got to it
+        self._pause(job)
+        self._finish(job, job.generation == self.generation)
+
+    def _pause(self, job: SpeechJob):
+        if job.pause and job.generation == self.generation:
+            self._wake.clear()
+            if job.generation == self.generation:
+                self._wake.wait(job.pause)
+
+    def _playback_loop(self):
+        while True:
+            item = self.playback.get()
+            try:
+                if item is None:
+                    break
+                job, clip = item
+                if self._cancelled(job):
+                    continue
+                if not self.file_output and self.player.local and self.owns_engine:
+                    self._hand_back(job)  # Speaking directly now; keep the sentences in order
+                    continue
+                job.started.set()
+                try:
+                    played = self.player.play(clip, lambda: job.generation != self.generation)
+                except Exception as e:
+                    if not self.player.local or not self.owns_engine:
+                        print(f"Audio output failed: {e}")
+                        self._finish(job, False)
+                        continue
+                    # No usable output device: hand the sentence back to be spoken directly,
+                    # ahead of the sentences queued after it
+                    print(f"Audio playback failed, speaking directly instead: {e}")
+                    self.file_output = False
+                    self._hand_back(job)
+                    continue
+                if played:
+                    self._pause(job)
+                self._finish(job, played and job.generation == self.generation)
+            finally:
+                self.playback.task_done()
+
+    def _hand_back(self, job: SpeechJob):
+        """Give a sentence back to the synthesis thread, which speaks it before taking the next job"""
+        job.started.clear()
+        self.retry.put(job)
+        self.jobs.put(_RETRY)
@@ -0,0 +1,207 @@
+from typing import List, Optional
+
+import numpy as np
+
+from config import settings
+
+
+class VoiceActivityDetector:
+    def __init__(self, sample_rate: int = 16000,
+                 frame_ms: int = settings.VAD_FRAME_MS,
+                 energy_threshold: float = settings.VAD_ENERGY_THRESHOLD,
+                 zcr_max: float = settings.VAD_ZCR_MAX,
+                 use_spectral_flatness: bool = settings.VAD_SPECTRAL_FLATNESS,
+                 flatness_max: float = settings.VAD_FLATNESS_MAX,
+                 onset_ms: int = settings.VAD_ONSET_MS,
+                 hangover_ms: int = settings.VAD_HANGOVER_MS,
+                 noise_ratio: float = 3.0):
+        """
+        Frame-based voice activity detector for 16-bit mono PCM
+
+        A frame counts as speech when its RMS energy is above the threshold, its
+        zero-crossing rate is low enough to be voiced (loud hiss has a high
+        rate), and optionally its spectrum is peaky rather than flat. Speech
+        starts after onset_ms of speech frames and ends after hangover_ms of
+        non-speech frames, so short pauses between words don't end a turn.
+
+        Args:
+            sample_rate: Sample rate of the audio in Hz
+            frame_ms: Frame length in milliseconds
+            energy_threshold: Minimum RMS energy (same scale as sr.Recognizer.energy_threshold)
+            zcr_max: Highest zero-crossing rate (crossings per sample) for speech
+            use_spectral_flatness: Also reject frames with a flat (noise-like) spectrum
+            flatness_max: Highest spectral flatness (0-1) for speech
+            onset_ms: Speech needed before a segment starts
+            hangover_ms: Silence needed before a segment ends
+            noise_ratio: Energy threshold is at least this many times the noise floor
+        """
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.energy_threshold = energy_threshold
+        self.zcr_max = zcr_max
+        self.use_spectral_flatness = use_spectral_flatness
+        self.flatness_max = flatness_max
+        self.onset_frames = max(1, onset_ms // frame_ms)
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.noise_ratio = noise_ratio
+
+        # Running estimate of background noise energy, learned from non-speech frames
+        self.noise_floor: Optional[float] = None
+
+        self.reset()
+
+    def reset(self):
+        """Forget the current segment state (keeps the noise floor)"""
+        self.in_speech = False
+        self._speech_run = 0
+        self._silence_run = 0
+        self._remainder = np.zeros(0, dtype=np.int16)
+
+    @property
+    def threshold(self) -> float:
+        """Effective energy threshold, raised above the noise floor when it is known"""
+        if self.noise_floor is None:
+            return self.energy_threshold
+        return max(self.energy_threshold, self.noise_floor * self.noise_ratio)
+
+    def frames(self, pcm) -> np.ndarray:
+        """
+        Split PCM into whole frames
+
+        Args:
+            pcm: bytes or int16 array
+
+        Returns:
+            Array of shape (n_frames, frame_length); leftover samples are dropped
+        """
+        samples = np.frombuffer(pcm, dtype=np.int16) if isinstance(pcm, (bytes, bytearray)) else pcm
+        n_frames = len(samples) // self.frame_length
+        return samples[:n_frames * self.frame_length].reshape(n_frames, self.frame_length)
+
+    def frame_features(self, frames: np.ndarray):
+        """RMS energy, zero-crossing rate and (optionally) spectral flatness per frame"""
+        data = frames.astype(np.float32)
+        energy = np.sqrt(np.mean(data * data, axis=1))
+        signs = np.signbit(data)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / float(self.frame_length)
+
+        flatness = None
+        if self.use_spectral_flatness:
+            power = np.abs(np.fft.rfft(data, axis=1)) ** 2 + 1e-10
+            flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+        return energy, zcr, flatness
+
+    def classify(self, pcm) -> np.ndarray:
+        """
+        Raw per-frame speech decision (no onset/hangover smoothing)
+
+        Args:
+            pcm: bytes or int16 array
+
+        Returns:
+            Boolean array, one entry per frame
+        """
+        frames = self.frames(pcm)
+        if len(frames) == 0:
+            return np.zeros(0, dtype=bool)
+
+        energy, zcr, flatness = self.frame_features(frames)
+        threshold = self.threshold
+        # Very loud frames count as speech even with a high crossing rate (fricatives)
+        speech = (energy > threshold) & ((zcr < self.zcr_max) | (energy > threshold * 2))
+        if flatness is not None:
+            speech &= flatness < self.flatness_max
+
+        self._update_noise_floor(energy[~speech])
+        return speech
+
+    def process(self, chunk) -> List[bool]:
+        """
+        Feed the next chunk of a live stream
+
+        Samples that don't fill a whole frame are kept for the next call.
+
+        Args:
+            chunk: bytes or int16 array
+
+        Returns:
+            Smoothed speech state after each complete frame
+        """
+        samples = np.frombuffer(chunk, dtype=np.int16) if isinstance(chunk, (bytes, bytearray)) else chunk
+        if len(self._remainder):
+            samples = np.concatenate((self._remainder, samples))
+        usable = len(samples) - len(samples) % self.frame_length
+        self._remainder = samples[usable:].copy()
+
+        states = []
+        for is_speech in self.classify(samples[:usable]):
+            if is_speech:
+                self._speech_run += 1
+                self._silence_run = 0
+                if not self.in_speech and self._speech_run >= self.onset_frames:
+                    self.in_speech = True
+            else:
+                self._silence_run += 1
+                self._speech_run = 0
+                if self.in_speech and self._silence_run >= self.hangover_frames:
+                    self.in_speech = False
+            states.append(self.in_speech)
+        return states
+
+    def contains_speech(self, pcm, min_speech_ms: int = 200) -> bool:
+        """True if the audio holds at least min_speech_ms of speech frames"""
+        return int(np.count_nonzero(self.classify(pcm))) * self.frame_ms >= min_speech_ms
+
+    def trim(self, pcm: bytes, padding_ms: int = 100) -> bytes:
+        """
+        Cut leading and trailing silence, keeping a little padding around the speech
+
+        Args:
+            pcm: 16-bit mono PCM
+            padding_ms: Silence to keep on each side
+
+        Returns:
+            Trimmed PCM, or b"" if there is no speech at all
+        """
+        speech = np.flatnonzero(self.classify(pcm))
+        if len(speech) == 0:
+            return b""
+        padding = padding_ms // self.frame_ms
+        start = max(0, speech[0] - padding) * self.frame_length
+        end = (speech[-1] + 1 + padding) * self.frame_length
+        return pcm[start * 2:end * 2]
+
+    def calibrate(self, pcm):
+        """
+        Learn the noise floor from audio with no speech in it (replaces adjust_for_ambient_noise)
+
+        Args:
+            pcm: bytes or int16 array of background noise
+        """
+        frames = self.frames(pcm)
+        if len(frames):
+            energy, _, _ = self.frame_features(frames)
+            self.noise_floor = float(np.median(energy))
+
+    def clone(self) -> 'VoiceActivityDetector':
+        """A detector with the same settings and noise floor, for another listener thread"""
+        other = VoiceActivityDetector(
+            sample_rate=self.sample_rate, frame_ms=self.frame_ms,
+            energy_threshold=self.energy_threshold, zcr_max=self.zcr_max,
+            use_spectral_flatness=self.use_spectral_flatness, flatness_max=self.flatness_max,
+            onset_ms=self.onset_frames * self.frame_ms, hangover_ms=self.hangover_frames * self.frame_ms,
+            noise_ratio=self.noise_ratio
+        )
+        other.noise_floor = self.noise_floor
+        return other
+
+    def _update_noise_floor(self, noise_energy: np.ndarray, alpha: float = 0.05):
+        """Track the background noise energy with an exponential moving average"""
+        if len(noise_energy) == 0:
+            return
+        level = float(np.median(noise_energy))
+        if self.noise_floor is None:
+            self.noise_floor = level
+        else:
+            self.noise_floor += alpha * (level - self.noise_floor)
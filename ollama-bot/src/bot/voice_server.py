@@ -0,0 +1,460 @@
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import threading
+import time
+from typing import Callable, Dict, Optional, Union
+
+import speech_recognition as sr
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+from bot.asr import create_asr_backend
+from bot.audio_capture import PCMSource
+from bot.audio_output import AudioClip, AudioSink
+from bot.ollama_client import AsyncOllamaClient, OllamaClient
+from bot.pipeline import Pipeline, Turn
+from bot.router import LLMRouter
+from bot.scheduler import PRIORITY_URGENT, GenerationScheduler
+from bot.session import ARKA_GREETING, CANNED_PHRASES, SessionEngine
+from bot.text_normalization import normalize_for_speech, split_sentences
+from bot.tts_worker import SpeechSynthesizer, TTSWorker
+from bot.vad import VoiceActivityDetector
+from config import settings
+
+# Messages are JSON objects with a 'type'; audio travels as binary frames of
+# 16-bit mono PCM. Client -> server: audio at the rate announced in 'ready',
+# {'type': 'text', 'text'} and {'type': 'end'} (no more audio). Server ->
+# client: 'ready', 'busy', 'transcript', 'reply', 'audio' (format of the PCM
+# that follows), 'stop' (drop queued playback, the user interrupted),
+# 'turn_done' and 'bye'.
+
+
+def default_tts_engine():
+    """pyttsx3 with ARKA's speaking rate (created on the synthesizer's thread)"""
+    import pyttsx3
+    engine = pyttsx3.init()
+    engine.setProperty('rate', 155)
+    engine.setProperty('volume', 0.9)
+    return engine
+
+
+class WebSocketSink(AudioSink):
+    def __init__(self, send: Callable[[Union[dict, bytes]], None], chunk_ms: int = 20):
+        """
+        Streams ARKA's voice to a client in real time
+
+        The format is announced with an 'audio' message before the first
+        chunk and whenever it changes.
+
+        Args:
+            send: Sends a message or a binary frame to the client
+            chunk_ms: Milliseconds of audio per frame
+        """
+        super().__init__(chunk_ms, realtime=True)
+        self.send = send
+        self.format = None
+
+    def _write(self, clip: AudioClip, pcm: bytes):
+        key = (clip.sample_rate, clip.channels, clip.sample_width)
+        if key != self.format:
+            self.format = key
+            self.send({'type': 'audio', 'sample_rate': clip.sample_rate,
+                       'channels': clip.channels, 'sample_width': clip.sample_width})
+        self.send(pcm)
+
+
+class SharedModels:
+    def __init__(self, llm_factory: Callable, asr, synthesizer: SpeechSynthesizer,
+                 asr_parallel: int = settings.SERVER_ASR_PARALLEL, scheduler: Optional[GenerationScheduler] = None,
+                 router: Optional[LLMRouter] = None):
+        """
+        The model instances every session uses
+
+        Models are loaded once per server. Sessions get their own LLM client
+        object (its own history-free facade, so cancelling one session's
+        request leaves the others alone) on a shared connection pool, and take
+        turns on the speech recognizer and the TTS engine.
+
+        Args:
+            llm_factory: Returns the LLM client for a new session
+            asr: Loaded ASRBackend
+            synthesizer: SpeechSynthesizer shared by every session's TTS worker
+            asr_parallel: Utterances transcribed at the same time
+            scheduler: The sessions' shared Ollama request scheduler (for reports)
+            router: The Ollama servers they use (for reports)
+        """
+        self.llm_factory = llm_factory
+        self.asr = asr
+        self.synthesizer = synthesizer
+        self.asr_slots = threading.BoundedSemaphore(asr_parallel)
+        self.scheduler = scheduler
+        self.router = router
+
+    @classmethod
+    def load(cls, model_name: str = "gemma3:latest", asr_engine: Optional[str] = None,
+             engine_factory: Callable = default_tts_engine) -> 'SharedModels':
+        """Ollama (one connection pool), the configured ASR engine and one pyttsx3 engine"""
+        pool = AsyncOllamaClient(model_name)
+
+        def llm_factory():
+            return OllamaClient(model_name, initialize=False, summarize=False, async_client=pool)
+
+        llm = llm_factory()
+        llm.ensure_model(use_cache=settings.FAST_STARTUP)
+        llm.preload()
+        prewarm = [speech for phrase in CANNED_PHRASES
+                   for speech in map(normalize_for_speech, split_sentences(phrase)) if speech]
+        synthesizer = SpeechSynthesizer(engine_factory, prewarm=prewarm).start()
+        synthesizer.wait_ready()
+        return cls(llm_factory, create_asr_backend(asr_engine), synthesizer, scheduler=pool.scheduler, router=pool.router)
+
+    def transcribe(self, audio: sr.AudioData) -> Optional[str]:
+        """Speech to text, waiting for a free recognizer slot"""
+        with self.asr_slots:
+            return self.asr.transcribe(audio)
+
+
+class ServerSession:
+    def __init__(self, session_id: int, models: SharedModels, send: Callable[[Union[dict, bytes]], None],
+                 hangup: Callable[[], None], sample_rate: int = settings.SERVER_SAMPLE_RATE):
+        """
+        One client's conversation: its own audio, VAD, history and TTS playback
+
+        Nothing here is shared with other sessions except the models. Audio
+        from the client goes into a PCMSource; a listener thread cuts it into
+        utterances and stops ARKA at the onset of speech, and the usual
+        ASR -> LLM -> post-process -> TTS pipeline answers each one.
+
+        Args:
+            session_id: Number used in logs and the 'ready' message
+            models: Shared models
+            send: Sends a message or binary frame to the client (thread-safe)
+            hangup: Closes the connection
+            sample_rate: Rate the client sends audio at
+        """
+        self.id = session_id
+        self.models = models
+        self.send = send
+        self.hangup = hangup
+        self.source = PCMSource(sample_rate)
+        # Created now so no audio that arrives before the thread starts is missed
+        self.reader = self.source.reader()
+        self.vad = VoiceActivityDetector(sample_rate=sample_rate)
+        self.session = SessionEngine(models.llm_factory())
+        self.tts = TTSWorker(player=WebSocketSink(send), synthesizer=models.synthesizer)
+        self.pipeline = self._build_pipeline()
+        self.current_turn: Optional[Turn] = None
+        self.interrupted = False
+        self.closing = False
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start listening and greet the client"""
+        self.tts.start()
+        self.pipeline.start()
+        self.source.start()
+        self.thread = threading.Thread(target=self._listen_loop, name=f"session-{self.id}", daemon=True)
+        self.thread.start()
+        self._speak_fixed(ARKA_GREETING)
+
+    def push_audio(self, pcm: bytes):
+        self.source.push(pcm)
+
+    def push_text(self, text: str):
+        """A typed message: answered like a transcript"""
+        turn = self._handle_transcript(text)
+        if turn is not None:
+            self.pipeline.put(turn, stage='llm')
+
+    def end_of_audio(self):
+        """The client won't send more audio; the utterance in progress is still answered"""
+        self.source.end()
+
+    def close(self):
+        """Stop everything this session runs"""
+        self.closing = True
+        self.source.stop()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+        self.pipeline.stop()
+        self.session.cancel()
+        self.tts.close()
+
+    def _build_pipeline(self) -> Pipeline:
+        pipeline = Pipeline(maxsize=4)
+        pipeline.add_stage('asr', self._asr_stage)
+        pipeline.add_stage('llm', self.session.generate)
+        pipeline.add_stage('postprocess', self._postprocess_stage)
+        pipeline.add_stage('tts', self._tts_stage, maxsize=8)
+        return pipeline
+
+    def _listen_loop(self):
+        while not self.closing:
+            try:
+                audio = self.reader.listen(self.vad, timeout=None, phrase_time_limit=10, on_speech=self._barge_in)
+            except sr.WaitTimeoutError:
+                break  # The client stopped sending audio
+            self.pipeline.put(audio)
+
+    def _barge_in(self):
+        """Speech onset: if ARKA is answering, drop the answer right away"""
+        turn = self.current_turn
+        if turn is None and not self.tts.busy:
+            return
+        if turn is not None:
+            turn.state['interrupted'] = True
+        # The user is already talking: their next reply jumps the Ollama queue
+        self.interrupted = True
+        self.pipeline.flush()
+        self.session.cancel()
+        self.tts.stop()
+        self.send({'type': 'stop'})
+        if turn is not None:
+            self._finish_turn(turn)
+
+    def _asr_stage(self, audio, emit):
+        speech = self.vad.trim(audio.frame_data)
+        if not speech:
+            return
+        try:
+            text = self.models.transcribe(sr.AudioData(speech, audio.sample_rate, audio.sample_width))
+        except (sr.UnknownValueError, sr.RequestError) as e:
+            print(f"[session {self.id}] Speech recognition failed: {e}")
+            return
+        turn = self._handle_transcript(text)
+        if turn is not None:
+            emit(turn)
+
+    def _handle_transcript(self, text: Optional[str]) -> Optional[Turn]:
+        """Report the transcript and handle commands; returns the turn to answer, if any"""
+        text = (text or "").strip()
+        if not text:
+            return None
+        self.send({'type': 'transcript', 'text': text})
+
+        command = self.session.handle_command(text)
+        if command is not None:
+            reply, end = command
+            self._speak_fixed(reply, hangup=end)
+            return None
+
+        turn = Turn(text)
+        if self.interrupted:
+            turn.state['priority'] = PRIORITY_URGENT
+            self.interrupted = False
+        self.current_turn = turn
+        return turn
+
+    def _speak_fixed(self, text: str, hangup: bool = False):
+        """Queue a canned phrase for the TTS stage (not part of the conversation history)"""
+        turn = Turn()
+        turn.state['fixed'] = True
+        turn.state['hangup'] = hangup
+        for sentence in split_sentences(text):
+            self.pipeline.put((turn, sentence), stage='tts')
+        self.pipeline.put((turn, None), stage='tts')
+
+    def _postprocess_stage(self, item, emit):
+        turn, sentence = item
+        if sentence is None:
+            emit(item)
+            return
+        friendly = self.session.next_friendly_sentence(turn, sentence)
+        if friendly:
+            emit((turn, friendly))
+
+    def _tts_stage(self, item, emit):
+        """Queue sentences with the TTS worker as they come; at the end of a turn wait for them to play"""
+        turn, sentence = item
+        if sentence is None:
+            self._finish_turn(turn)
+            self.send({'type': 'turn_done'})
+            if turn.state.get('hangup'):
+                self.send({'type': 'bye'})
+                self.hangup()
+            return
+
+        if turn.state.get('interrupted'):
+            return
+        self.send({'type': 'reply', 'text': sentence})
+        speech = normalize_for_speech(sentence)
+        if speech:
+            # The worker renders the next sentence while this one plays
+            job = self.tts.say(speech, fixed=turn.state.get('fixed', False), pause=0.3)
+            turn.state.setdefault('jobs', []).append((sentence, job))
+
+    def _finish_turn(self, turn: Turn):
+        """Wait until the turn's sentences were played or dropped, and keep what was heard"""
+        for sentence, job in turn.state.pop('jobs', []):
+            job.wait(timeout=30)
+            if job.started.is_set():
+                turn.spoken.append(sentence)
+        if turn.user_text is not None:
+            self.session.finish_turn(turn)
+        if self.current_turn is turn:
+            self.current_turn = None
+
+
+class VoiceServer:
+    def __init__(self, models: SharedModels, host: str = settings.SERVER_HOST, port: int = settings.SERVER_PORT,
+                 max_sessions: int = settings.SERVER_MAX_SESSIONS,
+                 admission_timeout: float = settings.SERVER_ADMISSION_TIMEOUT,
+                 sample_rate: int = settings.SERVER_SAMPLE_RATE):
+        """
+        WebSocket server running one ServerSession per connected client
+
+        Admission control keeps the machine from being overcommitted: at most
+        max_sessions are served at once, a new client waits up to
+        admission_timeout seconds for a free slot and is otherwise told the
+        server is busy (close code 1013, try again later).
+
+        Args:
+            models: Models shared by every session
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one; see .port once started)
+            max_sessions: Sessions served at once
+            admission_timeout: Seconds a new client may wait for a slot
+            sample_rate: Rate clients must send audio at
+        """
+        self.models = models
+        self.host = host
+        self.port = port
+        self.max_sessions = max_sessions
+        self.admission_timeout = admission_timeout
+        self.sample_rate = sample_rate
+        self.sessions: Dict[int, ServerSession] = {}
+        self.admitted = 0
+        self.rejected = 0
+        self.peak = 0
+        self._ids = itertools.count(1)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._server = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+
+    def run(self):
+        """Serve until interrupted"""
+        async def main():
+            await self._open()
+            print(f"🌐 ARKA voice server listening on ws://{self.host}:{self.port} "
+                  f"(up to {self.max_sessions} sessions)")
+            await self._server.serve_forever()
+
+        try:
+            asyncio.run(main())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            print(self.report())
+
+    def start(self) -> 'VoiceServer':
+        """Serve on a background thread; returns once the port is open"""
+        self.loop = asyncio.new_event_loop()
+        opened = concurrent.futures.Future()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            try:
+                self.loop.run_until_complete(self._open())
+            except BaseException as e:
+                opened.set_exception(e)
+                return
+            opened.set_result(None)
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, name="voice-server", daemon=True)
+        self.thread.start()
+        opened.result(timeout=10)
+        return self
+
+    def stop(self):
+        """Disconnect every client and stop a server started with start()"""
+        if self.loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._close(), self.loop).result(timeout=15)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        self.loop.close()
+        self.loop = None
+
+    def report(self) -> str:
+        report = (f"🌐 Voice server: {self.admitted} sessions served (peak {self.peak} at once), "
+                  f"{self.rejected} turned away")
+        if self.models.scheduler is not None:
+            report += "\n" + self.models.scheduler.metrics.report()
+        if self.models.router is not None:
+            report += "\n" + self.models.router.report()
+        return report
+
+    async def _open(self):
+        self._slots = asyncio.Semaphore(self.max_sessions)
+        # PCM doesn't compress; skip permessage-deflate to save CPU per frame
+        self._server = await serve(self._handle, self.host, self.port, compression=None, max_size=2 ** 20)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def _close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _admit(self) -> bool:
+        """Take a session slot, waiting up to admission_timeout for one"""
+        if self.admission_timeout <= 0:
+            if self._slots.locked():
+                return False
+            await self._slots.acquire()
+            return True
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.admission_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _handle(self, websocket):
+        if not await self._admit():
+            self.rejected += 1
+            await websocket.send(json.dumps({'type': 'busy'}))
+            await websocket.close(1013, "server busy")
+            return
+
+        loop = asyncio.get_running_loop()
+
+        def send(message: Union[dict, bytes]):
+            data = message if isinstance(message, bytes) else json.dumps(message)
+            try:
+                asyncio.run_coroutine_threadsafe(websocket.send(data), loop).result(timeout=10)
+            except (ConnectionClosed, concurrent.futures.TimeoutError, RuntimeError):
+                pass  # The client is gone; the session is being closed
+
+        def hangup():
+            asyncio.run_coroutine_threadsafe(websocket.close(), loop)
+
+        session_id = next(self._ids)
+        session = ServerSession(session_id, self.models, send, hangup, self.sample_rate)
+        self.sessions[session_id] = session
+        self.admitted += 1
+        self.peak = max(self.peak, len(self.sessions))
+        started = time.perf_counter()
+        try:
+            await websocket.send(json.dumps({'type': 'ready', 'session': session_id, 'sample_rate': self.sample_rate}))
+            await asyncio.to_thread(session.start)
+            async for message in websocket:
+                if isinstance(message, bytes):
+                    session.push_audio(message)
+                    continue
+                try:
+                    data = json.loads(message)
+                except ValueError:
+                    continue
+                if data.get('type') == 'text':
+                    await asyncio.to_thread(session.push_text, str(data.get('text', '')))
+                elif data.get('type') == 'end':
+                    session.end_of_audio()
+        except ConnectionClosed:
+            pass
+        finally:
+            del self.sessions[session_id]
+            await asyncio.to_thread(session.close)
+            self._slots.release()
+            print(f"🌐 Session {session_id} ended after {time.perf_counter() - started:.1f}s")
@@ -1,5 +1,7 @@
 # filepath: /ollama-bot/ollama-bot/src/config/settings.py
 
+import os
+
 MODEL_NAME = "Gemma3"
 API_KEY = "your_api_key_here"
 MAX_TOKENS = 150
@@ -7,4 +9,91 @@ TEMPERATURE = 0.7
 TOP_P = 0.9
 FREQUENCY_PENALTY = 0.0
 PRESENCE_PENALTY = 0.0
-LOGGING_LEVEL = "INFO"
\ No newline at end of file
+LOGGING_LEVEL = "INFO"
+
+# Speech recognition engine: "vosk" or "whisper" (offline, local CPU),
+# "sphinx" (offline, low accuracy) or "google" (needs internet)
+ASR_ENGINE = os.getenv("ASR_ENGINE", "vosk")
+ASR_LANGUAGE = os.getenv("ASR_LANGUAGE", "en-IN")
+VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH", "models/vosk-model-small-en-in-0.4")
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "base.en")
+
+# Voice activity detection (frame-based, used for turns and barge-in)
+VAD_FRAME_MS = int(os.getenv("VAD_FRAME_MS", "20"))
+VAD_ENERGY_THRESHOLD = float(os.getenv("VAD_ENERGY_THRESHOLD", "300"))
+VAD_ZCR_MAX = float(os.getenv("VAD_ZCR_MAX", "0.35"))
+VAD_SPECTRAL_FLATNESS = os.getenv("VAD_SPECTRAL_FLATNESS", "false").lower() == "true"
+VAD_FLATNESS_MAX = float(os.getenv("VAD_FLATNESS_MAX", "0.45"))
+VAD_ONSET_MS = int(os.getenv("VAD_ONSET_MS", "100"))
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "300"))
+
+# Barge-in: stop speaking as soon as the user talks over ARKA (echo-cancelled VAD)
+BARGE_IN_AEC = os.getenv("BARGE_IN_AEC", "true").lower() == "true"
+BARGE_IN_TRIGGER_MS = int(os.getenv("BARGE_IN_TRIGGER_MS", "90"))
+ECHO_FILTER_MS = float(os.getenv("ECHO_FILTER_MS", "16"))
+ECHO_MAX_DELAY_MS = float(os.getenv("ECHO_MAX_DELAY_MS", "250"))
+
+# Ollama server connection (pooled, keep-alive HTTP)
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+OLLAMA_POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "4"))
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "120"))
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "5m")
+
+# Request scheduler: at most OLLAMA_NUM_PARALLEL generations are sent at once
+# (match the server's OLLAMA_NUM_PARALLEL; 0 sends everything straight away),
+# the rest queue by priority and take turns per session; identical prompts
+# in flight at the same time share one generation
+OLLAMA_NUM_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+OLLAMA_COALESCE = os.getenv("OLLAMA_COALESCE", "true").lower() == "true"
+
+# Several Ollama servers: comma-separated URLs, each optionally followed by
+# =model and =num_parallel (e.g. "http://box1:11434=gemma3:latest=4,http://box2:11434").
+# Empty uses OLLAMA_HOST only. Requests go to the least-loaded healthy server
+# and fail over to another one if a server doesn't answer.
+OLLAMA_BACKENDS = os.getenv("OLLAMA_BACKENDS", "")
+OLLAMA_FAILOVER_ATTEMPTS = int(os.getenv("OLLAMA_FAILOVER_ATTEMPTS", "3"))
+OLLAMA_BACKEND_COOLDOWN = float(os.getenv("OLLAMA_BACKEND_COOLDOWN", "5"))
+
+# Fast startup: trust a recent on-disk model check, load the model in the
+# background and let the first reply double as the audio test
+FAST_STARTUP = os.getenv("FAST_STARTUP", "true").lower() == "true"
+HEALTH_CACHE_PATH = os.getenv("HEALTH_CACHE_PATH", os.path.expanduser("~/.cache/arka/ollama_health.json"))
+HEALTH_CACHE_TTL = float(os.getenv("HEALTH_CACHE_TTL", "3600"))
+
+# Noise calibration saved per input device, re-measured after CALIBRATION_MAX_AGE seconds
+CALIBRATION_PATH = os.getenv("CALIBRATION_PATH", os.path.expanduser("~/.cache/arka/calibration.json"))
+CALIBRATION_MAX_AGE = float(os.getenv("CALIBRATION_MAX_AGE", str(7 * 24 * 3600)))
+
+# Conversation context: prompt size limit (approximate tokens) and messages kept in memory
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1536"))
+CONTEXT_MAX_MESSAGES = int(os.getenv("CONTEXT_MAX_MESSAGES", "200"))
+# When history outgrows the budget, keep this share of it and append again from there
+CONTEXT_REANCHOR_FILL = float(os.getenv("CONTEXT_REANCHOR_FILL", "0.5"))
+
+# Rolling summary of turns that no longer fit the context budget (made while idle)
+SUMMARIZE_HISTORY = os.getenv("SUMMARIZE_HISTORY", "true").lower() == "true"
+SUMMARY_MIN_MESSAGES = int(os.getenv("SUMMARY_MIN_MESSAGES", "4"))
+SUMMARY_MAX_WORDS = int(os.getenv("SUMMARY_MAX_WORDS", "120"))
+
+# Cache of replies to context-free queries ("help", greetings). Set an Ollama
+# embedding model (e.g. nomic-embed-text) to also match similar wording.
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "true").lower() == "true"
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_EMBED_MODEL = os.getenv("RESPONSE_CACHE_EMBED_MODEL", "")
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.92"))
+
+# Synthesized speech for canned phrases and often repeated sentences, saved as WAV
+TTS_CACHE = os.getenv("TTS_CACHE", "true").lower() == "true"
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.expanduser("~/.cache/arka/tts"))
+TTS_CACHE_MAX_FILES = int(os.getenv("TTS_CACHE_MAX_FILES", "500"))
+TTS_CACHE_REPEATS = int(os.getenv("TTS_CACHE_REPEATS", "2"))
+
+# WebSocket voice server: sessions served at once (more wait up to
+# SERVER_ADMISSION_TIMEOUT seconds, then are turned away) and shared model limits
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8765"))
+SERVER_MAX_SESSIONS = int(os.getenv("SERVER_MAX_SESSIONS", "8"))
+SERVER_ADMISSION_TIMEOUT = float(os.getenv("SERVER_ADMISSION_TIMEOUT", "2"))
+SERVER_SAMPLE_RATE = int(os.getenv("SERVER_SAMPLE_RATE", "16000"))
+SERVER_ASR_PARALLEL = int(os.getenv("SERVER_ASR_PARALLEL", "2"))
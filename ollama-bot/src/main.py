@@ -2,6 +2,20 @@
 
 import os
 import sys
+
+def load_env_variables():
+    """Load environment variables from .env file"""
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        print("python-dotenv not installed. Skipping .env file loading.")
+    except Exception as e:
+        print(f"Error loading environment variables: {e}")
+
+# Load .env before the bot modules read their settings
+load_env_variables()
+
 from bot.ollama_client import OllamaClient
 from bot.conversation import Conversation
 
@@ -13,9 +27,6 @@ def main():
     print("Available modes: text and voice interaction\n")
     
     try:
-        # Load environment variables
-        load_env_variables()
-
         # Initialize the Ollama client with the Gemma3 model
         print("Initializing ARKA...")
         ollama_client = OllamaClient(model_name="gemma3:latest")
@@ -30,15 +41,5 @@ def main():
         print(f"An error occurred: {e}")
         sys.exit(1)
 
-def load_env_variables():
-    """Load environment variables from .env file"""
-    try:
-        from dotenv import load_dotenv
-        load_dotenv()
-    except ImportError:
-        print("python-dotenv not installed. Skipping .env file loading.")
-    except Exception as e:
-        print(f"Error loading environment variables: {e}")
-
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,28 @@
+import sys
+
+
+def main():
+    """Run ARKA as a WebSocket voice server for many clients"""
+    print("=== ARKA - Voice Server ===")
+    print("Make sure Ollama is installed and running!\n")
+
+    # Load .env before the bot modules read their settings
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        print("python-dotenv not installed. Skipping .env file loading.")
+
+    from bot.voice_server import SharedModels, VoiceServer
+
+    try:
+        print("Loading shared models...")
+        models = SharedModels.load(model_name="gemma3:latest")
+        VoiceServer(models).run()
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
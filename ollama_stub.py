@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Ollama's HTTP API, for tests and load experiments
+
+Speaks enough of the API for ARKA's clients (/api/tags, /api/chat streaming
+and not, /api/embeddings, /api/pull) and behaves like a real server under
+load: it generates at most num_parallel replies at once and queues the
+rest, at a fixed time per token. It records every request and the peak
+number generating at once.
+
+    python ollama_stub.py --port 11434 --num-parallel 2
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+
+def echo_reply(messages: List[Dict[str, str]]) -> str:
+    """Default reply: repeats the last user message"""
+    user = [m['content'] for m in messages if m['role'] == 'user']
+    return f"You said {user[-1] if user else 'nothing'}. Nice one, yaar."
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, data: dict, status: int = 200):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        stub = self.server.stub
+        if self.path == '/api/tags':
+            self._json({'models': [{'name': name, 'model': name} for name in stub.models]})
+        else:
+            self._json({'error': 'not found'}, 404)
+
+    def do_POST(self):
+        stub = self.server.stub
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+        if stub.failing:
+            self._json({'error': 'stub is failing on purpose'}, 500)
+            return
+        if self.path == '/api/chat':
+            self._chat(stub, body)
+        elif self.path == '/api/embeddings':
+            text = body.get('prompt', '')
+            self._json({'embedding': [float(len(text)), float(sum(map(ord, text)) % 97), 1.0]})
+        elif self.path == '/api/pull':
+            self._json({'status': 'success'})
+        else:
+            self._json({'error': 'not found'}, 404)
+
+    def _chat(self, stub: 'StubOllama', body: dict):
+        messages = body.get('messages') or []
+        if body.get('model') not in stub.models:
+            self._json({'error': f"model '{body.get('model')}' not found"}, 404)
+            return
+        if not messages:  # Preload
+            self._json({'model': body['model'], 'message': {'role': 'assistant', 'content': ''}, 'done': True})
+            return
+
+        stub.received(messages)
+        tokens = [word + ' ' for word in stub.reply(messages).split(' ')]
+        with stub.slots:
+            stub.generating(+1)
+            sent = 0
+            try:
+                time.sleep(stub.prompt_delay)
+                if not body.get('stream', True):
+                    time.sleep(stub.token_delay * len(tokens))
+                    sent = len(tokens)
+                    self._json(stub.final_chunk(body['model'], ''.join(tokens).strip(), len(messages), sent))
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                for token in tokens:
+                    self._chunk({'model': body['model'], 'message': {'role': 'assistant', 'content': token}, 'done': False})
+                    sent += 1
+                    time.sleep(stub.token_delay)
+                self._chunk(stub.final_chunk(body['model'], '', len(messages), sent))
+                self.wfile.write(b'0\r\n\r\n')
+            except OSError:
+                pass  # The client hung up: stop generating, like Ollama does
+            finally:
+                stub.generating(-1)
+                stub.finished(messages, sent, len(tokens))
+
+    def _chunk(self, data: dict):
+        line = (json.dumps(data) + '\n').encode()
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(line), line))
+        self.wfile.flush()
+
+
+class StubOllama:
+    def __init__(self, models: List[str] = ('stub',), num_parallel: int = 1, token_delay: float = 0.01,
+                 prompt_delay: float = 0.0, reply: Callable[[List[Dict[str, str]]], str] = echo_reply,
+                 host: str = '127.0.0.1', port: int = 0):
+        """
+        Fake Ollama server
+
+        Args:
+            models: Installed model names
+            num_parallel: Replies generated at once (like OLLAMA_NUM_PARALLEL); the rest wait
+            token_delay: Seconds per generated token
+            prompt_delay: Seconds of prompt evaluation before the first token
+            reply: Builds the reply text from the chat messages
+            host: Interface to listen on
+            port: Port (0 picks a free one)
+        """
+        self.models = list(models)
+        self.num_parallel = num_parallel
+        self.token_delay = token_delay
+        self.prompt_delay = prompt_delay
+        self.reply = reply
+        self.failing = False
+        self.slots = threading.BoundedSemaphore(num_parallel)
+        self.lock = threading.Lock()
+        self.requests: List[List[Dict[str, str]]] = []
+        self.completed: List[tuple] = []
+        self.active = 0
+        self.peak_active = 0
+        self.server = ThreadingHTTPServer((host, port), StubOllamaHandler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'StubOllama':
+        self.thread = threading.Thread(target=self.server.serve_forever, name="ollama-stub", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def received(self, messages: List[Dict[str, str]]):
+        with self.lock:
+            self.requests.append(messages)
+
+    def generating(self, change: int):
+        with self.lock:
+            self.active += change
+            self.peak_active = max(self.peak_active, self.active)
+
+    def finished(self, messages: List[Dict[str, str]], sent: int, total: int):
+        with self.lock:
+            self.completed.append((messages[-1]['content'], sent, total))
+
+    def final_chunk(self, model: str, content: str, prompt_messages: int, tokens: int) -> dict:
+        return {
+            'model': model, 'message': {'role': 'assistant', 'content': content}, 'done': True,
+            'prompt_eval_count': 10 * prompt_messages, 'prompt_eval_duration': int(self.prompt_delay * 1e9),
+            'eval_count': tokens, 'eval_duration': int(self.token_delay * tokens * 1e9), 'load_duration': 0
+        }
+
+    def user_messages(self) -> List[str]:
+        """Last user message of every chat request, in arrival order"""
+        with self.lock:
+            return [messages[-1]['content'] for messages in self.requests]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Ollama HTTP API")
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--model', action='append', help="Installed model (default: gemma3:latest)")
+    parser.add_argument('--num-parallel', type=int, default=1, help="Replies generated at once")
+    parser.add_argument('--token-ms', type=float, default=30, help="Milliseconds per token")
+    parser.add_argument('--prompt-ms', type=float, default=100, help="Milliseconds before the first token")
+    args = parser.parse_args()
+
+    stub = StubOllama(args.model or ['gemma3:latest'], args.num_parallel, args.token_ms / 1000,
+                      args.prompt_ms / 1000, port=args.port).start()
+    print(f"🧪 Ollama stub on {stub.url} ({args.num_parallel} at once, {args.token_ms:.0f} ms/token)")
+    try:
+        stub.thread.join()
+    except KeyboardInterrupt:
+        print(f"\n{len(stub.requests)} chat requests, peak {stub.peak_active} generating at once")
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Simulated clients for ARKA's WebSocket voice server
+
+Starts a server in-process with stand-in models (a tone "recognizer", an
+echoing LLM and a beeping TTS engine) and talks to it from many clients at
+once, streaming PCM in real time like a microphone would. Reports how long
+each client waited for the first audio of each reply and whether any
+session saw another one's conversation. Use --url to load-test a real
+server instead (give --wav with a recording, the tones mean nothing to a
+real recognizer).
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ollama-bot', 'src'))
+
+import argparse
+import asyncio
+import json
+import re
+import time
+import wave
+from typing import List, Optional
+
+import numpy as np
+from websockets.asyncio.client import connect
+
+from ollama_stub import StubOllama
+from bot.audio_output import AudioClip
+from bot.ollama_client import AsyncOllamaClient, GenerationMetrics, OllamaClient
+from bot.tts_worker import SpeechSynthesizer
+from bot.voice_server import SharedModels, VoiceServer
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+
+
+class ToneASR:
+    """Recognizer stand-in: hears 'caller N' in a tone of N x 100 Hz"""
+    streaming = False
+
+    def transcribe(self, audio) -> Optional[str]:
+        samples = np.frombuffer(audio.frame_data, dtype=np.int16).astype(np.float32)
+        spectrum = np.abs(np.fft.rfft(samples))
+        peak = np.fft.rfftfreq(len(samples), 1 / audio.sample_rate)[int(np.argmax(spectrum))]
+        time.sleep(0.05)  # About what a small local model takes
+        return f"this is caller {int(round(peak / 100))}"
+
+
+def caller_reply(messages) -> str:
+    """Names the caller and counts that caller's messages, so mixed-up histories show"""
+    user_turns = [m['content'] for m in messages if m['role'] == 'user']
+    caller = re.search(r'caller (\d+)', user_turns[-1])
+    return (f"Hello caller {caller.group(1) if caller else 'unknown'}. "
+            f"This is message {len(user_turns)} from you. Nice talking to you.")
+
+
+class EchoLLM:
+    """LLM stand-in answering with caller_reply()"""
+    def __init__(self, token_delay: float = 0.01):
+        self.token_delay = token_delay
+        self.metrics = GenerationMetrics()
+        self.response_cache = None
+        self.cancelled = False
+
+    def chat(self, messages, priority=None) -> str:
+        return ''.join(self.chat_stream(messages))
+
+    def chat_stream(self, messages, priority=None):
+        self.cancelled = False
+        for word in caller_reply(messages).split(' '):
+            if self.cancelled:
+                return
+            time.sleep(self.token_delay)
+            yield word + ' '
+
+    def embed(self, text):
+        return None
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class BeepEngine:
+    """pyttsx3 stand-in: renders 40 ms of a quiet tone per word"""
+    def __init__(self):
+        self.pending = None
+
+    def getProperty(self, name):
+        return 'beep'
+
+    def save_to_file(self, text, path):
+        self.pending = (text, path)
+
+    def runAndWait(self):
+        text, path = self.pending
+        t = np.arange(int(0.04 * SAMPLE_RATE * len(text.split()))) / SAMPLE_RATE
+        AudioClip((np.sin(2 * np.pi * 440 * t) * 2000).astype(np.int16).tobytes(), SAMPLE_RATE).to_wav(path)
+
+
+def stub_models(asr_parallel: int = 2, ollama_url: Optional[str] = None, num_parallel: int = 2) -> SharedModels:
+    """
+    Shared models that need no Ollama, speech model or speech engine
+
+    Args:
+        asr_parallel: Utterances transcribed at once
+        ollama_url: Use real OllamaClients (and their scheduler) against this
+                    Ollama stub instead of the in-process EchoLLM
+        num_parallel: Scheduler concurrency when ollama_url is given
+    """
+    synthesizer = SpeechSynthesizer(BeepEngine, use_cache=False).start()
+    synthesizer.wait_ready(timeout=5)
+    if ollama_url is None:
+        return SharedModels(EchoLLM, ToneASR(), synthesizer, asr_parallel)
+
+    pool = AsyncOllamaClient("stub", host=ollama_url, num_parallel=num_parallel)
+    pool.response_cache = None  # Every caller must reach the scheduler
+
+    def llm_factory():
+        return OllamaClient("stub", initialize=False, summarize=False, async_client=pool)
+    return SharedModels(llm_factory, ToneASR(), synthesizer, asr_parallel, scheduler=pool.scheduler,
+                        router=pool.router)
+
+
+def utterance(caller: int, seconds: float = 0.8, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """A tone the stand-in recognizer hears as 'this is caller N'"""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (np.sin(2 * np.pi * caller * 100 * t) * 3000).astype(np.int16)
+
+
+def load_wav(path: str) -> np.ndarray:
+    with wave.open(path, 'rb') as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1 or wav.getframerate() != SAMPLE_RATE:
+            raise ValueError(f"{path}: need 16-bit mono {SAMPLE_RATE} Hz")
+        return np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+
+
+class SimulatedClient:
+    def __init__(self, websocket, caller: int, sample_rate: int, speech: Optional[np.ndarray] = None):
+        """
+        One caller: streams audio in real time and records what comes back
+
+        Args:
+            websocket: Open connection (after 'ready')
+            caller: Caller number, also the tone it speaks in
+            sample_rate: Rate the server asked for
+            speech: Recording to say instead of the tone
+        """
+        self.websocket = websocket
+        self.caller = caller
+        self.sample_rate = sample_rate
+        self.speech = speech if speech is not None else utterance(caller, sample_rate=sample_rate)
+        self.events: asyncio.Queue = asyncio.Queue()
+        self.receiver = asyncio.create_task(self._receive())
+
+    async def _receive(self):
+        try:
+            async for message in self.websocket:
+                event = {'type': 'pcm', 'bytes': len(message)} if isinstance(message, bytes) else json.loads(message)
+                event['time'] = time.perf_counter()
+                await self.events.put(event)
+        finally:
+            await self.events.put({'type': 'closed', 'time': time.perf_counter()})
+
+    async def until(self, *types: str, timeout: float = 30.0) -> List[dict]:
+        """Events received up to and including the next one of the given types"""
+        seen = []
+        while True:
+            event = await asyncio.wait_for(self.events.get(), timeout)
+            seen.append(event)
+            if event['type'] in types or event['type'] == 'closed':
+                return seen
+
+    async def send_pcm(self, samples: np.ndarray) -> float:
+        """Stream samples in 20 ms frames at real-time pace; returns when the last frame was sent"""
+        frame = self.sample_rate * FRAME_MS // 1000
+        start = time.perf_counter()
+        for i, offset in enumerate(range(0, len(samples), frame)):
+            await self.websocket.send(samples[offset:offset + frame].tobytes())
+            delay = start + (i + 1) * FRAME_MS / 1000 - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        return time.perf_counter()
+
+    async def say(self, pause: float = 0.6) -> float:
+        """Speak, then stay quiet long enough for the end of speech to be heard; returns when speech ended"""
+        rng = np.random.default_rng(self.caller)
+        quiet = (rng.standard_normal(int(pause * self.sample_rate)) * 30).astype(np.int16)
+        ended = await self.send_pcm(self.speech)
+        await self.send_pcm(quiet)
+        return ended
+
+    async def turn(self) -> dict:
+        """Say something and wait for the whole reply"""
+        ended = await self.say()
+        events = await self.until('turn_done', 'bye')
+        audio = [e for e in events if e['type'] == 'pcm']
+        return {
+            'transcript': ' '.join(e['text'] for e in events if e['type'] == 'transcript'),
+            'reply': ' '.join(e['text'] for e in events if e['type'] == 'reply'),
+            'latency': audio[0]['time'] - ended if audio else None,
+            'audio_bytes': sum(e['bytes'] for e in audio)
+        }
+
+    async def barge_in(self) -> Optional[float]:
+        """Start talking as soon as ARKA starts answering; returns seconds until the server said 'stop'"""
+        await self.say()
+        await self.until('pcm')
+        onset = time.perf_counter()
+        speaking = asyncio.create_task(self.say())
+        events = await self.until('stop', 'turn_done')
+        await speaking
+        await self.until('turn_done')  # The reply to the interruption
+        return events[-1]['time'] - onset if events[-1]['type'] == 'stop' else None
+
+    async def close(self):
+        await self.websocket.close()
+        await self.receiver
+
+
+async def run_client(url: str, caller: int, turns: int = 2, barge_in: bool = False,
+                     speech: Optional[np.ndarray] = None, hold: float = 0.0) -> dict:
+    """
+    Connect, wait out the greeting, take some turns and hang up
+
+    Returns:
+        {'caller', 'status' ('ok' or 'busy'), 'turns': [turn results], 'barge_in': seconds or None}
+    """
+    result = {'caller': caller, 'status': 'busy', 'turns': [], 'barge_in': None}
+    async with connect(url, compression=None, open_timeout=30) as websocket:
+        hello = json.loads(await websocket.recv())
+        if hello['type'] != 'ready':
+            return result
+        result['status'] = 'ok'
+        client = SimulatedClient(websocket, caller, hello['sample_rate'], speech)
+        await client.until('turn_done')  # Greeting
+        for _ in range(turns):
+            result['turns'].append(await client.turn())
+        if barge_in:
+            result['barge_in'] = await client.barge_in()
+        await asyncio.sleep(hold)
+        await client.close()
+    return result
+
+
+async def run_clients(url: str, clients: int, turns: int = 2, barge_in: bool = False,
+                      speech: Optional[np.ndarray] = None, stagger: float = 0.05) -> List[dict]:
+    """Run many callers at once (caller numbers start at 2, so tones are 200 Hz and up)"""
+    async def start(i):
+        await asyncio.sleep(i * stagger)
+        return await run_client(url, i + 2, turns, barge_in, speech)
+    return await asyncio.gather(*(start(i) for i in range(clients)))
+
+
+def check_isolation(results: List[dict]) -> List[str]:
+    """Every reply must name its own caller and count only that caller's messages"""
+    problems = []
+    for result in results:
+        for n, turn in enumerate(result['turns'], 1):
+            if f"caller {result['caller']}" not in turn['reply'] or f"message {n} " not in turn['reply']:
+                problems.append(f"caller {result['caller']} turn {n}: {turn['reply']!r}")
+    return problems
+
+
+def percentile(values: List[float], p: float) -> float:
+    return float(np.percentile(values, p)) if values else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated clients for ARKA's voice server")
+    parser.add_argument('--clients', type=int, default=8, help="Callers at once")
+    parser.add_argument('--turns', type=int, default=2, help="Turns per caller")
+    parser.add_argument('--max-sessions', type=int, default=6, help="Admission limit of the in-process server")
+    parser.add_argument('--barge-in', action='store_true', help="Interrupt ARKA after the last turn")
+    parser.add_argument('--stub-ollama', type=int, metavar='NUM_PARALLEL',
+                        help="Go through the real Ollama client and scheduler to a stub Ollama "
+                             "generating this many replies at once")
+    parser.add_argument('--url', help="Test a running server instead (e.g. ws://127.0.0.1:8765)")
+    parser.add_argument('--wav', help="16-bit mono 16 kHz recording to say (for real servers)")
+    args = parser.parse_args()
+
+    print("🧪 ARKA Voice Server Simulation")
+    print("=" * 50)
+    server = None
+    url = args.url
+    if url is None:
+        ollama = None
+        if args.stub_ollama:
+            ollama = StubOllama(['stub'], args.stub_ollama, token_delay=0.02, prompt_delay=0.1, reply=caller_reply).start()
+        models = stub_models(ollama_url=ollama.url if ollama else None, num_parallel=args.stub_ollama or 2)
+        server = VoiceServer(models, port=0, max_sessions=args.max_sessions, admission_timeout=1.0).start()
+        url = f"ws://127.0.0.1:{server.port}"
+    print(f"🌐 {args.clients} callers -> {url}")
+
+    speech = load_wav(args.wav) if args.wav else None
+    started = time.perf_counter()
+    results = asyncio.run(run_clients(url, args.clients, args.turns, args.barge_in, speech))
+    elapsed = time.perf_counter() - started
+
+    served = [r for r in results if r['status'] == 'ok']
+    latencies = [t['latency'] * 1000 for r in served for t in r['turns'] if t['latency'] is not None]
+    print(f"✅ {len(served)} served, {len(results) - len(served)} turned away, {elapsed:.1f}s total")
+    print(f"⏱️ First audio after end of speech: p50 {percentile(latencies, 50):.0f} ms, "
+          f"p95 {percentile(latencies, 95):.0f} ms ({len(latencies)} replies)")
+    barge = [r['barge_in'] * 1000 for r in served if r['barge_in'] is not None]
+    if args.barge_in:
+        print(f"🛑 Stopped after speech onset: p50 {percentile(barge, 50):.0f} ms ({len(barge)}/{len(served)})")
+
+    ok = True
+    if args.url is None:
+        problems = check_isolation(served)
+        for problem in problems:
+            print(f"❌ Mixed-up session: {problem}")
+        ok = not problems
+        if ok:
+            print("✅ Every session only saw its own conversation")
+        server.stop()
+        print(server.report())
+        if ollama is not None:
+            print(f"🧪 Ollama stub: {len(ollama.requests)} requests, peak {ollama.peak_active} generating at once")
+            ollama.stop()
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Test script for ARKA's speech recognition backends and endpointing
+(uses stub models and scripted partials, no Vosk or Whisper needed)
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ollama-bot', 'src'))
+
+import speech_recognition as sr
+
+from bot import asr
+from bot.asr import ASR_BACKENDS, OFFLINE_FALLBACK, ASRBackend, Endpointer, GoogleASR, Hypothesis, create_asr_backend
+
+
+class StubModel:
+    """Stands in for a loaded speech model: 'hears' how many bytes of audio it got"""
+    def transcribe(self, pcm):
+        return f"{len(pcm)} bytes"
+
+
+def stub_backend(name, loads=True, offline=True):
+    """A backend class named like a real engine whose model load succeeds or fails"""
+    class StubASR(ASRBackend):
+        install_hint = f"Install {name} with: pip3 install {name}"
+        loaded = []
+
+        def load(self):
+            if not loads:
+                raise ImportError(f"No module named '{name}'")
+            self.model = asr._cached_model(('stub', name), StubModel)
+            StubASR.loaded.append(self)
+
+        def transcribe(self, audio):
+            return self.model.transcribe(audio.get_raw_data())
+
+    StubASR.name = name
+    StubASR.offline = offline
+    return StubASR
+
+
+class stub_backends:
+    """Temporarily replaces the registered engines"""
+    def __init__(self, *backends):
+        self.backends = {backend.name: backend for backend in backends}
+
+    def __enter__(self):
+        self.saved = dict(ASR_BACKENDS)
+        ASR_BACKENDS.update(self.backends)
+        return self.backends
+
+    def __exit__(self, *exc):
+        ASR_BACKENDS.clear()
+        ASR_BACKENDS.update(self.saved)
+        asr._MODEL_CACHE.clear()
+
+
+def test_configured_engine_is_loaded():
+    """The named engine is created and its model loaded once per process"""
+    print("Testing engine choice...")
+    with stub_backends(stub_backend('vosk')) as backends:
+        first = create_asr_backend('VOSK')
+        second = create_asr_backend('vosk')
+        assert isinstance(first, backends['vosk']) and len(backends['vosk'].loaded) == 2
+        assert first.model is second.model
+        assert first.transcribe(sr.AudioData(b'\x00\x00' * 10, 16000, 2)) == "20 bytes"
+    print("✅ Vosk stub loaded, model shared")
+
+
+def test_missing_model_falls_back_offline():
+    """An offline engine that can't load is replaced by offline Sphinx, never by Google"""
+    print("Testing offline fallback...")
+    online = stub_backend('google', offline=False)
+    with stub_backends(stub_backend('vosk', loads=False), stub_backend(OFFLINE_FALLBACK), online):
+        backend = create_asr_backend('vosk')
+        assert backend.name == OFFLINE_FALLBACK and backend.offline
+        assert not online.loaded
+    print(f"✅ Fell back to {OFFLINE_FALLBACK}")
+
+
+def test_no_offline_engine_raises():
+    """Without any offline engine the user is told what to install instead of being sent online"""
+    print("Testing missing fallback...")
+    online = stub_backend('google', offline=False)
+    with stub_backends(stub_backend('whisper', loads=False), stub_backend(OFFLINE_FALLBACK, loads=False), online):
+        try:
+            create_asr_backend('whisper')
+            raise AssertionError("expected RuntimeError")
+        except RuntimeError as e:
+            assert "pip3 install whisper" in str(e) and "ASR_ENGINE=google" in str(e), e
+        assert not online.loaded
+    print("✅ Raised with install instructions")
+
+
+def test_online_only_when_chosen():
+    """Google is used when asked for by name; unknown names are rejected"""
+    print("Testing explicit online engine...")
+    assert isinstance(create_asr_backend('google'), GoogleASR)
+    try:
+        create_asr_backend('siri')
+        raise AssertionError("expected ValueError")
+    except ValueError as e:
+        assert 'vosk' in str(e)
+    print("✅ Google only on request")
+
+
+def endpoint(script, **kwargs):
+    """
+    Feed an Endpointer a script of partial hypotheses at simulated times
+
+    Args:
+        script: (time, text, final, in_speech) steps; text None means no new hypothesis
+
+    Returns:
+        Time at which the utterance ended (None if it didn't) and the final text
+    """
+    endpointer = Endpointer(**kwargs)
+    for now, text, final, in_speech in script:
+        hypothesis = Hypothesis(text, final) if text is not None else None
+        if endpointer.update(hypothesis, now=now, in_speech=in_speech):
+            return now, endpointer.text
+    return None, endpointer.text
+
+
+def partials(*steps, until=5.0):
+    """Script with a partial at each (time, text) step, then nothing new every 0.1 s until `until`"""
+    script = [(now, text, False, None) for now, text in steps]
+    now = steps[-1][0]
+    while now < until:
+        now = round(now + 0.1, 1)
+        script.append((now, None, False, None))
+    return script
+
+
+def test_endpoint_after_stable_partial():
+    """A complete phrase ends once its partial stops changing for stable_time; changes restart the clock"""
+    print("Testing stable-partial endpointing...")
+    ended, text = endpoint(partials((0.0, "what"), (0.3, "what is the"), (0.6, "what is the time")))
+    assert ended == 1.2 and text == "what is the time", (ended, text)
+
+    # A revision (the recognizer changing its mind) counts as a change
+    ended, _ = endpoint(partials((0.0, "tell me a"), (0.4, "tell me a joke"), (0.9, "tell me a joke")))
+    assert ended == 1.0, ended
+    print("✅ Ended 0.6 s after the last change")
+
+
+def test_short_phrase_grace_period():
+    """Two words without punctuation get the longer grace period, so "what is" can continue"""
+    print("Testing short-phrase grace period...")
+    ended, text = endpoint(partials((0.0, "what is")))
+    assert ended == 1.5 and text == "what is", ended
+
+    ended, text = endpoint(partials((0.0, "what is"), (1.2, "what is chai")))
+    assert ended == 1.8 and text == "what is chai", (ended, text)
+
+    ended, _ = endpoint(partials((0.0, "hello!")))  # End punctuation: complete
+    assert ended == 0.6, ended
+    print("✅ Short phrases wait 1.5 s")
+
+
+def test_final_hypothesis_and_vad():
+    """Engine finals end at once; the VAD overrides stability both ways; max_duration caps it"""
+    print("Testing finals, VAD and the time limit...")
+    assert endpoint([(0.0, "hi", False, None), (0.2, "hi there", True, None)]) == (0.2, "hi there")
+
+    # Still talking: stable partials don't end the utterance
+    script = [(0.0, "what is the time", False, True)] + [(t / 10, None, False, True) for t in range(1, 20)]
+    assert endpoint(script)[0] is None
+    # Speech stopped after a complete phrase: no need to wait for stability
+    assert endpoint([(0.0, "what is the time", False, True), (0.1, None, False, False)])[0] == 0.1
+    # ...but not after an incomplete one
+    assert endpoint([(0.0, "what is", False, True), (0.1, None, False, False)])[0] is None
+
+    # Silence before any words never ends anything; max_duration ends long utterances
+    assert endpoint([(t / 10, "", False, None) for t in range(30)])[0] is None
+    words = [(t / 10, " ".join(["blah"] * (t + 3)), False, True) for t in range(40)]
+    assert endpoint(words, max_duration=2.0)[0] == 2.0
+    print("✅ Finals, VAD and max_duration respected")
+
+
+def main():
+    """Run all ASR tests"""
+    print("🧪 Testing Speech Recognition Backends")
+    print("=" * 50)
+
+    tests = [
+        test_configured_engine_is_loaded,
+        test_missing_model_falls_back_offline,
+        test_no_offline_engine_raises,
+        test_online_only_when_chosen,
+        test_endpoint_after_stable_partial,
+        test_short_phrase_grace_period,
+        test_final_hypothesis_and_vad
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print()
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
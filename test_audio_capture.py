@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared microphone ring buffer (no microphone needed)
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ollama-bot', 'src'))
+
+import numpy as np
+
+from bot.audio_capture import ListenAborted, MicrophoneCapture, RingBuffer
+from bot.vad import VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+
+class FakeMicrophone:
+    """Just the attributes MicrophoneCapture reads; audio is written to the ring directly"""
+    SAMPLE_RATE = SAMPLE_RATE
+    CHUNK = 1024
+
+def test_ring_buffer_wraps():
+    """Reads inside the buffer are views; reads across the end are stitched together"""
+    print("Testing ring buffer wrap-around...")
+    ring = RingBuffer(10)
+    ring.write(np.arange(8, dtype=np.int16))
+    view = ring.read(2, 6)
+    assert view.base is ring.buffer, "expected a zero-copy view"
+
+    ring.write(np.arange(8, 14, dtype=np.int16))
+    assert list(ring.read(6, 14)) == [6, 7, 8, 9, 10, 11, 12, 13]
+    try:
+        ring.read(0, 4)
+        assert False, "overwritten samples should not be readable"
+    except ValueError:
+        pass
+    print("✅ Ring buffer keeps the newest samples")
+
+def test_readers_are_independent():
+    """Two readers see the same audio without taking it from each other"""
+    print("Testing independent readers...")
+    capture = MicrophoneCapture(FakeMicrophone(), buffer_seconds=1)
+    first = capture.reader()
+    second = capture.reader()
+    capture.ring.write(np.arange(100, dtype=np.int16))
+
+    assert list(first.read(50, timeout=0)) == list(range(50))
+    assert list(second.read(100, timeout=0)) == list(range(100))
+    assert list(first.read(50, timeout=0)) == list(range(50, 100))
+    assert first.read(1, timeout=0) is None
+    print("✅ Every listener gets every sample")
+
+def test_listen_finds_utterance():
+    """listen() returns the speech plus pre-roll and hangover, without the long silences"""
+    print("Testing VAD-based listen...")
+    capture = MicrophoneCapture(FakeMicrophone(), buffer_seconds=5)
+    reader = capture.reader()
+
+    rng = np.random.default_rng(0)
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    silence = (rng.standard_normal(SAMPLE_RATE) * 30).astype(np.int16)
+    voice = (np.sin(2 * np.pi * 200 * t) * 3000).astype(np.int16)
+    capture.ring.write(np.concatenate([silence, voice, silence]))
+
+    audio = reader.listen(VoiceActivityDetector(SAMPLE_RATE), timeout=2, phrase_time_limit=5)
+    seconds = len(audio.frame_data) / 2 / SAMPLE_RATE
+    assert 1.0 <= seconds <= 1.8, seconds
+    print(f"✅ Captured a {seconds:.2f}s utterance")
+
+def test_listen_aborts():
+    """listen() drops the utterance as soon as its abort check fires (e.g. ARKA started talking)"""
+    print("Testing aborted listen...")
+    capture = MicrophoneCapture(FakeMicrophone(), buffer_seconds=5)
+    reader = capture.reader()
+
+    rng = np.random.default_rng(0)
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    silence = (rng.standard_normal(SAMPLE_RATE) * 30).astype(np.int16)
+    voice = (np.sin(2 * np.pi * 200 * t) * 3000).astype(np.int16)
+    capture.ring.write(np.concatenate([silence, voice, silence]))
+
+    speaking = []
+    try:
+        reader.listen(VoiceActivityDetector(SAMPLE_RATE), timeout=2, phrase_time_limit=5,
+                      on_speech=lambda: speaking.append(True), abort=lambda: bool(speaking))
+        assert False, "listen should have been aborted"
+    except ListenAborted:
+        pass
+    assert reader.position < 2 * SAMPLE_RATE, "should stop right after the onset"
+    print("✅ Utterance dropped")
+
+def main():
+    """Run all capture tests"""
+    print("=== Audio Capture Test Suite ===\n")
+
+    tests = [
+        test_ring_buffer_wraps,
+        test_readers_are_independent,
+        test_listen_finds_utterance,
+        test_listen_aborts
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n=== Test Results: {passed}/{len(tests)} tests passed ===")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test script for ARKA's token-budgeted conversation context
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ollama-bot', 'src'))
+
+import time
+
+from bot.context import ConversationContext
+from bot.events import Flag
+from bot.summarizer import RollingSummarizer
+
+def fill(context, turns):
+    for i in range(turns):
+        context.add_exchange(f"question number {i} " * 5, f"answer number {i} " * 10)
+
+def test_prompt_stays_within_budget():
+    """However long the chat, the prompt stays under the budget and keeps the newest turns"""
+    print("Testing token budget...")
+    context = ConversationContext(token_budget=400, max_messages=1000)
+    fill(context, 200)
+
+    messages = context.build("You are ARKA.", "what's up?")
+    tokens = sum(ConversationContext.estimate_tokens(m['content']) for m in messages)
+    assert tokens <= 400, tokens
+    assert messages[0]['role'] == 'system' and messages[-1]['content'] == "what's up?"
+    assert messages[1]['role'] == 'user', "history must start with a user message"
+    assert "answer number 199" in messages[-2]['content']
+    print(f"✅ Prompt is {tokens} tokens with {len(messages) - 2} history messages")
+
+def test_prompt_prefix_is_stable():
+    """Each new turn only appends to the previous prompt until the budget forces a re-anchor"""
+    print("Testing stable prompt prefix...")
+    context = ConversationContext(token_budget=600)
+    previous = None
+    extended = 0
+    for i in range(40):
+        messages = context.build("You are ARKA.", f"question number {i}")
+        if previous is not None and messages[:len(previous) - 1] == previous[:-1]:
+            extended += 1
+        previous = messages
+        context.add_exchange(f"question number {i}", f"answer number {i} " * 10)
+
+    assert context.reanchors >= 2, context.reanchors
+    assert extended == 39 - context.reanchors, (extended, context.reanchors)
+    print(f"✅ Prefix reused on {extended} of 39 turns ({context.reanchors} re-anchors)")
+
+def test_memory_is_bounded():
+    """Old messages fall out of memory once max_messages is reached"""
+    print("Testing bounded history...")
+    context = ConversationContext(max_messages=20)
+    fill(context, 100)
+    assert len(context) == 20
+    assert "question number 90" in context[0]['content']
+    assert context[-2:][1]['role'] == 'assistant'
+    context.clear()
+    assert len(context) == 0 and context.window() == []
+    print("✅ History capped at 20 messages")
+
+def test_old_turns_are_summarized_when_idle():
+    """Turns that fall out of the window end up in a summary sent with the system prompt"""
+    print("Testing rolling summary...")
+    context = ConversationContext(token_budget=300)
+    calls = []
+    busy = Flag(True)
+
+    def fake_chat(messages):
+        calls.append(messages[-1]['content'])
+        return "The user asked many numbered questions."
+
+    summarizer = RollingSummarizer(context, fake_chat, idle=lambda: not busy.is_set(), activity=busy,
+                                   min_messages=2)
+    summarizer.start()
+    fill(context, 30)
+    context.build("You are ARKA.", "hi")
+    context.add_exchange("one more", "sure")
+
+    time.sleep(0.3)
+    assert calls == [], "must not call the model while busy"
+    busy.clear()  # Wakes the summarizer, no polling
+    for _ in range(50):
+        if context.summary:
+            break
+        time.sleep(0.1)
+    summarizer.stop()
+
+    assert "question number 0" in calls[0]
+    messages = context.build("You are ARKA.", "hi")
+    assert "numbered questions" in messages[0]['content']
+    pending, _, _ = context.pending_summary()
+    assert pending == []
+
+    # stop() wakes a summarizer that is waiting for the bot to go idle
+    busy.set()
+    waiting = RollingSummarizer(context, fake_chat, idle=lambda: not busy.is_set(), activity=busy)
+    waiting.start()
+    context.add_exchange("still there?", "yes")
+    time.sleep(0.1)
+    waiting.stop()
+    waiting.thread.join(timeout=1)
+    assert not waiting.thread.is_alive()
+    print(f"✅ Summarized {context.summarized_upto} messages while idle")
+
+def main():
+    """Run all context tests"""
+    print("=== Conversation Context Test Suite ===\n")
+
+    tests = [
+        test_prompt_stays_within_budget,
+        test_prompt_prefix_is_stable,
+        test_memory_is_bounded,
+        test_old_turns_are_summarized_when_idle
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n=== Test Results: {passed}/{len(tests)} tests passed ===")
+
+if __name__ == "__main__":
+    main()
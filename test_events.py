@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test script for ARKA's event queue and waitable flags (no audio devices needed)
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ollama-bot', 'src'))
+
+import threading
+import time
+
+from bot.events import EventQueue, Flag
+
+
+def test_priority_order():
+    """Stop beats interrupts, interrupts beat captured speech; FIFO within a kind"""
+    print("Testing event priorities...")
+    events = EventQueue()
+    events.post('speech_done')
+    events.post('capture', 'first phrase')
+    events.post('interrupt', 'wait, stop')
+    events.post('capture', 'second phrase')
+    events.post('stop')
+
+    order = [(event.kind, event.payload) for event in iter(lambda: events.get(timeout=0), None)]
+    assert order == [('stop', None), ('interrupt', 'wait, stop'), ('capture', 'first phrase'),
+                     ('capture', 'second phrase'), ('speech_done', None)], order
+    assert events.get(timeout=0.01) is None
+    print("✅ Events handled by priority")
+
+
+def test_wakes_immediately_without_spinning():
+    """A waiting main loop uses no CPU and wakes as soon as an event is posted"""
+    print("Testing blocking wait...")
+    events = EventQueue()
+    posted = []
+
+    def post_later():
+        time.sleep(0.3)
+        posted.append(time.perf_counter())
+        events.post('interrupt', 'hello')
+
+    threading.Thread(target=post_later, daemon=True).start()
+    cpu = time.process_time()
+    event = events.get(timeout=5)
+    woke = time.perf_counter()
+    cpu = time.process_time() - cpu
+
+    assert event.kind == 'interrupt' and event.payload == 'hello'
+    latency = (woke - posted[0]) * 1000
+    assert latency < 20, latency
+    assert cpu < 0.05, cpu
+    print(f"✅ Woke {latency:.1f} ms after the event, {cpu * 1000:.1f} ms CPU while waiting 300 ms")
+
+
+def test_flag_waits_both_ways():
+    """Listeners can sleep until ARKA starts or stops talking"""
+    print("Testing waitable flag...")
+    changes = []
+    speaking = Flag(on_change=changes.append)
+    assert speaking.wait(False, timeout=0)
+    assert not speaking.wait(True, timeout=0.01)
+
+    threading.Timer(0.05, speaking.set).start()
+    assert speaking.wait(True, timeout=2)
+    threading.Timer(0.05, speaking.clear).start()
+    assert speaking.wait(False, timeout=2)
+    speaking.clear()  # no change, no callback
+    assert changes == [True, False], changes
+
+    # notify() wakes predicate waiters after state outside the flag changed
+    state = {'stop': False}
+
+    def stop_later():
+        time.sleep(0.05)
+        state['stop'] = True
+        speaking.notify()
+
+    threading.Thread(target=stop_later, daemon=True).start()
+    assert speaking.wait_until(lambda: speaking.is_set() or state['stop'], timeout=2)
+    print("✅ Flag waits for True, False and custom conditions")
+
+
+def main():
+    """Run all event tests"""
+    print("🧪 Testing ARKA Event Loop Primitives")
+    print("=" * 50)
+
+    tests = [
+        test_priority_order,
+        test_wakes_immediately_without_spinning,
+        test_flag_waits_both_ways
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print()
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
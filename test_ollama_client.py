@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test script for the pooled Ollama client (runs against a tiny local stand-in for Ollama)
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ollama-bot', 'src'))
+
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bot.health import ModelHealthCache
+from bot.ollama_client import OllamaClient
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Answers /api/chat with 'hi', or streams 50 tokens slowly"""
+    protocol_version = 'HTTP/1.1'
+    streamed = []
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        FakeOllamaHandler.requests.append(self.path)
+        data = json.dumps({'models': [{'name': 'fake', 'model': 'fake'}]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        FakeOllamaHandler.requests.append(self.path)
+        if not body.get('stream'):
+            data = json.dumps({'message': {'role': 'assistant', 'content': 'hi'}, 'done': True,
+                               'prompt_eval_count': 12, 'prompt_eval_duration': 5000000,
+                               'eval_count': 1, 'eval_duration': 1000000}).encode()
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        self.send_response(200)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        sent = 0
+        try:
+            for i in range(50):
+                line = (json.dumps({'message': {'role': 'assistant', 'content': f'word{i} '}, 'done': False}) + '\n').encode()
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(line), line))
+                self.wfile.flush()
+                sent += 1
+                time.sleep(0.02)
+            self.wfile.write(b'0\r\n\r\n')
+        except OSError:
+            pass  # Client hung up
+        FakeOllamaHandler.streamed.append(sent)
+
+def make_client():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return OllamaClient("fake", initialize=False, host=f"http://127.0.0.1:{server.server_port}")
+
+def test_send_query_remembers():
+    """Replies are added to the history unless remember=False"""
+    print("Testing history updates...")
+    client = make_client()
+    assert client.get_response("hello") == "hi"
+    assert client.get_response("again", remember=False) == "hi"
+    assert len(client.conversation_history) == 2
+    client.remember("again", "h")
+    assert client.conversation_history[-1] == {'role': 'assistant', 'content': 'h'}
+    assert client.metrics.last['prompt_tokens'] == 12 and client.metrics.last['prompt_ms'] == 5
+    print(f"✅ History only holds what we asked for ({client.metrics.describe()})")
+
+def test_repeated_query_is_cached():
+    """Asking the same thing twice only reaches Ollama once, follow-ups always do"""
+    print("Testing response cache...")
+    client = make_client()
+    FakeOllamaHandler.requests.clear()
+
+    assert client.get_response("What can you do?") == "hi"
+    started = time.perf_counter()
+    assert client.get_response("what can you do") == "hi"
+    elapsed = time.perf_counter() - started
+    assert FakeOllamaHandler.requests.count('/api/chat') == 1, FakeOllamaHandler.requests
+    assert len(client.conversation_history) == 4
+
+    client.get_response("tell me more about that")
+    assert FakeOllamaHandler.requests.count('/api/chat') == 2, FakeOllamaHandler.requests
+    print(f"✅ Cached reply in {elapsed * 1000:.1f} ms; {client.response_cache.report()}")
+
+def test_fast_startup_uses_cached_check():
+    """A recent model check is trusted, and the model is preloaded without a test chat"""
+    print("Testing fast startup...")
+    client = make_client()
+    client.health_cache = ModelHealthCache(os.path.join(tempfile.mkdtemp(), 'health.json'), ttl=60)
+    FakeOllamaHandler.requests.clear()
+
+    client.initialize_model(fast=True)
+    client.preload().result(timeout=5)
+    assert FakeOllamaHandler.requests.count('/api/tags') == 1, FakeOllamaHandler.requests
+
+    client.initialize_model(fast=True)
+    time.sleep(0.2)
+    assert FakeOllamaHandler.requests.count('/api/tags') == 1, FakeOllamaHandler.requests
+    assert len(client.conversation_history) == 0
+
+    # Forgetting the model rewrites the cache atomically
+    cache = client.health_cache
+    cache.invalidate(client.async_client.host, client.model_name)
+    assert not cache.is_fresh(client.async_client.host, client.model_name)
+    assert not os.path.exists(f"{cache.path}.tmp")
+    with open(cache.path) as f:
+        assert json.load(f) == {}
+    print("✅ Second start skipped the model check")
+
+def test_cancel_stops_generation():
+    """cancel() ends the stream early and closes the connection"""
+    print("Testing cancellation...")
+    client = make_client()
+    FakeOllamaHandler.streamed.clear()
+    threading.Timer(0.2, client.cancel).start()
+
+    tokens = list(client.chat_stream([{'role': 'user', 'content': 'talk'}]))
+    assert 0 < len(tokens) < 50, len(tokens)
+    time.sleep(0.3)
+    assert FakeOllamaHandler.streamed and FakeOllamaHandler.streamed[0] < 50, FakeOllamaHandler.streamed
+    assert len(client.conversation_history) == 0
+    print(f"✅ Stopped after {len(tokens)} of 50 tokens")
+
+def main():
+    """Run all Ollama client tests"""
+    print("=== Ollama Client Test Suite ===\n")
+
+    tests = [
+        test_send_query_remembers,
+        test_repeated_query_is_cached,
+        test_fast_startup_uses_cached_check,
+        test_cancel_stops_generation
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n=== Test Results: {passed}/{len(tests)} tests passed ===")
+
+if __name__ == "__main__":
+    main()
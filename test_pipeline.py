@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for the staged turn pipeline (no microphone or Ollama needed)
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ollama-bot', 'src'))
+
+import threading
+import time
+
+from bot.pipeline import Pipeline
+
+def test_stages_run_in_order():
+    """Items flow through every stage and keep their order"""
+    print("Testing stage ordering...")
+    results = []
+    done = threading.Event()
+
+    pipeline = Pipeline(maxsize=2)
+    pipeline.add_stage('double', lambda item, emit: emit(item * 2))
+    pipeline.add_stage('collect', lambda item, emit: (results.append(item), len(results) == 5 and done.set()))
+    pipeline.start()
+
+    for i in range(5):
+        pipeline.put(i)
+
+    assert done.wait(2), "pipeline did not finish"
+    assert results == [0, 2, 4, 6, 8], results
+    pipeline.stop()
+    print("✅ Items passed through all stages in order")
+
+def test_slow_stage_does_not_block_upstream():
+    """A slow last stage must not stop the first stage from working ahead"""
+    print("Testing overlap between stages...")
+    recognized = []
+    release = threading.Event()
+
+    pipeline = Pipeline(maxsize=4)
+    pipeline.add_stage('asr', lambda item, emit: (recognized.append(item), emit(item)))
+    pipeline.add_stage('tts', lambda item, emit: release.wait(2))
+    pipeline.start()
+
+    for i in range(3):
+        pipeline.put(i)
+
+    time.sleep(0.2)
+    assert recognized == [0, 1, 2], recognized
+    release.set()
+    pipeline.stop()
+    print("✅ Recognition kept going while speech was busy")
+
+def test_flush_drops_old_turn():
+    """Flushing stops in-flight handlers from emitting more output"""
+    print("Testing flush on interrupt...")
+    spoken = []
+    started = threading.Event()
+
+    def generate(item, emit):
+        started.set()
+        for i in range(50):
+            if not emit(f"{item}-{i}"):
+                return
+            time.sleep(0.01)
+
+    pipeline = Pipeline(maxsize=2)
+    pipeline.add_stage('llm', generate)
+    pipeline.add_stage('tts', lambda item, emit: spoken.append(item))
+    pipeline.start()
+
+    pipeline.put("old")
+    assert started.wait(1)
+    time.sleep(0.05)
+    pipeline.flush()
+    count = len(spoken)
+    time.sleep(0.2)
+    assert len(spoken) <= count + 1, spoken
+    assert all(item.startswith("old") for item in spoken)
+    pipeline.stop()
+    print("✅ Old turn stopped after flush")
+
+def test_full_queue_blocks_until_room_or_flush():
+    """A put into a full stage waits without polling and returns the moment a flush drops it"""
+    print("Testing backpressure...")
+    release = threading.Event()
+    pipeline = Pipeline(maxsize=1)
+    pipeline.add_stage('tts', lambda item, emit: release.wait(2))
+    pipeline.start()
+
+    pipeline.put("playing")
+    time.sleep(0.05)
+    pipeline.put("queued")
+    results = []
+    producer = threading.Thread(target=lambda: results.append(pipeline.put("blocked")))
+    producer.start()
+    time.sleep(0.1)
+    assert producer.is_alive(), "put should wait for room"
+
+    flushed_at = time.perf_counter()
+    pipeline.flush()
+    producer.join(timeout=1)
+    latency = time.perf_counter() - flushed_at
+    assert results == [False] and latency < 0.05, (results, latency)
+
+    # Once the stage takes its next item, a waiting put goes through
+    assert pipeline.put("next")
+    producer = threading.Thread(target=lambda: results.append(pipeline.put("after")))
+    producer.start()
+    release.set()
+    producer.join(timeout=1)
+    assert results == [False, True], results
+    pipeline.stop()
+    print(f"✅ Flush released the blocked put in {latency * 1000:.1f} ms")
+
+def main():
+    """Run all pipeline tests"""
+    print("=== Pipeline Test Suite ===\n")
+
+    tests = [
+        test_stages_run_in_order,
+        test_slow_stage_does_not_block_upstream,
+        test_flush_drops_old_turn,
+        test_full_queue_blocks_until_room_or_flush
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n=== Test Results: {passed}/{len(tests)} tests passed ===")
+
+if __name__ == "__main__":
+    main()
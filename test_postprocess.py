@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Test script for ARKA's response post-processing
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ollama-bot', 'src'))
+
+from bot.postprocess import make_sentence_friendly
+
+def test_friendly_sentences():
+    """Contractions in one pass, and each personality touch only once per response"""
+    print("Testing friendly post-processing...")
+    state = {}
+    first = make_sentence_friendly("I AM sure it will not hurt, it is a cool plan", state)
+    assert first == "I'm sure, yaar it won't hurt, it's a pretty cool plan.", first
+    second = make_sentence_friendly("It is cool and I am sure it is nice", state)
+    assert second == "it's cool and I'm sure it's nice.", second
+    print(f"✅ {first} / {second}")
+
+def main():
+    """Run all post-processing tests"""
+    print("=== Post-processing Test Suite ===\n")
+
+    tests = [
+        test_friendly_sentences
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n=== Test Results: {passed}/{len(tests)} tests passed ===")
+
+if __name__ == "__main__":
+    main()
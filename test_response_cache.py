@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for ARKA's response cache
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ollama-bot', 'src'))
+
+import time
+
+from bot.response_cache import ResponseCache
+
+HISTORY = [{'role': 'user', 'content': 'who is the prime minister?'},
+           {'role': 'assistant', 'content': 'It changes, yaar!'}]
+
+def test_normalized_hit():
+    """Case, punctuation and spacing don't matter, the persona does"""
+    print("Testing exact matches...")
+    cache = ResponseCache(max_entries=8, ttl=60)
+    cache.put("Hey, what can you do?", "Lots of things!", "You are ARKA.")
+
+    assert cache.get("hey   what can you do", "You are ARKA.") == "Lots of things!"
+    assert cache.get("hey what can you do", "You are someone else.") is None
+    assert cache.hits == 1 and cache.misses == 1
+    print(f"✅ {cache.report()}")
+
+def test_follow_ups_bypass_cache():
+    """Questions that refer back to the conversation are never cached or answered from it"""
+    print("Testing context-dependent queries...")
+    cache = ResponseCache(max_entries=8, ttl=60)
+    cache.put("tell me more about it", "More!", history=HISTORY)
+    assert not cache.entries
+
+    cache.put("what's a good joke", "Why did the chai cross the road?")
+    assert cache.get("what's a good joke", history=HISTORY) == "Why did the chai cross the road?"
+    assert cache.get("tell me another one", history=HISTORY) is None
+    assert cache.get("what did I say before", history=HISTORY) is None
+    assert cache.bypassed == 2
+    print("✅ Follow-ups go to the model")
+
+def test_sessions_dont_share_personal_answers():
+    """A reply built from one conversation's history is never served to another session"""
+    print("Testing personal questions across sessions...")
+    cache = ResponseCache(max_entries=8, ttl=60)
+    priya = [{'role': 'user', 'content': 'I am Priya'}, {'role': 'assistant', 'content': 'Hi Priya!'}]
+    cache.put("what's my name", "You're Priya, yaar!", "You are ARKA.", priya)
+    cache.put("what's the capital of France", "Paris, bhai!", "You are ARKA.", priya)
+    assert not cache.entries
+
+    # The second session is new, so its history is empty
+    assert cache.get("what's my name", "You are ARKA.") is None
+    assert cache.get("what's the capital of France", "You are ARKA.") is None
+    print("✅ Second session asked the model")
+
+def test_eviction():
+    """Old entries expire and the least recently used one makes room"""
+    print("Testing LRU and TTL eviction...")
+    cache = ResponseCache(max_entries=2, ttl=0.2)
+    cache.put("one", "1")
+    cache.put("two", "2")
+    cache.get("one")
+    cache.put("three", "3")
+    assert cache.get("two") is None, "least recently used entry should be evicted"
+    assert cache.get("one") == "1" and cache.get("three") == "3"
+
+    time.sleep(0.3)
+    assert cache.get("one") is None and not cache.entries
+    print("✅ Eviction works")
+
+def test_similar_query_matches():
+    """With embeddings, close wording reuses a reply and unrelated queries don't"""
+    print("Testing embedding matches...")
+    cache = ResponseCache(max_entries=8, ttl=60, similarity=0.9)
+    cache.put("what's your name", "I'm ARKA!", vector=[1.0, 0.1, 0.0])
+
+    assert cache.get("what are you called", vector=[0.9, 0.15, 0.0]) == "I'm ARKA!"
+    assert cache.get("what's the weather", vector=[0.1, 1.0, 0.2]) is None
+    assert cache.semantic_hits == 1
+    assert abs(cache.hit_rate - 0.5) < 1e-9
+    print(f"✅ {cache.report()}")
+
+def main():
+    """Run all response cache tests"""
+    print("=== Response Cache Test Suite ===\n")
+
+    tests = [
+        test_normalized_hit,
+        test_follow_ups_bypass_cache,
+        test_sessions_dont_share_personal_answers,
+        test_eviction,
+        test_similar_query_matches
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n=== Test Results: {passed}/{len(tests)} tests passed ===")
+
+if __name__ == "__main__":
+    main()
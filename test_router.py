@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test script for routing Ollama requests over several servers (runs against local Ollama stubs)
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ollama-bot', 'src'))
+
+import socket
+import threading
+import time
+
+from ollama_stub import StubOllama
+from bot.ollama_client import AsyncOllamaClient, OllamaClient, _EventLoopThread
+from bot.router import Backend, parse_backends
+
+
+def closed_port_url() -> str:
+    """URL of a port nobody listens on"""
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return f"http://127.0.0.1:{port}"
+
+
+def sessions(pool, count, prefix="question"):
+    """Run one chat_stream per session at the same time; returns the replies"""
+    replies = {}
+
+    def session(n):
+        client = OllamaClient(pool.model_name, initialize=False, summarize=False, async_client=pool)
+        replies[n] = ''.join(client.chat_stream([{'role': 'user', 'content': f"{prefix} {n}"}])).strip()
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    return replies
+
+
+def test_spreads_load():
+    """Concurrent requests go to the least-loaded server, never more than its num_parallel each"""
+    print("Testing load balancing...")
+    stubs = [StubOllama(num_parallel=4, token_delay=0.02).start() for _ in range(2)]
+    pool = AsyncOllamaClient("stub", backends=[Backend(stub.url, "stub", num_parallel=2) for stub in stubs])
+    try:
+        replies = sessions(pool, 8)
+        # Shutdown closes the kept-alive connections of every server
+        pools = [backend.transport._pool for backend in pool.router.backends]
+        assert all(connections.connections for connections in pools)
+        _EventLoopThread.shared().submit(pool.aclose()).result(timeout=5)
+        assert not any(connections.connections for connections in pools)
+    finally:
+        for stub in stubs:
+            stub.stop()
+
+    assert all(replies[n] == f"You said question {n}. Nice one, yaar." for n in range(8)), replies
+    assert pool.scheduler.max_concurrent == 4
+    assert min(len(stub.requests) for stub in stubs) >= 3, [len(stub.requests) for stub in stubs]
+    assert all(stub.peak_active == 2 for stub in stubs), [stub.peak_active for stub in stubs]
+    print(f"✅ 8 requests spread over 2 servers\n{pool.router.report()}")
+
+
+def test_failover_and_recovery():
+    """Requests fail over from broken servers; a server that recovers gets traffic again"""
+    print("Testing failover...")
+    good = StubOllama(num_parallel=2, token_delay=0.005).start()
+    flaky = StubOllama(num_parallel=2, token_delay=0.005).start()
+    flaky.failing = True
+    dead = closed_port_url()
+    backends = [Backend(url, "stub", num_parallel=2, cooldown=0.3) for url in (dead, flaky.url, good.url)]
+    pool = AsyncOllamaClient("stub", backends=backends)
+    try:
+        replies = sessions(pool, 4)
+        assert all(replies[n] == f"You said question {n}. Nice one, yaar." for n in range(4)), replies
+        assert backends[0].down and backends[1].down and not backends[2].down
+        assert pool.router.failovers >= 2
+        assert pool.scheduler.max_concurrent == 2  # Only the good server's slots are left
+
+        flaky.failing = False
+        time.sleep(0.35)
+        served = len(good.requests)
+        replies = sessions(pool, 4, "again")
+        assert all(replies[n] == f"You said again {n}. Nice one, yaar." for n in range(4)), replies
+        assert not backends[1].down and flaky.requests, "recovered server got no traffic"
+        assert len(good.requests) - served < 4
+        assert pool.scheduler.max_concurrent == 4
+    finally:
+        good.stop()
+        flaky.stop()
+    print(f"✅ Failed over and came back\n{pool.router.report()}")
+
+
+def test_models_per_server():
+    """Each server is asked for its own model; a missing one is pulled there only"""
+    print("Testing per-server models...")
+    small = StubOllama(models=['gemma3:1b'], token_delay=0.001).start()
+    big = StubOllama(models=['gemma3:latest'], token_delay=0.001).start()
+    backends = parse_backends(f"{small.url}=gemma3:1b=1, {big.url}", "gemma3:latest", 3)
+    assert [(b.model, b.num_parallel) for b in backends] == [('gemma3:1b', 1), ('gemma3:latest', 3)]
+    pool = AsyncOllamaClient("gemma3:latest", backends=backends)
+    client = OllamaClient("gemma3:latest", initialize=False, summarize=False, async_client=pool)
+    try:
+        client.ensure_model(use_cache=False)
+        assert small.requests == [] and big.requests == []
+        replies = sessions(pool, 4)
+        assert len(small.requests) + len(big.requests) == 4 and small.requests and big.requests
+
+        small.models = []
+        assert not client._run(pool.has_model())
+        client._run(pool.pull())
+        assert backends[0].requests and not any(b.down for b in backends)
+    finally:
+        small.stop()
+        big.stop()
+    assert all(replies[n] == f"You said question {n}. Nice one, yaar." for n in range(4)), replies
+    print("✅ Both models served, missing one pulled")
+
+
+def test_session_stays_on_its_server():
+    """When loads are equal, a session keeps using the server that has its prompt cached"""
+    print("Testing session affinity...")
+    stubs = [StubOllama(token_delay=0.001).start() for _ in range(3)]
+    pool = AsyncOllamaClient("stub", backends=[Backend(stub.url, "stub") for stub in stubs])
+    first = OllamaClient("stub", initialize=False, summarize=False, async_client=pool)
+    second = OllamaClient("stub", initialize=False, summarize=False, async_client=pool)
+    try:
+        for n in range(3):
+            first.chat([{'role': 'user', 'content': f"first {n}"}])
+            second.chat([{'role': 'user', 'content': f"second {n}"}])
+    finally:
+        for stub in stubs:
+            stub.stop()
+
+    homes = [{stub.url for stub in stubs if any(m.startswith(name) for m in stub.user_messages())}
+             for name in ('first', 'second')]
+    assert all(len(home) == 1 for home in homes), homes
+    print("✅ Each session stayed on one server")
+
+
+def main():
+    """Run all router tests"""
+    print("🧪 Testing Ollama Router")
+    print("=" * 50)
+
+    tests = [
+        test_spreads_load,
+        test_failover_and_recovery,
+        test_models_per_server,
+        test_session_stays_on_its_server
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print()
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
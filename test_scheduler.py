@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Test script for the Ollama request scheduler (runs against a local stub of Ollama's HTTP API)
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ollama-bot', 'src'))
+
+import asyncio
+import threading
+import time
+
+from ollama_stub import StubOllama
+from bot.ollama_client import AsyncOllamaClient, OllamaClient
+from bot.scheduler import PRIORITY_BACKGROUND, PRIORITY_URGENT, GenerationScheduler
+
+
+def test_priority_then_round_robin():
+    """Urgent requests go first, then sessions take turns; background work waits for everyone"""
+    print("Testing queue order...")
+    started = []
+
+    async def scenario():
+        scheduler = GenerationScheduler(max_concurrent=1)
+        release = asyncio.Event()
+
+        async def blocker():
+            await release.wait()
+            return 'blocker'
+
+        def request(name):
+            async def run():
+                started.append(name)
+                await asyncio.sleep(0)
+                return name
+            return run
+
+        tasks = [asyncio.ensure_future(scheduler.call(blocker, session='X'))]
+        queued = [('A', 'a1'), ('A', 'a2'), ('A', 'a3'), ('B', 'b1')]
+        for session, name in queued:
+            tasks.append(asyncio.ensure_future(scheduler.call(request(name), session=session)))
+        tasks.append(asyncio.ensure_future(scheduler.call(request('summary'), session='A', priority=PRIORITY_BACKGROUND)))
+        tasks.append(asyncio.ensure_future(scheduler.call(request('after barge-in'), session='C', priority=PRIORITY_URGENT)))
+        await asyncio.sleep(0.05)
+        depth = scheduler.depth
+        release.set()
+        results = await asyncio.gather(*tasks)
+        return scheduler, depth, results
+
+    scheduler, depth, results = asyncio.run(scenario())
+    assert depth == 6 and scheduler.metrics.peak_depth == 6, depth
+    assert started == ['after barge-in', 'a1', 'b1', 'a2', 'a3', 'summary'], started
+    assert results[1:5] == ['a1', 'a2', 'a3', 'b1'] and scheduler.depth == 0 and scheduler.active == 0
+    print(f"✅ Served in order {started}")
+
+
+def test_urgent_joiner_promotes_shared_request():
+    """An urgent caller joining a queued background generation doesn't wait behind normal requests"""
+    print("Testing priority of coalesced requests...")
+    started = []
+
+    async def scenario():
+        scheduler = GenerationScheduler(max_concurrent=1)
+        release = asyncio.Event()
+
+        async def blocker():
+            await release.wait()
+
+        def request(name):
+            async def run():
+                started.append(name)
+                return name
+            return run
+
+        tasks = [asyncio.ensure_future(scheduler.call(blocker, session='X'))]
+        tasks.append(asyncio.ensure_future(scheduler.call(request('shared'), key='same', session='A',
+                                                          priority=PRIORITY_BACKGROUND)))
+        tasks.append(asyncio.ensure_future(scheduler.call(request('b1'), session='B')))
+        tasks.append(asyncio.ensure_future(scheduler.call(request('c1'), session='C')))
+        await asyncio.sleep(0.01)
+        tasks.append(asyncio.ensure_future(scheduler.call(request('joined'), key='same', session='D',
+                                                          priority=PRIORITY_URGENT)))
+        await asyncio.sleep(0.01)
+        depth = scheduler.depth
+        release.set()
+        results = await asyncio.gather(*tasks)
+        return scheduler, depth, results
+
+    scheduler, depth, results = asyncio.run(scenario())
+    assert depth == 3, depth  # The joiner shares the queued request instead of adding one
+    assert started == ['shared', 'b1', 'c1'], started
+    assert results[1] == results[4] == 'shared' and scheduler.depth == 0 and scheduler.active == 0
+    assert list(scheduler.metrics.waits[PRIORITY_URGENT]) and not scheduler.metrics.waits[PRIORITY_BACKGROUND]
+    print(f"✅ Served in order {started}")
+
+
+def test_coalescing_and_withdrawal():
+    """Identical prompts share one generation; it only stops when its last listener leaves"""
+    print("Testing coalescing...")
+    calls = []
+    closed = []
+
+    def tokens(name, n=5, delay=0.01):
+        async def generate():
+            calls.append(name)
+            try:
+                for i in range(n):
+                    await asyncio.sleep(delay)
+                    yield f"{name}{i}"
+            finally:
+                closed.append(name)
+        return generate
+
+    async def collect(stream, limit=None):
+        items = []
+        async for item in stream:
+            items.append(item)
+            if limit and len(items) == limit:
+                break
+        await stream.aclose()
+        return items
+
+    async def scenario():
+        scheduler = GenerationScheduler(max_concurrent=2)
+        first = asyncio.ensure_future(collect(scheduler.stream(tokens('same'), key='hello', session=1)))
+        await asyncio.sleep(0.025)  # The late joiner still gets the tokens it missed
+        shared = await asyncio.gather(first, *(collect(scheduler.stream(tokens('same'), key='hello', session=s))
+                                               for s in (2, 3)))
+
+        # One listener leaving early doesn't stop the others
+        early, full = await asyncio.gather(collect(scheduler.stream(tokens('again', 20), key='again', session=1), 2),
+                                           collect(scheduler.stream(tokens('again', 20), key='again', session=2)))
+
+        # Everyone leaving stops the generation; a queued request that is withdrawn never runs
+        scheduler.max_concurrent = 1
+        blocker = asyncio.ensure_future(collect(scheduler.stream(tokens('long', 50), key='long')))
+        await asyncio.sleep(0.02)
+        queued = asyncio.ensure_future(collect(scheduler.stream(tokens('queued'), key='queued')))
+        await asyncio.sleep(0.02)
+        queued.cancel()
+        blocker.cancel()
+        await asyncio.gather(blocker, queued, return_exceptions=True)
+        await asyncio.sleep(0.02)
+        return scheduler, shared, early, full
+
+    scheduler, shared, early, full = asyncio.run(scenario())
+    assert calls == ['same', 'again', 'long'], calls
+    assert all(items == [f"same{i}" for i in range(5)] for items in shared), shared
+    assert len(early) == 2 and len(full) == 20
+    assert 'long' in closed and scheduler.active == 0 and scheduler.depth == 0
+    assert scheduler.metrics.coalesced == 3, scheduler.metrics.coalesced
+    print(f"✅ 5 callers, 3 generations; {scheduler.metrics.report()}")
+
+
+def run_threads(targets):
+    threads = [threading.Thread(target=target) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+
+
+def test_sessions_share_ollama_slots():
+    """Many sessions on one client never have more than num_parallel generations on Ollama"""
+    print("Testing concurrency cap against the Ollama stub...")
+    stub = StubOllama(num_parallel=8, token_delay=0.005).start()
+    pool = AsyncOllamaClient("stub", host=stub.url, num_parallel=2)
+    replies = {}
+
+    def session(n):
+        client = OllamaClient("stub", initialize=False, summarize=False, async_client=pool)
+        replies[n] = ''.join(client.chat_stream([{'role': 'user', 'content': f"question {n}"}])).strip()
+
+    try:
+        started = time.perf_counter()
+        run_threads([lambda n=n: session(n) for n in range(6)])
+        elapsed = time.perf_counter() - started
+    finally:
+        stub.stop()
+
+    assert all(replies[n] == f"You said question {n}. Nice one, yaar." for n in range(6)), replies
+    assert stub.peak_active == 2, stub.peak_active
+    assert len(stub.requests) == 6 and pool.metrics.count == 6
+    assert pool.scheduler.metrics.peak_depth >= 3 and pool.scheduler.depth == 0
+    print(f"✅ 6 sessions in {elapsed * 1000:.0f} ms, at most 2 on Ollama; {pool.scheduler.metrics.report()}")
+
+
+def test_identical_prompts_reach_ollama_once():
+    """Sessions asking the same thing at the same time share one request"""
+    print("Testing coalescing against the Ollama stub...")
+    stub = StubOllama(num_parallel=4, token_delay=0.01).start()
+    pool = AsyncOllamaClient("stub", host=stub.url, num_parallel=4)
+    messages = [{'role': 'system', 'content': 'You are ARKA'}, {'role': 'user', 'content': 'hello'}]
+    replies = []
+
+    def session():
+        client = OllamaClient("stub", initialize=False, summarize=False, async_client=pool)
+        replies.append(''.join(client.chat_stream(messages)))
+
+    try:
+        run_threads([session] * 4)
+        full = OllamaClient("stub", initialize=False, summarize=False, async_client=pool).chat(messages)
+    finally:
+        stub.stop()
+
+    assert len(replies) == 4 and len(set(replies)) == 1, replies
+    assert replies[0].strip() == full == "You said hello. Nice one, yaar."
+    assert len(stub.requests) == 2, len(stub.requests)  # 4 streams coalesced, plus the plain chat
+    print("✅ 4 identical streams, 1 request to Ollama")
+
+
+def main():
+    """Run all scheduler tests"""
+    print("🧪 Testing Ollama Request Scheduler")
+    print("=" * 50)
+
+    tests = [
+        test_priority_then_round_robin,
+        test_urgent_joiner_promotes_shared_request,
+        test_coalescing_and_withdrawal,
+        test_sessions_share_ollama_slots,
+        test_identical_prompts_reach_ollama_once
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print()
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
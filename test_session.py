@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Test script for ARKA's headless session engine and pluggable audio sources/sinks
+(no microphone, speakers or Ollama needed)
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ollama-bot', 'src'))
+
+import socket
+import tempfile
+import threading
+import time
+
+import numpy as np
+import speech_recognition as sr
+
+from bot.audio_capture import PCMSource, SocketSource, WavFileSource
+from bot.audio_output import AudioClip, BufferSink, SocketSink, WavFileSink
+from bot.context import ConversationContext
+from bot.conversation import Conversation
+from bot.pipeline import Turn
+from bot.response_cache import ResponseCache
+from bot.session import ARKA_CLEARED, ARKA_GOODBYE, ARKA_VOICE_PROMPT, SessionEngine
+from bot.text_normalization import split_sentences
+from bot.tts_worker import TTSWorker
+from bot.vad import VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+REPLY = "Arre wah, nice question. Chai is basically happiness in a cup. Want a recipe? It takes five minutes."
+
+
+class FakeMetrics:
+    count = 0
+
+
+class FakeLLM:
+    """Just the parts of OllamaClient the session engine uses"""
+    def __init__(self):
+        self.metrics = FakeMetrics()
+        self.response_cache = None
+        self.requests = []
+
+    def chat(self, messages):
+        self.requests.append(messages)
+        return REPLY
+
+    def chat_stream(self, messages):
+        self.requests.append(messages)
+        for word in REPLY.split(' '):
+            yield word + ' '
+
+    def embed(self, text):
+        return None
+
+    def cancel(self):
+        pass
+
+
+class FakeEngine:
+    """Stands in for pyttsx3: renders 50 ms of audio per word"""
+    def __init__(self):
+        self.pending = None
+
+    def getProperty(self, name):
+        return 'fake'
+
+    def save_to_file(self, text, path):
+        self.pending = (text, path)
+
+    def say(self, text):
+        raise AssertionError("must not fall back to the local speakers")
+
+    def runAndWait(self):
+        text, path = self.pending
+        AudioClip(b'\x01\x00' * 800 * len(text.split()), SAMPLE_RATE).to_wav(path)
+
+
+def speech(seconds=1.0):
+    """Silence, a loud tone and no trailing silence (the source adds it when it ends)"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    silence = (rng.standard_normal(SAMPLE_RATE // 2) * 30).astype(np.int16)
+    return np.concatenate([silence, (np.sin(2 * np.pi * 200 * t) * 3000).astype(np.int16)])
+
+
+def test_engine_answers_without_audio():
+    """Prompting, post-processing, history and commands work on text alone"""
+    print("Testing headless replies and commands...")
+    llm = FakeLLM()
+    session = SessionEngine(llm)
+
+    reply = session.respond("Tell me about chai")
+    assert reply and len(reply.split('. ')) <= 3, reply
+    assert [m['role'] for m in session.history] == ['user', 'assistant']
+    assert llm.requests[-1][0]['role'] == 'system'
+
+    # Only the sentences taken from the stream end up in the history
+    stream = session.stream_response("And coffee?")
+    first = next(stream)
+    stream.close()
+    assert session.history[-1]['content'] == first
+
+    assert session.handle_command("what's the weather") is None
+    assert session.handle_command("clear history please") == (ARKA_CLEARED, False)
+    assert len(session.history) == 0
+    assert session.handle_command("goodbye") == (ARKA_GOODBYE, True)
+    print("✅ Session engine runs without any audio devices")
+
+
+def test_generate_stage():
+    """The pipeline's LLM stage emits raw sentences, then an end-of-turn marker"""
+    print("Testing the generation stage...")
+    session = SessionEngine(FakeLLM())
+    turn = Turn("Tell me about chai")
+    emitted = []
+    session.generate(turn, lambda item: emitted.append(item) or True)
+    assert emitted[-1] == (turn, None)
+    assert len(emitted) > 2 and all(t is turn for t, _ in emitted)
+
+    for _, sentence in emitted[:-1]:
+        friendly = session.next_friendly_sentence(turn, sentence)
+        if friendly:
+            turn.spoken.append(friendly)
+    session.finish_turn(turn)
+    session.finish_turn(turn)  # recorded once
+    assert len(session.history) == 2
+    print(f"✅ {len(emitted) - 1} sentences generated, {len(turn.spoken)} kept")
+
+
+def test_follow_ups_skip_embedding():
+    """The query is only embedded when the response cache will actually be consulted"""
+    print("Testing cache embeddings...")
+    llm = FakeLLM()
+    llm.response_cache = ResponseCache()
+    embedded = []
+    llm.embed = lambda text: embedded.append(text)
+    session = SessionEngine(llm)
+
+    session.respond("Tell me about chai")
+    session.respond("tell me more about it")
+    session.generate(Turn("what did I say before"), lambda item: True)
+    assert embedded == ["Tell me about chai"], embedded
+    assert llm.response_cache.bypassed == 2
+    print("✅ Follow-ups went to the model without an embedding round trip")
+
+
+def test_conversation_voice_mode_uses_engine():
+    """The text/voice front end streams through the session engine into the history text mode uses"""
+    print("Testing Conversation's voice pipeline...")
+    llm = FakeLLM()
+    llm.conversation_history = ConversationContext()
+    conversation = Conversation(llm, source=PCMSource(SAMPLE_RATE), sink=BufferSink())
+    assert conversation.session.history is llm.conversation_history
+    conversation.tts = TTSWorker(FakeEngine, player=BufferSink(), use_cache=False)
+    conversation.tts.start().wait_ready(timeout=5)
+    conversation.pipeline = conversation._build_pipeline()
+    conversation.pipeline.start()
+    try:
+        conversation.pipeline.put(Turn("Tell me about chai"), stage='llm')
+        deadline = time.time() + 10
+        while len(llm.conversation_history) < 2 and time.time() < deadline:
+            time.sleep(0.02)
+        reply = llm.conversation_history[-1]['content']
+        assert conversation._handle_transcript("clear history") is None
+    finally:
+        conversation.pipeline.stop()
+        conversation.tts.close()
+
+    assert llm.requests[0][0] == {'role': 'system', 'content': ARKA_VOICE_PROMPT}
+    assert len(split_sentences(reply)) == 3 and 'recipe' in reply, reply  # Capped at three sentences
+    assert conversation.session.history is llm.conversation_history and len(llm.conversation_history) == 0
+    spoken = conversation.tts.player.clip().duration
+    assert not conversation.is_speaking and spoken > 0
+    print(f"✅ Streamed reply spoken ({spoken:.2f}s of audio), then history cleared by voice command")
+
+
+def test_pcm_source_listen():
+    """Pushed PCM is heard like microphone audio, even split mid-sample; end() closes the utterance"""
+    print("Testing in-memory PCM source...")
+    source = PCMSource(SAMPLE_RATE)
+    reader = source.reader()
+    pcm = speech().tobytes()
+    for start in range(0, len(pcm), 333):
+        source.push(pcm[start:start + 333])
+    source.end()
+
+    audio = reader.listen(VoiceActivityDetector(SAMPLE_RATE), timeout=2, phrase_time_limit=5)
+    seconds = len(audio.frame_data) / 2 / SAMPLE_RATE
+    assert 1.0 <= seconds <= 1.8, seconds
+    try:
+        reader.listen(VoiceActivityDetector(SAMPLE_RATE), timeout=2)
+        assert False, "an ended source should not wait for more speech"
+    except sr.WaitTimeoutError:
+        pass
+    print(f"✅ Captured a {seconds:.2f}s utterance from pushed PCM")
+
+
+def test_wav_round_trip():
+    """What a WAV sink writes, a WAV source plays back sample for sample"""
+    print("Testing WAV file sink and source...")
+    samples = speech(0.5)
+    path = os.path.join(tempfile.mkdtemp(), "reply.wav")
+    sink = WavFileSink(path)
+    assert sink.play(AudioClip(samples[:4000].tobytes(), SAMPLE_RATE))
+    assert sink.play(AudioClip(samples[4000:].tobytes(), SAMPLE_RATE))
+    sink.close()
+
+    source = WavFileSource(path, speed=0)
+    reader = source.reader()
+    source.start()
+    assert np.array_equal(reader.read(len(samples), timeout=2), samples)
+    source.stop()
+    print(f"✅ {source.duration:.2f}s written and read back")
+
+
+def test_socket_stream_stops_mid_clip():
+    """Socket output is paced in real time, so stopping cuts the clip on the far end too"""
+    print("Testing socket sink and source...")
+    server, client = socket.socketpair()
+    sink = SocketSink(server)
+    source = SocketSource(client, SAMPLE_RATE)
+    reader = source.reader()
+    source.start()
+
+    deadline = time.monotonic() + 0.3
+    played = sink.play(AudioClip(speech(2.0).tobytes(), SAMPLE_RATE), lambda: time.monotonic() > deadline)
+    server.close()
+    source.thread.join(timeout=2)
+    assert not played
+    received = source.ring.written - SAMPLE_RATE  # minus the silence end() adds
+    assert 0.3 * SAMPLE_RATE <= received <= 0.5 * SAMPLE_RATE, received
+    assert reader.read(received, timeout=0) is not None
+    client.close()
+    print(f"✅ Stopped after {received / SAMPLE_RATE * 1000:.0f} ms of a 2.5 s clip")
+
+
+def test_tts_worker_into_buffer():
+    """Speech goes to the sink it was given; nothing is played on local speakers"""
+    print("Testing TTS into an in-memory sink...")
+    sink = BufferSink()
+    worker = TTSWorker(FakeEngine, player=sink, use_cache=False)
+    worker.start().wait_ready(timeout=5)
+    assert worker.speak("one two three")
+    assert worker.speak("four")
+    worker.close()
+    assert abs(sink.clip().duration - 0.2) < 1e-6, sink.clip().duration
+
+    # An engine that can't render to files is dropped, not spoken aloud
+    class NoFiles(FakeEngine):
+        def save_to_file(self, text, path):
+            raise RuntimeError("no file output")
+
+    worker = TTSWorker(NoFiles, player=BufferSink(), use_cache=False)
+    worker.start().wait_ready(timeout=5)
+    done = threading.Event()
+    job = worker.say("hello there")
+    threading.Thread(target=lambda: job.wait() or done.set(), daemon=True).start()
+    assert done.wait(2) and not job.completed
+    worker.close()
+    print("✅ TTS rendered into the buffer")
+
+
+def main():
+    """Run all session tests"""
+    print("🧪 Testing ARKA Headless Sessions")
+    print("=" * 50)
+
+    tests = [
+        test_engine_answers_without_audio,
+        test_generate_stage,
+        test_follow_ups_skip_embedding,
+        test_conversation_voice_mode_uses_engine,
+        test_pcm_source_listen,
+        test_wav_round_trip,
+        test_socket_stream_stops_mid_clip,
+        test_tts_worker_into_buffer
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print()
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script for ARKA's parallel startup
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ollama-bot', 'src'))
+
+import time
+
+from bot.startup import StartupOrchestrator
+
+def test_steps_run_together():
+    """Startup takes as long as the slowest step, not the sum"""
+    print("Testing parallel startup...")
+    startup = StartupOrchestrator()
+    startup.add('tts', lambda: time.sleep(0.3) or 'tts ready')
+    startup.add('ollama', lambda: time.sleep(0.3))
+    startup.add('microphone', lambda: time.sleep(0.3))
+
+    results = startup.run()
+    assert results['tts'] == 'tts ready'
+    assert startup.total_time < 0.6, startup.total_time
+    assert sum(startup.timings.values()) >= 0.9
+    print(f"✅ Three 0.3s steps took {startup.total_time:.2f}s")
+
+def test_wait_and_errors():
+    """A step can wait for another; a failing step fails startup after the rest finish"""
+    print("Testing step dependencies and failures...")
+    startup = StartupOrchestrator()
+    finished = []
+    startup.add('tts', lambda: time.sleep(0.1) or 'voice')
+    startup.add('ollama', lambda: finished.append(startup.wait('tts')))
+    startup.add('asr', lambda: 1 / 0)
+    try:
+        startup.run()
+        assert False, "expected the failing step to raise"
+    except ZeroDivisionError:
+        pass
+    assert finished == ['voice']
+    assert "failed" in startup.report()
+    print("✅ Dependencies and failures handled")
+
+def main():
+    """Run all startup tests"""
+    print("=== Startup Test Suite ===\n")
+
+    tests = [
+        test_steps_run_together,
+        test_wait_and_errors
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n=== Test Results: {passed}/{len(tests)} tests passed ===")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test script for streaming replies sentence by sentence into TTS
+(fake token streams and a local Ollama stub, no speakers needed)
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ollama-bot', 'src'))
+
+import time
+
+from ollama_stub import StubOllama
+from bot.events import Flag
+from bot.ollama_client import OllamaClient
+from bot.pipeline import Pipeline, Turn
+from bot.session import SessionEngine
+from voice2voice import VoiceToVoiceBot
+
+REPLY = ("Chai is great. Masala chai is better. Cutting chai is the best. "
+         "Irani chai is also nice. Kashmiri chai is pink. Lemon tea is fine too.")
+
+
+class FakeMetrics:
+    count = 0
+
+
+class FakeStreamLLM:
+    """Streams REPLY word by word and records how far it was read and whether it was closed"""
+    def __init__(self, reply=REPLY):
+        self.reply = reply
+        self.metrics = FakeMetrics()
+        self.response_cache = None
+        self.pulled = 0
+        self.closed = False
+
+    def chat_stream(self, messages):
+        try:
+            for word in self.reply.split(' '):
+                self.pulled += 1
+                yield word + ' '
+        finally:
+            self.closed = True
+
+    def cancel(self):
+        pass
+
+
+def quiet_bot(llm, interrupt_after=None):
+    """A VoiceToVoiceBot without devices or models whose _say records the sentences instead of speaking"""
+    bot = VoiceToVoiceBot.__new__(VoiceToVoiceBot)
+    bot.speaking = Flag()
+    bot.should_stop_speaking = False
+    bot.tts_tested = True
+    bot.session = SessionEngine(llm)
+    bot.said = []
+
+    def say(text, fixed=False, pause=0.0):
+        bot.said.append(text)
+        if len(bot.said) == interrupt_after:
+            bot.should_stop_speaking = True
+
+    bot._say = say
+    return bot
+
+
+def test_stops_pulling_after_cap():
+    """Once three sentences are out, nothing more is read from the model and its stream is closed"""
+    print("Testing the sentence cap...")
+    llm = FakeStreamLLM()
+    session = SessionEngine(llm)
+    sentences = list(session.stream_response("Tell me about chai"))
+
+    assert len(sentences) == 3, sentences
+    assert llm.closed
+    # Not a word past the third sentence (each token carries the space that ends it)
+    assert llm.pulled == len("Chai is great. Masala chai is better. Cutting chai is the best.".split()), llm.pulled
+    assert session.history[-1]['content'] == ' '.join(sentences)
+    print(f"✅ Read {llm.pulled} of {len(REPLY.split())} words")
+
+
+def test_interrupt_closes_stream():
+    """An interrupt after the first sentence closes the stream and keeps only what was spoken"""
+    print("Testing an interrupted stream...")
+    llm = FakeStreamLLM()
+    bot = quiet_bot(llm, interrupt_after=1)
+    spoken = bot.speak_stream(bot.stream_ollama_response("Tell me about chai"))
+
+    assert len(bot.said) == 1 and spoken.startswith("Chai is") and "Masala" not in spoken, spoken
+    assert llm.closed and llm.pulled < len(REPLY.split())
+    assert [m['content'] for m in bot.session.history] == ["Tell me about chai", spoken]
+    assert not bot.is_speaking
+    print(f"✅ Spoke '{spoken}', stopped reading after {llm.pulled} words")
+
+
+def test_barge_in_without_words_recovers():
+    """A barge-in that heard no words drops the cut-off reply, and the next one is spoken again"""
+    print("Testing a barge-in from a cough...")
+    bot = quiet_bot(FakeStreamLLM(), interrupt_after=1)
+    bot.pipeline = Pipeline()
+    bot.current_turn = None
+    turn = Turn("Tell me about chai")
+    bot.session.generate(turn, lambda item: bot._tts_stage(item, lambda output: True) or True)
+
+    assert len(bot.said) == 1 and bot.should_stop_speaking
+    bot._abandon_barge_in()
+    assert not bot.should_stop_speaking and not bot.is_speaking
+    assert bot.session.history[-1]['content'] == turn.spoken[0]
+
+    # Later sentences aren't dropped any more
+    bot._tts_stage((Turn("next"), "Sure thing."), lambda output: True)
+    assert bot.said[-1] == "Sure thing.", bot.said
+    print("✅ Listening and speaking normally again")
+
+
+def test_early_close_hangs_up_on_ollama():
+    """Through the real client, closing the sentence stream closes the HTTP stream mid-generation"""
+    print("Testing the HTTP stream against the Ollama stub...")
+    stub = StubOllama(token_delay=0.01, reply=lambda messages: REPLY * 3).start()
+    client = OllamaClient("stub", host=stub.url, initialize=False, summarize=False)
+    session = SessionEngine(client)
+    try:
+        sentences = list(session.stream_response("Tell me about chai"))
+        deadline = time.time() + 5
+        while not stub.completed and time.time() < deadline:
+            time.sleep(0.02)
+    finally:
+        stub.stop()
+
+    _, sent, total = stub.completed[0]
+    assert len(sentences) == 3 and sent < total / 2, (sent, total)
+    assert session.history[-1]['content'] == ' '.join(sentences)
+    print(f"✅ Ollama stopped after {sent} of {total} tokens")
+
+
+def main():
+    """Run all streaming tests"""
+    print("🧪 Testing Sentence Streaming")
+    print("=" * 50)
+
+    tests = [
+        test_stops_pulling_after_cap,
+        test_interrupt_closes_stream,
+        test_barge_in_without_words_recovers,
+        test_early_close_hangs_up_on_ollama
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print()
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for the text normalization shared by both bots
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ollama-bot', 'src'))
+
+from bot.text_normalization import (SentenceSegmenter, normalize_for_speech, remove_emojis,
+                                    segment_stream, split_sentences)
+
+REPLY = "Sure thing, Mr. Sharma! The answer is 3.5, e.g. about half. Want more? \"Yes.\" Okay"
+
+def test_sentence_splitting():
+    """Abbreviations, initials and decimals don't end a sentence"""
+    print("Testing sentence splitting...")
+    assert split_sentences(REPLY) == [
+        "Sure thing, Mr. Sharma!",
+        "The answer is 3.5, e.g. about half.",
+        "Want more?",
+        "\"Yes.\"",
+        "Okay"
+    ], split_sentences(REPLY)
+    assert split_sentences("Ask J. K. Rowling. She knows.") == ["Ask J. K. Rowling.", "She knows."]
+    assert split_sentences("Plan B. Then we go.") == ["Plan B.", "Then we go."]
+    assert split_sentences("I got a b. Not bad.") == ["I got a b.", "Not bad."]
+
+    # Words that are only sometimes abbreviations
+    assert split_sentences("Say no. I said no. OK then.") == ["Say no.", "I said no.", "OK then."]
+    assert split_sentences("It was in Jan. We left.") == ["It was in Jan.", "We left."]
+    assert split_sentences("Platform No. 5 on Jan. 3 works.") == ["Platform No. 5 on Jan. 3 works."]
+    assert split_sentences("Chai, coffee, etc. Both are great.") == ["Chai, coffee, etc.", "Both are great."]
+    assert split_sentences("Chai, coffee, etc. are great.") == ["Chai, coffee, etc. are great."]
+    print("✅ Sentences split correctly")
+
+def test_streaming_matches_whole_text():
+    """Feeding tokens one by one gives the same sentences, each as soon as it ends"""
+    print("Testing incremental segmentation...")
+    tokens = [REPLY[i:i + 3] for i in range(0, len(REPLY), 3)]
+    assert list(segment_stream(tokens)) == split_sentences(REPLY)
+
+    segmenter = SentenceSegmenter()
+    assert segmenter.feed("Price is 3.") == []  # could still be a decimal
+    assert segmenter.feed("5 dollars. Ok") == ["Price is 3.5 dollars."]
+    assert segmenter.flush() == "Ok"
+
+    assert segmenter.feed("I said no. ") == []  # "No. 5" or the end of the sentence?
+    assert segmenter.feed("Fine") == ["I said no."]
+    assert segmenter.flush() == "Fine"
+    print("✅ Streaming segmentation works")
+
+def test_speech_normalization():
+    """Numbers and symbols are spelled out, emojis are dropped"""
+    print("Testing TTS normalization...")
+    cases = {
+        "It's 24°C and 75% humid 😄": "It's twenty-four degrees Celsius and seventy-five percent humid",
+        "That costs ₹1,500 or $20.5": "That costs one thousand five hundred rupees or twenty point five dollars",
+        "See you at 5:30 on the 21st!": "See you at five thirty on the twenty-first!",
+        "Back in 1999, R&D was -5 + 2 🎉": "Back in nineteen ninety-nine, R and D was minus five plus two",
+    }
+    for text, expected in cases.items():
+        assert normalize_for_speech(text) == expected, normalize_for_speech(text)
+    assert remove_emojis("Café — naïve ⚠️ «quote»") == "Café naïve quote"
+    # Other scripts are words too; only the emojis go
+    assert remove_emojis("नमस्ते दोस्त 😀 你好 안녕 🇮🇳") == "नमस्ते दोस्त 你好 안녕"
+    print("✅ Speech text is clean")
+
+def main():
+    """Run all text normalization tests"""
+    print("=== Text Normalization Test Suite ===\n")
+
+    tests = [
+        test_sentence_splitting,
+        test_streaming_matches_whole_text,
+        test_speech_normalization
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n=== Test Results: {passed}/{len(tests)} tests passed ===")
+
+if __name__ == "__main__":
+    main()
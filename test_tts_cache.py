@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test script for ARKA's pre-synthesized speech cache
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ollama-bot', 'src'))
+
+import tempfile
+import time
+
+from bot.audio_output import AudioClip, PCMPlayer
+from bot.tts_cache import TTSAudioCache
+
+class FakeEngine:
+    """Stands in for pyttsx3: 'renders' 100 ms of silence per call"""
+
+    def __init__(self, rate=155):
+        self.properties = {'voice': 'arka', 'rate': rate, 'volume': 0.9}
+        self.rendered = []
+        self.pending = None
+
+    def getProperty(self, name):
+        return self.properties[name]
+
+    def save_to_file(self, text, path):
+        self.pending = (text, path)
+
+    def runAndWait(self):
+        text, path = self.pending
+        time.sleep(0.05)  # Synthesis takes time
+        AudioClip(b'\x00\x00' * 1600, 16000).to_wav(path)
+        self.rendered.append(text)
+
+class FakeStream:
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+
+class FakePyAudio:
+    """Stands in for the pyaudio module"""
+    stream = FakeStream()
+
+    def PyAudio(self):
+        return self
+
+    def get_format_from_width(self, width):
+        return width
+
+    def open(self, **kwargs):
+        return self.stream
+
+def test_fixed_phrase_rendered_once():
+    """A canned phrase is synthesized once and then loaded from disk, even by a new cache"""
+    print("Testing fixed phrases...")
+    directory = tempfile.mkdtemp()
+    engine = FakeEngine()
+    cache = TTSAudioCache(engine, directory=directory)
+    clip = cache.lookup("Hey there!", fixed=True)
+    assert clip is not None and abs(clip.duration - 0.1) < 1e-9
+    assert cache.lookup("Hey there!", fixed=True) is clip
+    assert engine.rendered == ["Hey there!"]
+
+    # Next start: straight from disk, no synthesis at all
+    engine = FakeEngine()
+    cache = TTSAudioCache(engine, directory=directory)
+    started = time.perf_counter()
+    assert cache.lookup("Hey there!", fixed=True) is not None
+    elapsed = time.perf_counter() - started
+    assert engine.rendered == []
+    print(f"✅ Cached phrase ready in {elapsed * 1000:.1f} ms; {cache.report()}")
+
+def test_repeated_sentences_and_voice_changes():
+    """Other sentences are rendered once repeated, and a different rate is a different clip"""
+    print("Testing repeated sentences...")
+    directory = tempfile.mkdtemp()
+    engine = FakeEngine()
+    cache = TTSAudioCache(engine, directory=directory, repeats=2)
+    assert cache.lookup("No worries, yaar.") is None
+    assert cache.lookup("No worries, yaar.") is not None
+    assert engine.rendered == ["No worries, yaar."]
+
+    faster = FakeEngine(rate=200)
+    assert TTSAudioCache(faster, directory=directory).lookup("No worries, yaar.", fixed=True) is not None
+    assert faster.rendered == ["No worries, yaar."]
+    print("✅ Repeats are cached per voice setting")
+
+def test_disk_is_pruned():
+    """Only max_files clips stay on disk"""
+    print("Testing disk limit...")
+    directory = tempfile.mkdtemp()
+    cache = TTSAudioCache(FakeEngine(), directory=directory, max_files=3)
+    cache.prewarm([f"phrase {i}" for i in range(5)])
+    assert len(os.listdir(directory)) == 3, os.listdir(directory)
+    print("✅ Disk cache stays bounded")
+
+def test_playback_stops_mid_clip():
+    """Playback is written in small chunks and stops as soon as it's asked to"""
+    print("Testing playback interrupt...")
+    player = PCMPlayer(chunk_ms=20, pyaudio_module=FakePyAudio())
+    clip = AudioClip(b'\x00\x00' * 16000, 16000)  # one second
+    assert player.play(clip)
+    assert len(FakePyAudio.stream.chunks) == 50
+
+    FakePyAudio.stream.chunks.clear()
+    assert not player.play(clip, lambda: len(FakePyAudio.stream.chunks) >= 3)
+    assert len(FakePyAudio.stream.chunks) == 3
+    print("✅ Stopped after 60 ms of audio")
+
+def main():
+    """Run all TTS cache tests"""
+    print("=== TTS Audio Cache Test Suite ===\n")
+
+    tests = [
+        test_fixed_phrase_rendered_once,
+        test_repeated_sentences_and_voice_changes,
+        test_disk_is_pruned,
+        test_playback_stops_mid_clip
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n=== Test Results: {passed}/{len(tests)} tests passed ===")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Test script for ARKA's TTS worker
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ollama-bot', 'src'))
+
+import threading
+import time
+
+from bot.audio_output import AudioClip, PCMPlayer
+from bot.tts_worker import TTSWorker
+
+class FakeEngine:
+    """Stands in for pyttsx3: renders 50 ms of audio per word, and checks which thread uses it"""
+
+    def __init__(self):
+        self.thread = threading.get_ident()
+        self.pending = None
+        self.rendered = []
+        self.said = []
+
+    def getProperty(self, name):
+        return 'fake'
+
+    def save_to_file(self, text, path):
+        assert threading.get_ident() == self.thread, "engine used from another thread"
+        self.pending = (text, path)
+
+    def runAndWait(self):
+        assert threading.get_ident() == self.thread, "engine used from another thread"
+        if self.pending is None:
+            return  # Spoke directly
+        text, path = self.pending
+        self.pending = None
+        AudioClip(b'\x00\x00' * 800 * len(text.split()), 16000).to_wav(path)
+        self.rendered.append(text)
+
+    def say(self, text):
+        assert threading.get_ident() == self.thread, "engine used from another thread"
+        self.said.append(text)
+
+class RealTimeStream:
+    """Output stream that takes as long to write as the audio lasts, like a sound card"""
+
+    def __init__(self):
+        self.written = 0
+
+    def write(self, data):
+        time.sleep(len(data) / 32000)
+        self.written += len(data)
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass
+
+class FakePyAudio:
+    def __init__(self):
+        self.stream = RealTimeStream()
+
+    def PyAudio(self):
+        return self
+
+    def get_format_from_width(self, width):
+        return width
+
+    def open(self, **kwargs):
+        return self.stream
+
+    def terminate(self):
+        pass
+
+class BrokenPyAudio(FakePyAudio):
+    """No usable output device: opening a stream fails"""
+
+    def open(self, **kwargs):
+        raise OSError("Invalid output device")
+
+def make_worker():
+    audio = FakePyAudio()
+    worker = TTSWorker(FakeEngine, player=PCMPlayer(pyaudio_module=audio), use_cache=False)
+    worker.start().wait_ready(timeout=5)
+    return worker, audio.stream
+
+def test_sentences_play_in_order():
+    """Queued sentences are all played, in order, without blocking the caller"""
+    print("Testing queued playback...")
+    worker, stream = make_worker()
+    started = time.perf_counter()
+    jobs = [worker.say(text) for text in ["one two", "three", "four five six"]]
+    queued_in = time.perf_counter() - started
+    assert queued_in < 0.01, queued_in
+    assert all(job.wait(timeout=5) for job in jobs)
+    assert worker.engine.rendered == ["one two", "three", "four five six"]
+    assert stream.written == 2 * 800 * 6
+    assert not worker.busy
+    worker.close()
+    print(f"✅ Queued 3 sentences in {queued_in * 1000:.2f} ms, all played")
+
+def test_stop_cuts_playback():
+    """stop() ends the sentence mid-buffer within 50 ms and drops the rest"""
+    print("Testing stop latency...")
+    worker, stream = make_worker()
+    long_job = worker.say("word " * 40)  # two seconds
+    next_job = worker.say("never heard")
+    long_job.started.wait(timeout=5)
+    time.sleep(0.2)
+
+    stopped_at = time.perf_counter()
+    worker.stop()
+    assert not long_job.wait(timeout=1)
+    latency = time.perf_counter() - stopped_at
+    written = stream.written
+    time.sleep(0.1)
+    assert stream.written == written, "playback continued after stop"
+    assert not next_job.wait(timeout=1) and not next_job.started.is_set()
+    assert latency < 0.05, latency
+
+    # The worker keeps going afterwards
+    assert worker.speak("back again", pause=0.01)
+    worker.close()
+    print(f"✅ Stopped {latency * 1000:.1f} ms after the interrupt")
+
+def test_playback_failure_keeps_order():
+    """When the output device fails, every sentence is spoken directly, still in order"""
+    print("Testing playback failure fallback...")
+    worker = TTSWorker(FakeEngine, player=PCMPlayer(pyaudio_module=BrokenPyAudio()), use_cache=False)
+    worker.start().wait_ready(timeout=5)
+    texts = ["one", "two three", "four", "five six", "seven"]
+    jobs = [worker.say(text) for text in texts]
+    assert all(job.wait(timeout=5) for job in jobs)
+    assert worker.engine.said == texts, worker.engine.said
+    assert not worker.busy
+    worker.close()
+    print(f"✅ Spoke {len(texts)} sentences directly, in order")
+
+class SpeakOnlyEngine(FakeEngine):
+    """A driver that can't render to files, only speak"""
+
+    def save_to_file(self, text, path):
+        raise RuntimeError("no file output")
+
+def test_engine_without_file_output_speaks_directly():
+    """Sentences the engine can't render are spoken by it, on its own thread, in order"""
+    print("Testing direct speech...")
+    worker = TTSWorker(SpeakOnlyEngine, player=PCMPlayer(pyaudio_module=FakePyAudio()), use_cache=False)
+    worker.start().wait_ready(timeout=5)
+    texts = ["one", "two three", "four"]
+    assert all(worker.say(text).wait(timeout=5) for text in texts)
+    assert worker.engine.said == texts and not worker.file_output
+    worker.close()
+    print("✅ Spoke 3 sentences directly")
+
+def main():
+    """Run all TTS worker tests"""
+    print("=== TTS Worker Test Suite ===\n")
+
+    tests = [
+        test_sentences_play_in_order,
+        test_stop_cuts_playback,
+        test_playback_failure_keeps_order,
+        test_engine_without_file_output_speaks_directly
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n=== Test Results: {passed}/{len(tests)} tests passed ===")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for ARKA's voice activity detector (uses synthetic audio, no microphone)
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ollama-bot', 'src'))
+
+import tempfile
+
+import numpy as np
+
+from bot.calibration import NoiseCalibration
+from bot.vad import VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+
+def make_audio():
+    """One second of quiet noise, one second of a voiced tone, one second of quiet noise"""
+    rng = np.random.default_rng(0)
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    silence = (rng.standard_normal(SAMPLE_RATE) * 30).astype(np.int16)
+    voice = (np.sin(2 * np.pi * 200 * t) * 3000).astype(np.int16)
+    return np.concatenate([silence, voice, silence]).tobytes()
+
+def test_trim_removes_silence():
+    """Leading and trailing silence are cut before audio goes to ASR"""
+    print("Testing silence trimming...")
+    vad = VoiceActivityDetector(SAMPLE_RATE)
+    trimmed = vad.trim(make_audio(), padding_ms=100)
+    seconds = len(trimmed) / 2 / SAMPLE_RATE
+    assert 1.0 <= seconds <= 1.3, seconds
+    assert vad.trim(make_audio()[:SAMPLE_RATE * 2]) == b""  # first second is silence only
+    print(f"✅ Kept {seconds:.2f}s of 3s")
+
+def test_hangover_ends_segment():
+    """Speech state turns on after the onset and off after the hangover"""
+    print("Testing onset and hangover...")
+    vad = VoiceActivityDetector(SAMPLE_RATE, frame_ms=20, onset_ms=100, hangover_ms=300)
+    pcm = make_audio()
+    states = []
+    for i in range(0, len(pcm), 2048):
+        states += vad.process(pcm[i:i + 2048])
+
+    start_ms = states.index(True) * 20
+    end_ms = (len(states) - states[::-1].index(True)) * 20
+    assert 1000 <= start_ms <= 1150, start_ms
+    assert 2000 <= end_ms <= 2350, end_ms
+    print(f"✅ Speech from {start_ms} ms to {end_ms} ms")
+
+def test_spectral_flatness_rejects_noise():
+    """Loud white noise is not speech when spectral flatness is enabled"""
+    print("Testing spectral flatness...")
+    rng = np.random.default_rng(1)
+    noise = (rng.standard_normal(SAMPLE_RATE) * 3000).astype(np.int16).tobytes()
+    vad = VoiceActivityDetector(SAMPLE_RATE, use_spectral_flatness=True)
+    assert not vad.contains_speech(noise)
+    print("✅ Loud hiss ignored")
+
+def test_calibration_is_saved_per_device():
+    """A learned noise floor is reused on the next start instead of measuring again"""
+    print("Testing saved calibration...")
+
+    class FakeMicrophone:
+        SAMPLE_RATE = SAMPLE_RATE
+        device_index = 3
+
+    class FakeCapture:
+        def record(self, seconds):
+            return make_audio()[:int(SAMPLE_RATE * seconds)]
+
+    path = os.path.join(tempfile.mkdtemp(), 'calibration.json')
+    vad = VoiceActivityDetector(SAMPLE_RATE)
+    NoiseCalibration(FakeMicrophone(), vad, path=path).measure(FakeCapture(), 2)
+    assert vad.noise_floor is not None
+
+    fresh = VoiceActivityDetector(SAMPLE_RATE)
+    assert NoiseCalibration(FakeMicrophone(), fresh, path=path).restore()
+    assert fresh.noise_floor == vad.noise_floor
+
+    assert not NoiseCalibration(FakeMicrophone(), fresh, path=path, max_age=-1).restore()
+    FakeMicrophone.device_index = 4
+    assert not NoiseCalibration(FakeMicrophone(), VoiceActivityDetector(SAMPLE_RATE), path=path).restore()
+    print(f"✅ Restored noise floor {fresh.noise_floor:.1f}")
+
+def main():
+    """Run all VAD tests"""
+    print("=== VAD Test Suite ===\n")
+
+    tests = [
+        test_trim_removes_silence,
+        test_hangover_ends_segment,
+        test_spectral_flatness_rejects_noise,
+        test_calibration_is_saved_per_device
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n=== Test Results: {passed}/{len(tests)} tests passed ===")
+
+if __name__ == "__main__":
+    main()
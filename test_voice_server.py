@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test script for ARKA's WebSocket voice server, driven by simulated clients
+(no microphone, speakers, Ollama or speech models needed)
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ollama-bot', 'src'))
+
+import asyncio
+
+from simulate_clients import check_isolation, run_client, run_clients, stub_models
+from bot.voice_server import VoiceServer
+
+
+def start_server(**kwargs) -> VoiceServer:
+    return VoiceServer(stub_models(), port=0, **kwargs).start()
+
+
+def test_sessions_are_isolated():
+    """Concurrent callers each get replies built from their own history only"""
+    print("Testing concurrent sessions...")
+    server = start_server(max_sessions=4)
+    try:
+        results = asyncio.run(run_clients(f"ws://127.0.0.1:{server.port}", clients=3, turns=2))
+    finally:
+        server.stop()
+
+    assert all(r['status'] == 'ok' for r in results), results
+    problems = check_isolation(results)
+    assert not problems, problems
+    latencies = [t['latency'] for r in results for t in r['turns']]
+    assert all(latency is not None and latency < 2.0 for latency in latencies), latencies
+    assert server.peak == 3 and not server.sessions
+    print(f"✅ 3 callers, 6 replies, slowest first audio after {max(latencies) * 1000:.0f} ms")
+
+
+def test_admission_control():
+    """Past max_sessions a caller waits for a free slot, then is told the server is busy"""
+    print("Testing admission control...")
+    server = start_server(max_sessions=1, admission_timeout=0.3)
+    url = f"ws://127.0.0.1:{server.port}"
+
+    async def scenario():
+        first = asyncio.create_task(run_client(url, 2, turns=0, hold=1.0))
+        await asyncio.sleep(0.2)
+        second = await run_client(url, 3, turns=0)
+        return await first, second, await run_client(url, 4, turns=1)
+
+    try:
+        first, second, third = asyncio.run(scenario())
+    finally:
+        server.stop()
+
+    assert first['status'] == 'ok'
+    assert second['status'] == 'busy'
+    assert third['status'] == 'ok' and "caller 4" in third['turns'][0]['reply']
+    assert (server.admitted, server.rejected, server.peak) == (2, 1, 1)
+    print("✅ Second caller turned away, third admitted once the slot was free")
+
+
+def test_barge_in_stops_reply():
+    """Talking over ARKA stops the reply on the server right away"""
+    print("Testing barge-in over the network...")
+    server = start_server(max_sessions=2)
+    try:
+        result = asyncio.run(run_client(f"ws://127.0.0.1:{server.port}", 2, turns=0, barge_in=True))
+    finally:
+        server.stop()
+
+    assert result['barge_in'] is not None, "server never said stop"
+    assert result['barge_in'] < 0.5, result['barge_in']
+    print(f"✅ Reply stopped {result['barge_in'] * 1000:.0f} ms after speech onset")
+
+
+def main():
+    """Run all voice server tests"""
+    print("🧪 Testing ARKA Voice Server")
+    print("=" * 50)
+
+    tests = [
+        test_sessions_are_isolated,
+        test_admission_control,
+        test_barge_in_stops_reply
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print()
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -6,56 +6,159 @@ An offline bot that speaks with users, understands requirements, and replies bas
 
 import speech_recognition as sr
 import pyttsx3
-import ollama
 import threading
-import queue
-import time
 import sys
-import re
-from typing import Optional, Dict, Any
+import os
+import collections
+from typing import Optional, Iterator, List
+
+# Shared building blocks live in the ollama-bot package
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ollama-bot', 'src'))
+
+# Load .env before the bot modules read their settings
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    print("python-dotenv not installed. Skipping .env file loading.")
+
+from bot.asr import Endpointer, create_asr_backend
+from bot.audio_capture import AudioSource, MicrophoneCapture
+from bot.audio_output import AudioSink, PCMPlayer
+from bot.barge_in import BargeInMonitor, PlaybackReference
+from bot.calibration import NoiseCalibration
+from bot.events import EventQueue, Flag
+from bot.ollama_client import OllamaClient
+from bot.pipeline import Pipeline, Turn
+from bot.scheduler import PRIORITY_BACKGROUND, PRIORITY_URGENT
+from bot.session import ARKA_VOICE_PROMPT, ARKA_GREETING, ARKA_FAREWELL, CANNED_PHRASES, SessionEngine
+from bot.startup import StartupOrchestrator
+from bot.summarizer import RollingSummarizer
+from bot.text_normalization import normalize_for_speech, split_sentences
+from bot.tts_worker import TTSWorker
+from bot.vad import VoiceActivityDetector
+from config import settings
+
 
 class VoiceToVoiceBot:
-    def __init__(self, model_name: str = "gemma3:latest"):
+    def __init__(self, model_name: str = "gemma3:latest", stream_responses: bool = True,
+                 asr_engine: Optional[str] = None, source: Optional[AudioSource] = None,
+                 sink: Optional[AudioSink] = None):
         """
         Initialize the Voice-to-Voice Bot
         
         Args:
             model_name: Name of the Ollama model to use (default: gemma3:latest)
+            stream_responses: Speak each sentence as soon as the model produces it
+            asr_engine: Speech recognition engine (default: ASR_ENGINE setting, offline Vosk)
+            source: Where the user's voice comes from (default: the local microphone)
+            sink: Where ARKA's voice goes (default: the local speakers)
         """
         self.model_name = model_name
         self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
-        self.tts_engine = pyttsx3.init()
-        self.conversation_history = []
+        self.asr = None
+        # Local devices are only opened when no other source/sink was given
+        self.microphone = sr.Microphone() if source is None else None
+        self.capture = source if source is not None else MicrophoneCapture(self.microphone)
+        self.vad = VoiceActivityDetector(sample_rate=self.capture.sample_rate)
+        self.calibration = None
+        self.tts_engine = None
+        # Everything ARKA plays is kept as the echo reference for barge-in detection
+        self.echo_reference = PlaybackReference(self.capture)
+        if sink is None:
+            sink = PCMPlayer(reference=self.echo_reference)
+        # The engine lives on the worker's thread; canned phrases are pre-rendered while idle
+        self.tts = TTSWorker(self._create_tts_engine, player=sink,
+                             prewarm=[s for phrase in CANNED_PHRASES for s in self._speech_sentences(phrase)])
+        # Pooled client whose requests can be cancelled when the user interrupts
+        self.llm = OllamaClient(model_name, initialize=False, summarize=False)
+        # History, prompting, post-processing and commands; no audio in there
+        self.session = SessionEngine(self.llm, ARKA_VOICE_PROMPT, stream_responses=stream_responses)
+        self.conversation_history = self.session.history
         self.is_listening = False
-        self.audio_queue = queue.Queue()
         
-        # Voice interrupt detection
-        self.is_speaking = False
+        # Staged capture -> ASR -> LLM -> TTS pipeline (built in run)
+        self.pipeline = None
+        self.current_turn = None
+        
+        # Voice interrupt detection. Listeners post captured speech and
+        # interrupts to the event queue; the main loop sleeps until one arrives.
+        self.speaking = Flag()
         self.should_stop_speaking = False
-        self.interrupt_queue = queue.Queue()
+        self.events = EventQueue()
         self.background_listening = False
-        
-        # Configure TTS settings
-        self._configure_tts()
-        
-        # Test Ollama connection
-        self._test_ollama_connection()
+
+        # Old turns are summarized while nothing else needs the model, behind
+        # every reply someone is listening for (woken through self.speaking,
+        # which the pipeline also notifies)
+        self.summarizer = None
+        if settings.SUMMARIZE_HISTORY:
+            self.summarizer = RollingSummarizer(self.conversation_history,
+                                                lambda messages: self.llm.chat(messages, PRIORITY_BACKGROUND),
+                                                idle=self._is_idle, activity=self.speaking)
+
+        # Stops ARKA the moment the user talks over it (echo-cancelled VAD, no ASR needed)
+        # (only against the local speakers: other sinks aren't on the microphone's clock)
+        self.barge_in = None
+        if settings.BARGE_IN_AEC and sink.reference is self.echo_reference:
+            self.barge_in = BargeInMonitor(self.capture, self.echo_reference, self.vad,
+                                           active=self._barge_in_active, on_barge_in=self._stop_speaking,
+                                           speaking=self.speaking)
+        
+        # TTS setup, Ollama readiness, speech model loading and noise
+        # calibration run at the same time; measuring the noise waits for
+        # the TTS audio test, so ARKA's voice isn't taken for background noise
+        self.startup = StartupOrchestrator()
+        self.startup.add('tts', self._init_tts)
+        self.startup.add('ollama', self._test_ollama_connection)
+        self.startup.add('asr', lambda: self._init_asr(asr_engine))
+        self.startup.add('microphone', self._init_microphone)
+        self.startup.run()
         
         print(f"Voice-to-Voice Bot initialized with model: {self.model_name}")
-        print("Adjusting for ambient noise and optimizing for sentence capture...")
-        with self.microphone as source:
-            # Adjust for ambient noise with longer duration for better accuracy
-            self.recognizer.adjust_for_ambient_noise(source, duration=2)
-            
-            # Optimize recognizer settings for better sentence capture
-            self.recognizer.energy_threshold = 4000  # Higher threshold to avoid noise
-            self.recognizer.dynamic_energy_threshold = True
-            self.recognizer.pause_threshold = 0.8  # Longer pause detection for complete sentences
-            self.recognizer.operation_timeout = None  # No timeout for better sentence capture
-            
         print("ARKA is ready to chat with improved sentence recognition!")
 
+    @property
+    def is_speaking(self) -> bool:
+        """True while ARKA is talking (self.speaking can be waited on)"""
+        return self.speaking.is_set()
+
+    @is_speaking.setter
+    def is_speaking(self, value: bool):
+        self.speaking.set(value)
+
+    def _init_tts(self):
+        """Start the TTS worker and wait until its engine is set up"""
+        self.tts.start().wait_ready()
+
+    def _create_tts_engine(self):
+        """Create and configure ARKA's voice (runs on the TTS worker's thread)"""
+        self.tts_engine = pyttsx3.init()
+        self._configure_tts()
+        return self.tts_engine
+
+    def _init_asr(self, asr_engine: Optional[str]):
+        """Load the speech recognition model"""
+        self.asr = create_asr_backend(asr_engine)
+
+    def _init_microphone(self):
+        """Open the shared microphone stream and learn the background noise level"""
+        # One long-lived microphone stream feeds every listener
+        self.capture.start()
+        if self.microphone is None:
+            return  # Files, buffers and sockets: nothing to calibrate
+        
+        # Reuse this microphone's saved noise level, or measure it (longer duration for better accuracy)
+        self.calibration = NoiseCalibration(self.microphone, self.vad)
+        if not self.calibration.restore():
+            # ARKA's audio test would be measured as background noise (and saved), so wait for it
+            self.startup.wait('tts')
+            print("Adjusting for ambient noise and optimizing for sentence capture...")
+            self.calibration.measure(self.capture, 2)
+        
+        # The detector keeps refining the noise level while listening; keep saving it
+        self.calibration.start()
+
     def _configure_tts(self):
         """Configure Text-to-Speech settings for natural Indian male voice"""
         voices = self.tts_engine.getProperty('voices')
@@ -122,29 +225,32 @@ class VoiceToVoiceBot:
         except:
             pass  # Ignore if properties not supported
         
+        if settings.FAST_STARTUP:
+            # Don't block startup on speech: the greeting doubles as the audio test
+            self.tts_tested = False
+            return
+        
         # Test TTS to ensure audio is working
         print("Testing audio output...")
         self.tts_engine.say("Audio test")
         self.tts_engine.runAndWait()
         print("Audio test completed - you should have heard 'Audio test'")
+        self.tts_tested = True
 
     def _test_ollama_connection(self):
         """Test connection to Ollama and pull model if needed"""
         try:
-            # Check if model is available
-            models = ollama.list()
-            model_names = [model.model for model in models.models]
+            # Check if model is available (fast startup trusts a recent cached check)
+            self.llm.ensure_model(on_pull=self._announce_download, use_cache=settings.FAST_STARTUP)
             
-            if self.model_name not in model_names:
-                print(f"Model {self.model_name} not found. Pulling model...")
-                self.speak(f"Downloading {self.model_name} model. This may take a while...")
-                ollama.pull(self.model_name)
-                print(f"Model {self.model_name} downloaded successfully!")
+            if settings.FAST_STARTUP:
+                # Load the model while we calibrate the microphone and greet the user
+                self.llm.preload()
+                print("Ollama model found - loading it in the background")
+                return
             
             # Test the model with a simple query
-            response = ollama.chat(model=self.model_name, messages=[
-                {'role': 'user', 'content': 'Hello, can you hear me?'}
-            ])
+            self.llm.chat([{'role': 'user', 'content': 'Hello, can you hear me?'}])
             print("Ollama connection successful!")
             
         except Exception as e:
@@ -152,8 +258,30 @@ class VoiceToVoiceBot:
             print("Please make sure Ollama is installed and running.")
             sys.exit(1)
 
-    def speak(self, text: str):
-        """Convert text to speech with interrupt detection"""
+    def _announce_download(self):
+        """Tell the user a model download is starting (once TTS setup and noise calibration have finished)"""
+        print(f"Downloading {self.model_name} model. This may take a while...")
+        try:
+            self.startup.wait('tts')
+            self.startup.wait('microphone')  # Don't speak over the noise measurement
+            self.speak(f"Downloading {self.model_name} model. This may take a while...")
+        except Exception as e:
+            print(f"TTS not available for the download notice: {e}")
+
+    def _speech_sentences(self, text: str) -> List[str]:
+        """Split text into the sentences spoken one at a time, normalized for TTS"""
+        # Sentences are natural interrupt points; emojis are only kept in printed text
+        sentences = (normalize_for_speech(sentence) for sentence in split_sentences(text))
+        return [sentence for sentence in sentences if sentence]
+
+    def speak(self, text: str, fixed: bool = False):
+        """
+        Convert text to speech with interrupt detection
+        
+        Args:
+            text: What to say
+            fixed: A canned phrase, played from the TTS audio cache
+        """
         print(f"\n🗣️  ARKA: {text}")
         print("     (You can interrupt me anytime by speaking!)")
         
@@ -161,54 +289,29 @@ class VoiceToVoiceBot:
             self.is_speaking = True
             self.should_stop_speaking = False
             
-            # Remove emojis from text for speech (keep them only in printed text)
-            speech_text = self._remove_emojis(text)
-            
-            # Split text into sentences for natural interrupt points
-            import re
-            sentences = re.split(r'[.!?]+', speech_text)
-            sentences = [s.strip() for s in sentences if s.strip()]
+            sentences = self._speech_sentences(text)
             
             for i, sentence in enumerate(sentences):
                 if self.should_stop_speaking:
                     break
                     
                 if sentence:
-                    # Add punctuation back
-                    if i < len(sentences) - 1:
-                        sentence += "."
-                    
                     print(f"🎵 Speaking: {sentence}")
                     
-                    # Speak sentence with monitoring
-                    self.tts_engine.say(sentence)
-                    
-                    # Use a more compatible approach - monitor isBusy()
-                    start_time = time.time()
-                    self.tts_engine.runAndWait()
+                    # Speak sentence with monitoring, then a natural pause (cut short by an interrupt)
+                    self._say(sentence, fixed, pause=0.3 if i < len(sentences) - 1 else 0.0)
                     
                     # Check for interrupt after each sentence
                     if self.should_stop_speaking:
                         print("\n🛑 ARKA stopped - processing your interrupt...")
                         break
-                    
-                    # Natural pause between sentences
-                    if i < len(sentences) - 1:
-                        pause_time = 0.3
-                        pause_start = time.time()
-                        while time.time() - pause_start < pause_time and not self.should_stop_speaking:
-                            time.sleep(0.1)
-                        
-                        if self.should_stop_speaking:
-                            break
                             
         except Exception as e:
             print(f"TTS error: {e}")
             # Simple fallback
             try:
                 if not self.should_stop_speaking:
-                    self.tts_engine.say(text)
-                    self.tts_engine.runAndWait()
+                    self._say(text)
             except:
                 print("Could not produce speech audio. Check your speakers/volume.")
         finally:
@@ -218,78 +321,232 @@ class VoiceToVoiceBot:
             else:
                 print("✅ ARKA stopped for your interrupt\n")
 
+    def _say(self, text: str, fixed: bool = False, pause: float = 0.0):
+        """
+        Speak one piece of text and wait until it was played or interrupted
+        
+        The TTS worker synthesizes and plays it on its own threads; canned
+        phrases and sentences ARKA keeps repeating come from its audio cache.
+        The pause after it is waited out by the worker, which stop() wakes.
+        """
+        self.tts.speak(text, fixed, pause)
+        if not self.tts_tested:
+            self.tts_tested = True
+            print("Audio test completed - you should have heard ARKA speak")
+
+    def _stop_speaking(self):
+        """Cut ARKA off right away: the sentence playing stops within a few milliseconds"""
+        self.should_stop_speaking = True
+        self.tts.stop()
+
+    def _barge_in_active(self) -> bool:
+        """Barge-in detection needs ARKA's audio as a reference, so only while the worker plays PCM"""
+        return self.is_speaking and self.tts.file_output
+
+    def speak_stream(self, sentences: Iterator[str]) -> str:
+        """
+        Speak sentences as they arrive, while the model keeps generating the rest
+        
+        Args:
+            sentences: Iterator of sentences, e.g. from stream_ollama_response
+            
+        Returns:
+            The text that was actually spoken
+        """
+        print("\n🗣️  ARKA is replying...")
+        print("     (You can interrupt me anytime by speaking!)")
+        
+        spoken = []
+        try:
+            self.is_speaking = True
+            self.should_stop_speaking = False
+            
+            for sentence in sentences:
+                if self.should_stop_speaking:
+                    break
+                
+                print(f"🎵 Speaking: {sentence}")
+                
+                # Spell out numbers and drop emojis for speech (keep them in printed text)
+                speech_text = normalize_for_speech(sentence)
+                if speech_text:
+                    self._say(speech_text)
+                spoken.append(sentence)
+                
+                # Check for interrupt after each sentence
+                if self.should_stop_speaking:
+                    print("\n🛑 ARKA stopped - processing your interrupt...")
+                    break
+                    
+        except Exception as e:
+            print(f"TTS error: {e}")
+        finally:
+            # Closing the generator stops the model from generating more text
+            if hasattr(sentences, 'close'):
+                sentences.close()
+            self.is_speaking = False
+            if not self.should_stop_speaking:
+                print("✅ ARKA finished speaking\n")
+            else:
+                print("✅ ARKA stopped for your interrupt\n")
+        
+        return ' '.join(spoken)
+
+    def listen_streaming(self):
+        """
+        Recognize speech while the user is still talking
+        
+        Reads the microphone chunk by chunk and feeds speech chunks straight into
+        the streaming recognizer. The VAD keeps silence away from the recognizer
+        and ends the utterance shortly after the user stops talking; partial
+        hypotheses decide whether a short phrase is complete.
+        
+        While ARKA speaks, the microphone also picks up its voice, so what is
+        recognized then only counts as an interrupt once the echo-cancelled
+        BargeInMonitor has stopped ARKA. Without a playback reference (no
+        monitor) ARKA can't be interrupted with a streaming engine.
+        """
+        endpointer = Endpointer()
+        reader = self.capture.reader()
+        chunk_size = self.capture.chunk_size
+        
+        while self.is_listening:
+            try:
+                print("🎤 Listening... (speak now - say your complete sentence)")
+                session = self.asr.start_stream(self.capture.sample_rate)
+                endpointer.reset()
+                self.vad.reset()
+                hypothesis = None
+                last_partial = ""
+                quiet = 0.0  # Seconds without words since a barge-in
+                
+                # Keep ~300 ms before the speech onset so the first word isn't clipped
+                preroll = collections.deque(maxlen=max(1, int(0.3 * self.capture.sample_rate / chunk_size)))
+                
+                while self.is_listening:
+                    chunk = reader.read(chunk_size, timeout=1.0)
+                    if chunk is None:
+                        continue
+                    states = self.vad.process(chunk)
+                    in_speech = states[-1] if states else self.vad.in_speech
+                    
+                    if self.should_stop_speaking and not in_speech and not endpointer.text:
+                        # Stopped by a barge-in but nobody is talking: it was a cough or a door
+                        quiet += chunk_size / self.capture.sample_rate
+                        if quiet >= 0.5:
+                            self.events.post('speech_done')
+                            quiet = 0.0
+                    else:
+                        quiet = 0.0
+                    
+                    if not in_speech and not endpointer.text:
+                        # Silence before the user starts: don't send it to the recognizer
+                        preroll.append(chunk)
+                        continue
+                    
+                    while preroll:
+                        session.accept(preroll.popleft().tobytes())
+                    hypothesis = session.accept(chunk.tobytes())
+                    
+                    if hypothesis is not None and hypothesis.text and hypothesis.text != last_partial:
+                        last_partial = hypothesis.text
+                        print(f"   … {last_partial}")
+                    
+                    if endpointer.update(hypothesis, in_speech=in_speech):
+                        break
+                
+                text = endpointer.text if hypothesis is not None and hypothesis.final else session.finish().text
+                
+                if not text:
+                    continue
+                
+                if self.should_stop_speaking:
+                    # The echo-cancelled monitor heard the user talk over ARKA
+                    self.events.post('interrupt', text)
+                    print(f"\n🛑 Interrupted! Full sentence: '{text}'")
+                elif self.is_speaking:
+                    # Raw microphone audio while ARKA talks is mostly its own voice
+                    # from the speakers, so only the echo-cancelled monitor may interrupt
+                    print(f"   (ignored while ARKA speaks: '{text}')")
+                else:
+                    turn = self._handle_transcript(text)
+                    if turn is not None:
+                        self.events.post('capture', turn)
+                        
+            except Exception as e:
+                if self.is_listening:
+                    print(f"Error in streaming recognition: {e}")
+                continue
+
     def listen_for_audio(self):
         """Listen for audio input and add to queue, plus interrupt detection"""
+        reader = self.capture.reader()
+        interrupt_thread = None
+        
         while self.is_listening:
             try:
-                with self.microphone as source:
-                    # If ARKA is speaking, listen for interrupts with better sentence capture
-                    if self.is_speaking:
-                        try:
-                            # Listen for a reasonable amount of time to capture full sentences
-                            audio = self.recognizer.listen(source, timeout=0.5, phrase_time_limit=4.0)
-                            
-                            # Process interrupt with full sentence capture
-                            def process_full_interrupt():
-                                try:
-                                    # Use longer timeout for better sentence recognition
-                                    interrupted_text = self.recognizer.recognize_google(
-                                        audio, 
-                                        language='en-IN', 
-                                        show_all=False
-                                    )
+                # If ARKA is speaking (or was just cut off by a barge-in), listen for interrupts with better sentence capture
+                if self.is_speaking or self.should_stop_speaking:
+                    try:
+                        # Listen for a reasonable amount of time to capture full sentences
+                        audio = reader.listen(self.vad, timeout=0.5, phrase_time_limit=4.0)
+                        
+                        # Keep listening for more speech from exactly where this phrase ended
+                        follow_up = reader.fork()
+                        
+                        # Process interrupt with full sentence capture
+                        def process_full_interrupt(audio=audio, follow_up=follow_up):
+                            try:
+                                # Use longer timeout for better sentence recognition
+                                interrupted_text = self.asr.transcribe(audio)
+                                
+                                if interrupted_text and len(interrupted_text.strip()) >= 3:
+                                    # Valid interrupt with meaningful content!
+                                    self._stop_speaking()
                                     
-                                    if interrupted_text and len(interrupted_text.strip()) >= 3:
-                                        # Valid interrupt with meaningful content!
-                                        self.should_stop_speaking = True
-                                        
-                                        # Clean up the text
-                                        clean_text = interrupted_text.strip()
-                                        
-                                        # Wait a moment for any additional speech
-                                        time.sleep(0.5)
-                                        
-                                        # Check if there's more speech coming
-                                        try:
-                                            additional_audio = self.recognizer.listen(
-                                                source, 
-                                                timeout=1.0, 
-                                                phrase_time_limit=2.0
-                                            )
-                                            additional_text = self.recognizer.recognize_google(
-                                                additional_audio, 
-                                                language='en-IN'
-                                            )
-                                            if additional_text:
-                                                clean_text += " " + additional_text.strip()
-                                        except:
-                                            pass  # No additional speech, continue with what we have
-                                        
-                                        self.interrupt_queue.put(clean_text)
-                                        print(f"\n🛑 Interrupted! Full sentence: '{clean_text}'")
-                                        
-                                except sr.UnknownValueError:
-                                    # Not clear speech, ignore
-                                    pass
-                                except sr.RequestError as e:
-                                    print(f"Speech recognition error during interrupt: {e}")
-                                except Exception as e:
-                                    print(f"Error processing interrupt: {e}")
-                            
-                            # Process interrupt in background thread
-                            interrupt_thread = threading.Thread(target=process_full_interrupt, daemon=True)
-                            interrupt_thread.start()
-                            
-                        except sr.WaitTimeoutError:
-                            # No interrupt detected, continue monitoring
-                            pass
-                    else:
-                        # Normal listening when ARKA is not speaking - capture full sentences
-                        print("🎤 Listening... (speak now - say your complete sentence)")
+                                    # Clean up the text
+                                    clean_text = interrupted_text.strip()
+                                    
+                                    # Check if there's more speech coming
+                                    try:
+                                        additional_audio = follow_up.listen(
+                                            self.vad.clone(), 
+                                            timeout=1.0, 
+                                            phrase_time_limit=2.0
+                                        )
+                                        additional_text = self.asr.transcribe(additional_audio)
+                                        if additional_text:
+                                            clean_text += " " + additional_text.strip()
+                                    except:
+                                        pass  # No additional speech, continue with what we have
+                                    
+                                    self.events.post('interrupt', clean_text)
+                                    print(f"\n🛑 Interrupted! Full sentence: '{clean_text}'")
+                                    
+                            except sr.UnknownValueError:
+                                # Not clear speech, ignore
+                                pass
+                            except sr.RequestError as e:
+                                print(f"Speech recognition error during interrupt: {e}")
+                            except Exception as e:
+                                print(f"Error processing interrupt: {e}")
                         
-                        # Use longer phrase time limit for complete sentences
-                        audio = self.recognizer.listen(source, timeout=None, phrase_time_limit=10)
-                        self.audio_queue.put(audio)
+                        # Process interrupt in background thread
+                        interrupt_thread = threading.Thread(target=process_full_interrupt, daemon=True)
+                        interrupt_thread.start()
+                        
+                    except sr.WaitTimeoutError:
+                        # No interrupt detected, continue monitoring
+                        if self.should_stop_speaking and not (interrupt_thread and interrupt_thread.is_alive()):
+                            # A barge-in that nobody followed up on: let the main loop listen again
+                            self.events.post('speech_done')
+                else:
+                    # Normal listening when ARKA is not speaking - capture full sentences
+                    print("🎤 Listening... (speak now - say your complete sentence)")
+                    
+                    # Use longer phrase time limit for complete sentences
+                    audio = reader.listen(self.vad, timeout=None, phrase_time_limit=10)
+                    self.events.post('capture', audio)
                         
             except sr.WaitTimeoutError:
                 continue
@@ -301,12 +558,12 @@ class VoiceToVoiceBot:
     def speech_to_text(self, audio) -> Optional[str]:
         """Convert speech to text with improved error handling and sentence completion"""
         try:
-            # Use Google's speech recognition with language hint for better accuracy
-            text = self.recognizer.recognize_google(
-                audio, 
-                language='en-IN', 
-                show_all=False
-            )
+            # Use the configured recognition engine (local by default)
+            text = self.asr.transcribe(audio)
+            
+            if not text:
+                print("🔊 I couldn't understand that clearly. Could you speak a bit louder and clearer?")
+                return None
             
             if text:
                 # Clean and validate the text
@@ -323,19 +580,15 @@ class VoiceToVoiceBot:
                         
                         # Try to capture additional speech
                         try:
-                            with self.microphone as source:
-                                additional_audio = self.recognizer.listen(
-                                    source, 
-                                    timeout=2.0, 
-                                    phrase_time_limit=3.0
-                                )
-                                additional_text = self.recognizer.recognize_google(
-                                    additional_audio, 
-                                    language='en-IN'
-                                )
-                                if additional_text:
-                                    clean_text += " " + additional_text.strip()
-                                    print(f"✅ Completed sentence: '{clean_text}'")
+                            additional_audio = self.capture.reader().listen(
+                                self.vad.clone(), 
+                                timeout=2.0, 
+                                phrase_time_limit=3.0
+                            )
+                            additional_text = self.asr.transcribe(additional_audio)
+                            if additional_text:
+                                clean_text += " " + additional_text.strip()
+                                print(f"✅ Completed sentence: '{clean_text}'")
                         except:
                             # No additional speech, use what we have
                             pass
@@ -358,256 +611,220 @@ class VoiceToVoiceBot:
 
     def get_ollama_response(self, user_input: str) -> str:
         """Get response from Ollama model as ARKA"""
-        try:
-            # Add context about being ARKA - a friendly, humorous, respectful 25-year-old Indian guy
-            system_prompt = """You are ARKA, a friendly and humorous 25-year-old Indian guy who's respectful and fun to chat with.
-
-Your personality traits:
-- Keep responses SHORT and concise (2-3 sentences max, under 80 words)
-- Be genuinely respectful - use "sir/madam" occasionally, show appreciation for the user
-- Add light humor and wit - make friendly jokes, use playful expressions
-- Use Indian expressions naturally: "yaar", "bhai", "actually", "basically", "no worries"
-- Be enthusiastic but not overwhelming - like a cheerful friend who listens well
-- Show respect: "That's a great question!", "You're absolutely right!", "Smart thinking!"
-- Use gentle humor: "Haha, good one!", "That made me smile!", "You're funny, yaar!"
-- Keep it conversational and warm - like talking to a good friend who respects you
-- You can use emojis in text but keep them minimal and natural
-
-Key rules:
-- MAXIMUM 2-3 sentences per response
-- Always be respectful and appreciative 
-- Add light humor when appropriate
-- Use contractions (I'm, you're, that's, etc.)
-- Sound like a fun, respectful friend - not a formal assistant
-- Use emojis sparingly and naturally (they won't be spoken, just shown in text)
-
-Remember: Be brief, funny, respectful, and genuinely caring!"""
-            
-            # Prepare conversation context
-            messages = [{'role': 'system', 'content': system_prompt}]
-            
-            # Add conversation history (last 6 exchanges for context but keep responses fresh)
-            for msg in self.conversation_history[-12:]:
-                messages.append(msg)
-            
-            # Add current user input
-            messages.append({'role': 'user', 'content': user_input})
-            
-            # Get response from Ollama
-            response = ollama.chat(model=self.model_name, messages=messages)
-            
-            bot_response = response['message']['content']
-            
-            # Post-process response to ensure it's short and add ARKA's personality
-            bot_response = self._make_response_short_and_friendly(bot_response)
-            
-            # Update conversation history
-            self.conversation_history.append({'role': 'user', 'content': user_input})
-            self.conversation_history.append({'role': 'assistant', 'content': bot_response})
-            
-            return bot_response
-            
-        except Exception as e:
-            error_msg = f"Oops! Having a tiny tech hiccup, yaar. Mind trying again? 😅"
-            print(f"Ollama error: {e}")
-            return error_msg
-
-    def _make_response_short_and_friendly(self, text: str) -> str:
-        """Make response short, friendly, humorous and respectful"""
-        import re
-        
-        # First, ensure the response isn't too long - trim if needed
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if s.strip()]
-        
-        # Keep maximum 2-3 sentences (about 80 words)
-        if len(sentences) > 3:
-            sentences = sentences[:3]
-        elif len(sentences) > 2:
-            # Check word count
-            total_words = sum(len(s.split()) for s in sentences)
-            if total_words > 80:
-                sentences = sentences[:2]
-        
-        # Reconstruct text
-        text = '. '.join(sentences) + ('.' if sentences else '')
-        
-        # Add natural contractions for friendliness
-        contractions = {
-            'I am': "I'm", 'you are': "you're", 'it is': "it's", 'that is': "that's",
-            'I will': "I'll", 'you will': "you'll", 'I would': "I'd", 'you would': "you'd",
-            'cannot': "can't", 'do not': "don't", 'does not': "doesn't", 'will not': "won't",
-            'should not': "shouldn't", 'could not': "couldn't", 'would not': "wouldn't",
-            'have not': "haven't", 'has not': "hasn't", 'had not': "hadn't"
-        }
-        
-        for full, contraction in contractions.items():
-            text = re.sub(r'\b' + full + r'\b', contraction, text, flags=re.IGNORECASE)
-        
-        # Add respectful expressions if not present
-        respect_words = ['sir', 'madam', 'great question', 'smart', 'absolutely right', 'good thinking']
-        if not any(word in text.lower() for word in respect_words) and len(text) > 30:
-            # Add subtle respect
-            if 'good' in text.lower():
-                text = re.sub(r'\bgood\b', 'really good', text, flags=re.IGNORECASE)
-            elif 'right' in text.lower():
-                text = re.sub(r'\bright\b', 'absolutely right', text, flags=re.IGNORECASE)
-        
-        # Add friendly Indian expressions if missing
-        friendly_words = ['yaar', 'bhai', 'actually', 'basically', 'no worries', 'totally']
-        if not any(word in text.lower() for word in friendly_words) and len(text) > 20:
-            # Add one friendly expression
-            if 'yes' in text.lower():
-                text = re.sub(r'\byes\b', 'yes, totally', text, flags=re.IGNORECASE)
-            elif 'sure' in text.lower():
-                text = re.sub(r'\bsure\b', 'sure, yaar', text, flags=re.IGNORECASE)
-            elif 'no problem' not in text.lower() and 'help' in text.lower():
-                text = text.rstrip('.') + ', no worries!'
-        
-        # Add light humor elements
-        humor_additions = [
-            ('great', 'totally great'),
-            ('interesting', 'quite interesting'),
-            ('cool', 'pretty cool'),
-            ('nice', 'really nice')
-        ]
-        
-        for original, replacement in humor_additions:
-            if original in text.lower() and replacement not in text.lower():
-                text = re.sub(r'\b' + original + r'\b', replacement, text, flags=re.IGNORECASE)
-                break  # Only add one humor element
-        
-        # Ensure it ends properly
-        if text and not text[-1] in '.!?':
-            text += '!'
-        
-        return text.strip()
+        return self.session.respond(user_input)
 
-    def _remove_emojis(self, text: str) -> str:
-        """Remove emojis and emoji descriptions from text for speech"""
-        import re
+    def stream_ollama_response(self, user_input: str) -> Iterator[str]:
+        """
+        Stream ARKA's response sentence by sentence while the model is still generating
         
-        # Remove emojis using a comprehensive pattern
-        emoji_pattern = re.compile("["
-                                   u"\U0001F600-\U0001F64F"  # emoticons
-                                   u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-                                   u"\U0001F680-\U0001F6FF"  # transport & map
-                                   u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
-                                   u"\U00002700-\U000027BF"  # dingbats
-                                   u"\U000024C2-\U0001F251"  # various symbols
-                                   u"\U0001F900-\U0001F9FF"  # supplemental symbols
-                                   u"\U0001FA70-\U0001FAFF"  # extended symbols
-                                   u"\U00002600-\U000026FF"  # miscellaneous symbols
-                                   u"\U0000FE00-\U0000FE0F"  # variation selectors
-                                   "]+", flags=re.UNICODE)
+        Args:
+            user_input: What the user said
+            
+        Yields:
+            Post-processed sentences, ready to be spoken
+        """
+        return self.session.stream_response(user_input)
+
+    def process_command(self, text: str) -> bool:
+        """Process special commands, return True if command was processed"""
+        command = self.session.handle_command(text)
+        if command is None:
+            return False
         
-        # Remove all emojis
-        clean_text = emoji_pattern.sub(' ', text)
+        reply, end = command
+        self.speak(reply, fixed=True)
+        return end
+
+    def _build_pipeline(self) -> Pipeline:
+        """
+        Build the staged turn pipeline
         
-        # Also remove specific emoji characters that might not be caught
-        emoji_chars = ['😄', '😊', '😅', '🎉', '🎯', '✅', '🚀', '🔥', '💡', '🎵', 
-                      '🗣️', '🎤', '🔊', '🧠', '🔄', '🛑', '⚠️', '❌', '🔍']
+        The capture stage is listen_for_audio, which feeds the first stage. Each
+        stage below runs in its own thread, so recognizing the next utterance
+        overlaps generating and speaking the current one. pyttsx3 synthesizes
+        and plays in a single call, so the TTS stage also does playback.
+        """
+        pipeline = Pipeline(maxsize=4, activity=self.speaking)
+        pipeline.add_stage('vad', self._vad_stage)
+        pipeline.add_stage('asr', self._asr_stage)
+        pipeline.add_stage('llm', self.session.generate)
+        pipeline.add_stage('postprocess', self._postprocess_stage)
+        pipeline.add_stage('tts', self._tts_stage, maxsize=8)
+        return pipeline
+
+    def _vad_stage(self, audio, emit):
+        """Trim silence off captured clips and drop the ones without speech"""
+        speech = self.vad.trim(audio.frame_data)
+        if not speech:
+            return
+        emit(sr.AudioData(speech, audio.sample_rate, audio.sample_width))
+
+    def _asr_stage(self, audio, emit):
+        """Turn captured audio into a new turn, handling voice commands"""
+        print("🔍 Processing your complete speech...")
+        turn = self._handle_transcript(self.speech_to_text(audio))
+        if turn is not None:
+            emit(turn)
+
+    def _handle_transcript(self, text: Optional[str]) -> Optional[Turn]:
+        """Validate a final transcript and handle voice commands, returning the new turn if any"""
+        if text and len(text.strip().split()) >= 1:  # At least 1 meaningful word
+            print(f"✅ You said: '{text}'")
+            
+            # Process special commands
+            if self.process_command(text):
+                self.events.post('stop')
+                return None
+            
+            return Turn(text)
         
-        for emoji in emoji_chars:
-            clean_text = clean_text.replace(emoji, ' ')
+        if text:
+            print(f"❌ Speech too short or unclear: '{text}' - please try again with a complete sentence.")
+        else:
+            print("❌ Could not understand that speech clearly - please speak more clearly.")
+        return None
+
+    def _postprocess_stage(self, item, emit):
+        """Make each sentence short, friendly and respectful"""
+        turn, sentence = item
+        if sentence is None:
+            emit(item)
+            return
+        
+        friendly = self.session.next_friendly_sentence(turn, sentence)
+        if friendly:
+            emit((turn, friendly))
+
+    def _tts_stage(self, item, emit):
+        """Speak sentences as they arrive and record the turn once it is complete"""
+        turn, sentence = item
+        if sentence is None:
+            self.session.finish_turn(turn)
+            self.is_speaking = False
+            print("✅ ARKA finished speaking\n")
+            return
         
-        # Clean up multiple spaces and trim
-        clean_text = re.sub(r'\s+', ' ', clean_text).strip()
+        if self.should_stop_speaking:
+            return
         
-        # Remove any remaining emoji-like patterns
-        clean_text = re.sub(r'[^\w\s\.,!?\'":-]', ' ', clean_text)
-        clean_text = re.sub(r'\s+', ' ', clean_text).strip()
+        self.current_turn = turn
+        self.is_speaking = True
+        print(f"🗣️  ARKA: {sentence}")
         
-        return clean_text
+        # Spell out numbers and drop emojis for speech (keep them in printed text)
+        speech_text = normalize_for_speech(sentence)
+        if speech_text:
+            self._say(speech_text)
+        turn.spoken.append(sentence)
 
-    def process_command(self, text: str) -> bool:
-        """Process special commands, return True if command was processed"""
-        text_lower = text.lower().strip()
-        
-        if any(word in text_lower for word in ['exit', 'quit', 'goodbye', 'stop', 'end']):
-            self.speak("Arre yaar, it was awesome chatting with you! Take care, and come back soon! 😄")
-            return True
-        elif 'clear history' in text_lower or 'reset conversation' in text_lower:
-            self.conversation_history.clear()
-            self.speak("Done! Fresh start, yaar. What's cooking now? 😊")
-            return False
-        elif 'help' in text_lower and len(text_lower.split()) == 1:
-            help_text = """Hey! I'm ARKA, your friendly voice buddy! Ask me anything, and I'll keep it short and sweet, yaar! 😄"""
-            self.speak(help_text)
-            return False
+    def _is_idle(self) -> bool:
+        """True when no turn is being recognized, generated or spoken"""
+        return self.pipeline is not None and self.pipeline.is_idle() and not self.is_speaking
+
+    def _cancel_current_turn(self):
+        """
+        Abandon the turn being answered so the interrupt can be handled right away
         
-        return False
+        Drops everything queued in the pipeline, aborts the Ollama request that
+        is still generating (closing its stream frees the Ollama host), and
+        keeps only the sentences that were actually spoken in the history.
+        """
+        self.pipeline.flush()
+        self.session.cancel()
+        if self.current_turn is not None:
+            self.session.finish_turn(self.current_turn)
+            self.current_turn = None
+
+    def _abandon_barge_in(self):
+        """
+        Recover from a barge-in that produced no interrupt (a cough or other noise)
+
+        The reply was already cut off, so it is dropped like an interrupted one,
+        keeping what was spoken, and the bot goes back to listening normally.
+        """
+        if not self.should_stop_speaking:
+            return  # Already handled by an interrupt
+        print("🔄 Nothing said after the interruption - listening again")
+        self._cancel_current_turn()
+        self.is_speaking = False
+        self.should_stop_speaking = False
 
     def run(self):
         """Main loop for the voice bot"""
-        self.speak("Hey there! I'm ARKA, your friendly voice buddy! Ready to chat and have some fun? 😄")
+        self.speak(ARKA_GREETING, fixed=True)
         
         self.is_listening = True
-        
-        # Start audio listening thread
-        audio_thread = threading.Thread(target=self.listen_for_audio, daemon=True)
+        self.pipeline = self._build_pipeline()
+        self.pipeline.start()
+        if self.summarizer is not None:
+            self.summarizer.start()
+        
+        # Start audio listening thread (the capture stage). Engines with partial
+        # results recognize while the user talks; others get whole phrases.
+        listener = self.listen_streaming if self.asr.streaming else self.listen_for_audio
+        audio_thread = threading.Thread(target=listener, daemon=True)
         audio_thread.start()
+        if self.barge_in is not None:
+            self.barge_in.start()
         
         try:
             while True:
-                # Check for interrupts first - highest priority
-                if not self.interrupt_queue.empty():
-                    interrupted_text = self.interrupt_queue.get()
-                    print(f"🔄 Processing complete interrupt: '{interrupted_text}'")
-                    
-                    # Validate interrupt has meaningful content
-                    if len(interrupted_text.strip().split()) >= 2:  # At least 2 words
-                        # Process special commands
-                        if self.process_command(interrupted_text):
-                            break
-                        
-                        # Get AI response for interrupt
-                        print("🧠 ARKA is thinking about your complete interrupt...")
-                        response = self.get_ollama_response(interrupted_text)
-                        
-                        # Speak the response
-                        print("🔊 ARKA responding to your interrupt...")
-                        self.speak(response)
+                # Sleep until a listener posts something; interrupts come out
+                # ahead of captured speech and jump the pipeline
+                event = self.events.get()
+                if event.kind == 'stop':
+                    break
+                if event.kind == 'capture':
+                    if isinstance(event.payload, Turn):
+                        self.pipeline.put(event.payload, stage='llm')
                     else:
-                        print(f"⚠️  Interrupt too short: '{interrupted_text}' - ignoring")
+                        self.pipeline.put(event.payload)
+                    continue
+                if event.kind == 'speech_done':
+                    self._abandon_barge_in()
                     continue
+                if event.kind != 'interrupt':
+                    continue
+                interrupted_text = event.payload
                 
-                # Check for regular audio in queue
-                try:
-                    audio = self.audio_queue.get(timeout=0.1)
-                    
-                    print("🔍 Processing your complete speech...")
-                    text = self.speech_to_text(audio)
+                print(f"🔄 Processing complete interrupt: '{interrupted_text}'")
+                self._cancel_current_turn()
+                self.is_speaking = False
+                self.should_stop_speaking = False
+                
+                # Validate interrupt has meaningful content
+                if len(interrupted_text.strip().split()) >= 2:  # At least 2 words
+                    # Process special commands
+                    if self.process_command(interrupted_text):
+                        break
                     
-                    if text and len(text.strip().split()) >= 1:  # At least 1 meaningful word
-                        print(f"✅ You said: '{text}'")
-                        
-                        # Process special commands
-                        if self.process_command(text):
-                            break
-                        
-                        # Get AI response
-                        print("🧠 ARKA is thinking...")
-                        response = self.get_ollama_response(text)
-                        
-                        # Speak the response
-                        print("🔊 ARKA is about to speak...")
-                        self.speak(response)
-                    else:
-                        if text:
-                            print(f"❌ Speech too short or unclear: '{text}' - please try again with a complete sentence.")
-                        else:
-                            print("❌ Could not understand that speech clearly - please speak more clearly.")
-                        
-                except queue.Empty:
-                    continue
-                except KeyboardInterrupt:
-                    print("\nShutting down...")
-                    break
+                    print("🧠 ARKA is thinking about your complete interrupt...")
+                    turn = Turn(interrupted_text)
+                    # The user is already waiting: this reply jumps the Ollama queue
+                    turn.state['priority'] = PRIORITY_URGENT
+                    self.pipeline.put(turn, stage='llm')
+                else:
+                    print(f"⚠️  Interrupt too short: '{interrupted_text}' - ignoring")
                     
+        except KeyboardInterrupt:
+            print("\nShutting down...")
         finally:
             self.is_listening = False
-            self.speak("Thanks for the awesome chat, yaar! Have a great day! 😊")
+            self.pipeline.stop()
+            if self.summarizer is not None:
+                self.summarizer.stop()
+            print(self.llm.metrics.report())
+            if self.llm.response_cache is not None:
+                print(self.llm.response_cache.report())
+            if self.barge_in is not None:
+                self.barge_in.stop()
+            self.capture.stop()
+            if self.calibration is not None:
+                self.calibration.stop()
+            if self.tts.cache is not None:
+                print(self.tts.cache.report())
+            self.speak(ARKA_FAREWELL, fixed=True)
+            self.tts.close()
 
 def main():
     """Main function to run ARKA - the Indian voice bot"""